@@ -1,5 +1,5 @@
 from pydantic_settings import BaseSettings
-from typing import Optional
+from typing import Optional, List, Dict
 
 
 class Settings(BaseSettings):
@@ -18,6 +18,11 @@ class Settings(BaseSettings):
     TWILIO_AUTH_TOKEN: str
     TWILIO_FROM_PATIENT: str
     TWILIO_FROM_DOCTOR: str
+    TWILIO_MAX_CONCURRENCY: int = 10  # Twilio API calls in flight at once (worker threads)
+    TWILIO_TIMEOUT_SECONDS: float = 10.0  # HTTP timeout per Twilio API call
+    TWILIO_LOG_BATCH_SIZE: int = 100  # twilio_logs are written in batches of this size...
+    TWILIO_LOG_FLUSH_SECONDS: float = 1.0  # ...or at least this often
+    TWILIO_LOG_MAX_BUFFER: int = 10000  # Logs beyond this many unwritten are dropped
     
     # Application Configuration
     BACKEND_URL: str = "http://localhost:8000"
@@ -25,6 +30,48 @@ class Settings(BaseSettings):
     
     # APScheduler Configuration
     SCHEDULER_JOBSTORE_URL: Optional[str] = None
+    RUN_SCHEDULER_IN_API: bool = True  # Set false when sweeps run in a separate `python -m app.worker`
+    
+    # Reminder Sweep Configuration
+    REMINDER_OFFSETS_HOURS: List[float] = [3]  # Default reminder times, in hours before the appointment
+    REMINDER_OFFSETS_BY_SPECIALIZATION: Dict[str, List[float]] = {}  # e.g. {"Cardiology": [24, 2]} (JSON in .env)
+    REMINDER_SWEEP_INTERVAL_SECONDS: int = 30  # How often due reminders are claimed
+    REMINDER_SWEEP_BATCH_SIZE: int = 200  # Max reminders claimed per sweep
+    REMINDER_LEASE_SECONDS: int = 300  # Claimed reminders are retried after this if not sent
+    REMINDER_PURGE_INTERVAL_MINUTES: int = 60  # How often orphaned reminders are cleared
+    REMINDER_REHYDRATE_PAGE_SIZE: int = 1000  # Page size for the startup reminder rehydration
+    REMINDER_SPREAD_SECONDS: int = 600  # Each appointment's reminders go out a fixed 0..this many seconds early, flattening :00/:30 bursts
+    REMINDER_RATE_PER_SECOND: float = 5.0  # Reminder SMS dispatch rate (match Twilio throughput)
+    REMINDER_BURST: int = 10  # Token bucket capacity for reminder dispatch
+    CATCHUP_BATCH_SIZE: int = 100  # Overdue reminders / no-shows handled per catch-up batch
+    CATCHUP_MAX_PER_SECOND: float = 20.0  # Catch-up rate limit (appointments per second)
+    
+    # Leader Election Configuration (only the leader runs sweeps)
+    LEADER_LEASE_TTL_SECONDS: int = 30  # Leader lease expires if not renewed within this
+    LEADER_HEARTBEAT_SECONDS: int = 10  # How often every process renews or tries to take the lease
+    
+    # Stats Configuration
+    STATS_USE_ROLLUP: bool = True  # Serve doctor stats from doctor_stats_daily
+    STATS_MAX_TIME_MS: int = 5000  # Server-side time limit for stats aggregations
+    STATS_CACHE_TTL_SECONDS: int = 60  # Doctor stats result cache TTL; bounds staleness from other processes' writes
+    STATS_CACHE_MAX_ENTRIES: int = 1024
+    ANALYTICS_READ_PREFERENCE: str = "primary"  # e.g. secondaryPreferred to offload clinic-wide scans
+    ANALYTICS_MAX_TIME_MS: int = 30000  # Server-side time limit for clinic-wide analytics
+    
+    # No-show Risk Configuration
+    NO_SHOW_RISK_THRESHOLD: float = 0.5  # Patients at or above get an extra reminder
+    NO_SHOW_EXTRA_REMINDER_HOURS: int = 24  # Extra reminder lead time for high-risk patients
+    
+    # Change Stream Configuration (needs a replica set)
+    CHANGE_STREAM_ENABLED: bool = False  # Invalidate API caches on appointment writes from other processes
+    CHANGE_STREAM_CONSUMER: str = "api"  # Resume token key; give processes distinct names to resume each one
+    CHANGE_STREAM_TOKEN_SAVE_SECONDS: int = 5  # How often the resume token is persisted
+    CHANGE_STREAM_RETRY_SECONDS: int = 5  # Reconnect delay after a change stream error
+    
+    # Notification Configuration
+    NOTIFICATION_CONCURRENCY: int = 10  # Max notifications sent in parallel per batch
+    NOTIFICATION_USER_CACHE_SECONDS: int = 60  # Patient/doctor name and phone cache for notifications
+    NOTIFICATION_USER_CACHE_MAX_ENTRIES: int = 10000
     
     class Config:
         env_file = ".env"
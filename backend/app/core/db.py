@@ -1,6 +1,7 @@
 from motor.motor_asyncio import AsyncIOMotorClient, AsyncIOMotorDatabase
 from app.config import settings
 from typing import Optional
+from pymongo import ReadPreference
 
 class MongoDB:
     client: Optional[AsyncIOMotorClient] = None
@@ -41,3 +42,32 @@ def get_appointments_collection():
 
 def get_twilio_logs_collection():
     return get_database()["twilio_logs"]
+
+
+def get_doctor_stats_daily_collection():
+    return get_database()["doctor_stats_daily"]
+
+
+def get_scheduler_leases_collection():
+    return get_database()["scheduler_leases"]
+
+
+def get_scheduler_status_collection():
+    return get_database()["scheduler_status"]
+
+
+READ_PREFERENCES = {
+    "primary": ReadPreference.PRIMARY,
+    "primaryPreferred": ReadPreference.PRIMARY_PREFERRED,
+    "secondary": ReadPreference.SECONDARY,
+    "secondaryPreferred": ReadPreference.SECONDARY_PREFERRED,
+    "nearest": ReadPreference.NEAREST,
+}
+
+
+def get_analytics_collection(name: str):
+    """Get a collection using the analytics read preference (e.g. a secondary)"""
+    read_preference = READ_PREFERENCES.get(settings.ANALYTICS_READ_PREFERENCE)
+    if read_preference is None:
+        raise Exception(f"Invalid ANALYTICS_READ_PREFERENCE: {settings.ANALYTICS_READ_PREFERENCE}")
+    return get_database().get_collection(name, read_preference=read_preference)
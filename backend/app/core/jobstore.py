@@ -0,0 +1,97 @@
+"""
+Event-loop-safe MongoDB jobstore for APScheduler
+
+MongoDBJobStore uses a synchronous pymongo client, and AsyncIOScheduler calls
+the jobstore on the event loop (add_job, and get_due_jobs/update_job on every
+wakeup), so each call blocks all requests for a Mongo round trip.
+"""
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List
+from apscheduler.jobstores.memory import MemoryJobStore
+from apscheduler.job import Job
+from apscheduler.util import datetime_to_utc_timestamp
+from bson.binary import Binary
+
+
+class ThreadedMongoDBJobStore(MemoryJobStore):
+    """
+    Jobstore that serves the scheduler from memory and persists to MongoDB
+    from a dedicated thread
+    
+    - Documents use MongoDBJobStore's format, so existing apscheduler_jobs
+      collections keep working
+    - Persisted jobs are fetched once before the scheduler starts
+      (load_persisted, run off the event loop) and restored in start()
+    - Writes are queued on a single worker thread in call order; queued
+      writes still finish after shutdown, before the process exits
+    """
+    
+    def __init__(self, client, database: str, collection: str, pickle_protocol: int = pickle.HIGHEST_PROTOCOL):
+        super().__init__()
+        self.collection = client[database][collection]
+        self.pickle_protocol = pickle_protocol
+        self._persisted: List[Dict[str, Any]] = []
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="jobstore")
+        self.write_errors = 0
+    
+    def load_persisted(self):
+        """Blocking: fetch persisted jobs; call from a thread before scheduler start"""
+        self.collection.create_index("next_run_time", sparse=True)
+        self._persisted = list(self.collection.find({}, ["job_state"]))
+    
+    def start(self, scheduler, alias):
+        super().start(scheduler, alias)
+        
+        for document in self._persisted:
+            try:
+                job = Job.__new__(Job)
+                job.__setstate__(pickle.loads(document["job_state"]))
+                job._scheduler = scheduler
+                job._jobstore_alias = alias
+            except Exception as e:
+                print(f"⚠️ Unable to restore job '{document['_id']}', removing it: {str(e)}")
+                self._submit(self.collection.delete_one, {"_id": document["_id"]})
+                continue
+            super().add_job(job)
+        
+        self._persisted = []
+    
+    def add_job(self, job):
+        super().add_job(job)
+        self._save(job)
+    
+    def update_job(self, job):
+        super().update_job(job)
+        self._save(job)
+    
+    def remove_job(self, job_id):
+        super().remove_job(job_id)
+        self._submit(self.collection.delete_one, {"_id": job_id})
+    
+    def remove_all_jobs(self):
+        super().remove_all_jobs()
+        self._submit(self.collection.delete_many, {})
+    
+    def shutdown(self):
+        super().shutdown()
+        self._writer.shutdown(wait=False)
+    
+    def _save(self, job):
+        # Serialize on the caller's thread so later changes to the job aren't picked up
+        document = {
+            "_id": job.id,
+            "next_run_time": datetime_to_utc_timestamp(job.next_run_time),
+            "job_state": Binary(pickle.dumps(job.__getstate__(), self.pickle_protocol))
+        }
+        self._submit(self.collection.replace_one, {"_id": job.id}, document, upsert=True)
+    
+    def _submit(self, method, *args, **kwargs):
+        def write():
+            try:
+                method(*args, **kwargs)
+            except Exception as e:
+                self.write_errors += 1
+                print(f"⚠️ Failed to persist scheduler job: {str(e)}")
+        
+        self._writer.submit(write)
@@ -0,0 +1,64 @@
+import asyncio
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.executors.asyncio import AsyncIOExecutor
+from app.config import settings
+from app.core.jobstore import ThreadedMongoDBJobStore
+
+# Shared scheduler instance (run by the API process or by app.worker)
+scheduler = AsyncIOScheduler()
+
+
+async def configure_scheduler():
+    """
+    Configure APScheduler with MongoDB jobstore if URL provided
+    
+    The jobstore persists from its own thread, so no jobstore call blocks the
+    event loop; persisted jobs are loaded in a thread before the scheduler starts
+    """
+    if settings.SCHEDULER_JOBSTORE_URL:
+        from pymongo import MongoClient
+        mongo_client = MongoClient(settings.SCHEDULER_JOBSTORE_URL)
+        jobstore = ThreadedMongoDBJobStore(
+            client=mongo_client,
+            database=settings.MONGODB_DB_NAME,
+            collection='apscheduler_jobs'
+        )
+        await asyncio.to_thread(jobstore.load_persisted)
+        
+        jobstores = {
+            'default': jobstore
+        }
+        executors = {
+            'default': AsyncIOExecutor()
+        }
+        scheduler.configure(jobstores=jobstores, executors=executors)
+
+
+async def start_scheduler():
+    """Start the scheduler and register the background sweeps"""
+    await configure_scheduler()
+    
+    scheduler.start()
+    print("✅ APScheduler started")
+    
+    # Sweep jobs run in every scheduler process but only act while holding the leader lease
+    from app.services.scheduler_service import (
+        start_leader_election, start_reminder_sweep, start_auto_cancel_cron, start_risk_scoring_cron
+    )
+    start_leader_election(scheduler)
+    start_reminder_sweep(scheduler)
+    start_auto_cancel_cron(scheduler)
+    start_risk_scoring_cron(scheduler)
+
+
+async def shutdown_scheduler():
+    """Stop the scheduler and hand the sweeps over to another process right away"""
+    from app.services.leader_service import scheduler_leader
+    from app.services.scheduler_service import stop_catchup
+    
+    scheduler.shutdown()
+    print("❌ APScheduler shutdown")
+    
+    # No catch-up writes once another process can hold the lease
+    await stop_catchup()
+    await scheduler_leader.release()
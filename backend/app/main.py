@@ -3,12 +3,9 @@ from fastapi.middleware.cors import CORSMiddleware
 from contextlib import asynccontextmanager
 from app.core.db import connect_to_mongo, close_mongo_connection
 from app.config import settings
-from apscheduler.schedulers.asyncio import AsyncIOScheduler
-from apscheduler.jobstores.mongodb import MongoDBJobStore
-from apscheduler.executors.asyncio import AsyncIOExecutor
-
-# Initialize scheduler
-scheduler = AsyncIOScheduler()
+from app.core.scheduler import scheduler, start_scheduler, shutdown_scheduler
+from app.services.change_stream_service import start_change_stream, stop_change_stream
+from app.services.twilio_service import twilio_log_writer
 
 
 @asynccontextmanager
@@ -22,34 +19,21 @@ async def lifespan(app: FastAPI):
     from app.core.db import get_database
     await initialize_indexes(get_database())
     
-    # Configure APScheduler with MongoDB jobstore if URL provided
-    if settings.SCHEDULER_JOBSTORE_URL:
-        from pymongo import MongoClient
-        mongo_client = MongoClient(settings.SCHEDULER_JOBSTORE_URL)
-        jobstores = {
-            'default': MongoDBJobStore(
-                database=settings.MONGODB_DB_NAME,
-                collection='apscheduler_jobs',
-                client=mongo_client
-            )
-        }
-        executors = {
-            'default': AsyncIOExecutor()
-        }
-        scheduler.configure(jobstores=jobstores, executors=executors)
-    
-    scheduler.start()
-    print("✅ APScheduler started")
+    # Background scheduler (skipped when a separate app.worker process runs it)
+    if settings.RUN_SCHEDULER_IN_API:
+        await start_scheduler()
     
-    # Start auto-cancel cron job
-    from app.services.scheduler_service import start_auto_cancel_cron
-    start_auto_cancel_cron(scheduler)
+    # Appointment change events for in-process subscribers (cache invalidation)
+    if settings.CHANGE_STREAM_ENABLED:
+        start_change_stream()
     
     yield
     
     # Shutdown
-    scheduler.shutdown()
-    print("❌ APScheduler shutdown")
+    await stop_change_stream()
+    if settings.RUN_SCHEDULER_IN_API:
+        await shutdown_scheduler()
+    await twilio_log_writer.close()
     await close_mongo_connection()
 
 
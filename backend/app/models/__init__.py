@@ -4,6 +4,8 @@ Initialize all database indexes on startup
 from app.models.user_model import create_user_indexes
 from app.models.appointment_model import create_appointment_indexes
 from app.models.twilio_log_model import create_twilio_log_indexes
+from app.models.doctor_stats_model import create_doctor_stats_indexes
+from app.models.scheduler_lease_model import create_scheduler_lease_indexes
 
 
 async def initialize_indexes(db):
@@ -13,5 +15,7 @@ async def initialize_indexes(db):
     await create_user_indexes(db)
     await create_appointment_indexes(db)
     await create_twilio_log_indexes(db)
+    await create_doctor_stats_indexes(db)
+    await create_scheduler_lease_indexes(db)
     
     print("✅ All indexes created successfully\n")
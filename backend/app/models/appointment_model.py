@@ -20,8 +20,12 @@ class AppointmentModel(BaseModel):
     reason: str = Field(..., min_length=1, max_length=500, description="Reason for appointment")
     createdAt: datetime = Field(default_factory=datetime.utcnow)
     createdBy: Literal["patient", "system"] = "patient"
-    reminder3hSent: bool = Field(default=False, description="Whether 3-hour reminder was sent")
-    reminderJobMeta: Optional[ReminderJobMeta] = None
+    reminder3hSent: bool = Field(default=False, description="Whether a reminder was sent (any offset)")
+    reminderJobMeta: Optional[ReminderJobMeta] = None  # Legacy per-appointment APScheduler job
+    pendingReminders: Optional[List[datetime]] = Field(default=None, description="Due times of pending reminders, earliest first")
+    firstReminderSentAt: Optional[datetime] = None
+    lastReminderSentAt: Optional[datetime] = None
+    reminderLeaseUntil: Optional[datetime] = Field(default=None, description="Reminder sweep lease expiry")
     twilioLogs: List[str] = Field(default_factory=list, description="Array of Twilio log IDs")
     
     class Config:
@@ -81,3 +85,26 @@ async def create_appointment_indexes(db):
         name="no_show_detection"
     )
     print("✅ Created compound index for no-show detection")
+    
+    # ESR (Equality, Sort, Range) indexes for filtered appointment listings
+    # Owner and status are equality matches, start is both the sort key and the range
+    await appointments_collection.create_index(
+        [("patientId", 1), ("status", 1), ("start", -1)],
+        name="patient_status_start"
+    )
+    print("✅ Created index on appointments.{patientId, status, start}")
+    
+    await appointments_collection.create_index(
+        [("doctorId", 1), ("status", 1), ("start", -1)],
+        name="doctor_status_start"
+    )
+    print("✅ Created index on appointments.{doctorId, status, start}")
+    
+    # Multikey partial index for the reminder sweep: one entry per pending
+    # reminder, only on appointments that still have one
+    await appointments_collection.create_index(
+        [("pendingReminders", 1)],
+        partialFilterExpression={"pendingReminders": {"$exists": True}},
+        name="pending_reminders"
+    )
+    print("✅ Created partial index on appointments.pendingReminders")
@@ -0,0 +1,44 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class DoctorStatsDailyModel(BaseModel):
+    """Per-doctor, per-day appointment counters (incrementally maintained rollup)"""
+    doctorId: str = Field(..., description="Doctor's user ID")
+    day: str = Field(..., description="Appointment day (YYYY-MM-DD, UTC)")
+    month: str = Field(..., description="Appointment month (YYYY-MM, UTC)")
+    total: int = Field(default=0, description="Appointments booked for this day")
+    scheduled: int = 0
+    confirmed: int = 0
+    completed: int = 0
+    cancelled: int = 0
+    no_show: int = 0
+    updatedAt: datetime = Field(default_factory=datetime.utcnow)
+    
+    class Config:
+        json_schema_extra = {
+            "example": {
+                "doctorId": "507f1f77bcf86cd799439011",
+                "day": "2025-11-20",
+                "month": "2025-11",
+                "total": 12,
+                "scheduled": 2,
+                "confirmed": 3,
+                "completed": 5,
+                "cancelled": 1,
+                "no_show": 1
+            }
+        }
+
+
+async def create_doctor_stats_indexes(db):
+    """Create indexes for doctor_stats_daily collection"""
+    doctor_stats_collection = db["doctor_stats_daily"]
+    
+    # One rollup row per doctor per day; also serves the stats range reads
+    await doctor_stats_collection.create_index(
+        [("doctorId", 1), ("day", -1)],
+        unique=True,
+        name="doctor_day_unique"
+    )
+    print("✅ Created unique index on doctor_stats_daily.{doctorId, day}")
@@ -0,0 +1,36 @@
+from pydantic import BaseModel, Field
+from datetime import datetime
+
+
+class SchedulerLeaseModel(BaseModel):
+    """Leader lease document: one per lease name, owned by a single process"""
+    name: str = Field(..., alias="_id", description="Lease name (e.g. 'scheduler')")
+    holder: str = Field(..., description="Holder ID (host:pid:token)")
+    acquiredAt: datetime = Field(default_factory=datetime.utcnow)
+    renewedAt: datetime = Field(default_factory=datetime.utcnow)
+    expiresAt: datetime = Field(..., description="Lease expiry; renewed by the holder's heartbeat")
+    
+    class Config:
+        populate_by_name = True
+        json_schema_extra = {
+            "example": {
+                "_id": "scheduler",
+                "holder": "api-1:4242:9f1c2a7b",
+                "acquiredAt": "2025-11-20T10:00:00Z",
+                "renewedAt": "2025-11-20T10:05:00Z",
+                "expiresAt": "2025-11-20T10:05:30Z"
+            }
+        }
+
+
+async def create_scheduler_lease_indexes(db):
+    """Create indexes for scheduler_leases collection"""
+    scheduler_leases_collection = db["scheduler_leases"]
+    
+    # TTL index: MongoDB removes leases whose holder stopped renewing
+    await scheduler_leases_collection.create_index(
+        "expiresAt",
+        expireAfterSeconds=0,
+        name="lease_expiry_ttl"
+    )
+    print("✅ Created TTL index on scheduler_leases.expiresAt")
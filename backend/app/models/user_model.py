@@ -16,6 +16,8 @@ class DoctorProfile(BaseModel):
     slotDurationMin: int = Field(default=30, description="Slot duration in minutes")
     weeklySchedule: List[WeeklyScheduleSlot] = Field(default_factory=list)
     explicitSlots: Optional[List[datetime]] = Field(default=None, description="Specific available datetime slots")
+    scheduleExceptions: Optional[List[datetime]] = Field(default=None, description="Dates (UTC) when the weekly schedule does not apply")
+    reminderOffsetsHours: Optional[List[float]] = Field(default=None, description="Reminder times in hours before start (overrides the specialization policy)")
 
 
 class PatientProfile(BaseModel):
@@ -23,6 +25,8 @@ class PatientProfile(BaseModel):
     age: Optional[int] = Field(default=None, ge=0, le=150)
     gender: Optional[Literal["male", "female", "other"]] = None
     notes: Optional[str] = None
+    noShowRisk: Optional[float] = Field(default=None, ge=0, le=1, description="Batch-computed no-show risk score")
+    noShowRiskUpdatedAt: Optional[datetime] = None
 
 
 class UserModel(BaseModel):
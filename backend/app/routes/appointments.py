@@ -1,20 +1,32 @@
-from fastapi import APIRouter, Depends, HTTPException, status, Query
+from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
+from fastapi.responses import StreamingResponse
 from app.schemas.appointment import (
     CreateAppointmentRequest,
     AppointmentResponse,
     SlotResponse,
-    DoctorStatsResponse
+    DoctorStatsResponse,
+    BulkStatusUpdateRequest,
+    BulkStatusUpdateResponse,
+    UtilizationReportResponse
 )
 from app.services.appointment_service import (
     create_appointment,
     get_appointments,
     get_appointment_by_id,
     update_appointment_status,
+    bulk_update_appointment_status,
     get_doctor_stats,
     get_doctor_slots
 )
 from app.core.security import get_current_user, get_current_patient, get_current_doctor
+from app.services.twilio_service import send_status_notifications
+from app.services.stats_service import stream_clinic_stats, doctor_stats_cache
+from app.services.utilization_service import get_utilization_report
+from app.services.scheduler_service import get_catchup_progress, get_scheduler_status
+from app.utils.time_utils import ensure_utc
 from typing import Dict, Any, List, Optional
+from datetime import datetime, date
+import json
 
 router = APIRouter()
 
@@ -36,7 +48,8 @@ async def book_appointment(
         doctor_id=request.doctorId,
         patient_id=current_user["_id"],
         start=request.start,
-        reason=request.reason
+        reason=request.reason,
+        patient_risk=(current_user.get("patientProfile") or {}).get("noShowRisk")
     )
     
     return appointment
@@ -47,13 +60,18 @@ async def list_appointments(
     role: str = Query(..., description="Filter by role: doctor or patient"),
     limit: int = Query(10, ge=1, le=100),
     month: Optional[str] = Query(None, description="Filter by month: YYYY-MM"),
+    status_filter: Optional[List[str]] = Query(None, alias="status", description="Filter by status (repeatable)"),
+    from_date: Optional[datetime] = Query(None, alias="from", description="Start time lower bound (inclusive, UTC)"),
+    to_date: Optional[datetime] = Query(None, alias="to", description="Start time upper bound (exclusive, UTC)"),
+    upcoming: Optional[bool] = Query(None, description="true for upcoming, false for past appointments"),
     current_user: Dict[str, Any] = Depends(get_current_user)
 ):
     """
     List appointments for current user
     
     - Returns recent appointments (default 10)
-    - Can filter by month
+    - Can filter by month, status set, date range and upcoming/past
+    - Upcoming appointments are sorted soonest first
     - Role determines which appointments are returned
     """
     # Validate role matches user
@@ -67,7 +85,11 @@ async def list_appointments(
         role=role,
         user_id=current_user["_id"],
         limit=limit,
-        month=month
+        month=month,
+        statuses=status_filter,
+        from_date=from_date,
+        to_date=to_date,
+        upcoming=upcoming
     )
     
     return appointments
@@ -159,11 +181,44 @@ async def complete_appointment(
     return updated
 
 
+@router.patch("/status/bulk", response_model=BulkStatusUpdateResponse)
+async def bulk_update_status(
+    request: BulkStatusUpdateRequest,
+    background_tasks: BackgroundTasks,
+    current_user: Dict[str, Any] = Depends(get_current_doctor)
+):
+    """
+    Update the status of many appointments at once (doctor only)
+    
+    - Typically used at the end of a clinic session
+    - Applies all guarded transitions in a single bulk write
+    - Returns a result per appointment ID
+    - Notifications are sent as one batch after the response
+    """
+    results, updated_docs = await bulk_update_appointment_status(
+        appointment_ids=request.appointmentIds,
+        new_status=request.status,
+        user_id=current_user["_id"],
+        user_role=current_user["role"]
+    )
+    
+    if updated_docs:
+        background_tasks.add_task(send_status_notifications, updated_docs, request.status)
+    
+    return {
+        "status": request.status,
+        "updated": len(updated_docs),
+        "results": results
+    }
+
+
 @router.get("/stats/doctor/{doctor_id}", response_model=DoctorStatsResponse)
 async def get_doctor_appointment_stats(
     doctor_id: str,
     groupBy: str = Query("month", description="Group by: month or day"),
-    limit: int = Query(10, ge=1, le=100)
+    limit: int = Query(10, ge=1, le=100),
+    from_date: Optional[datetime] = Query(None, alias="from", description="Start time lower bound (inclusive, UTC)"),
+    to_date: Optional[datetime] = Query(None, alias="to", description="Start time upper bound (exclusive, UTC)")
 ):
     """
     Get appointment statistics for a doctor
@@ -171,11 +226,123 @@ async def get_doctor_appointment_stats(
     - Returns aggregated data grouped by month or day
     - Includes counts by status
     - Limited to specified number of periods
+    - Optional from/to window limits the appointments considered
     """
-    stats = await get_doctor_stats(doctor_id, group_by=groupBy, limit=limit)
+    stats = await get_doctor_stats(
+        doctor_id,
+        group_by=groupBy,
+        limit=limit,
+        from_date=from_date,
+        to_date=to_date
+    )
     return stats
 
 
+@router.get("/stats/cache")
+async def get_stats_cache_info(
+    current_user: Dict[str, Any] = Depends(get_current_doctor)
+):
+    """
+    Get doctor stats cache statistics (doctor only)
+    
+    - Hit/miss/coalesced counters for tuning TTL and capacity
+    - Counters are per API process
+    """
+    return doctor_stats_cache.stats()
+
+
+@router.get("/scheduler/catchup")
+async def get_scheduler_catchup_progress(
+    current_user: Dict[str, Any] = Depends(get_current_doctor)
+):
+    """
+    Get progress of the latest scheduler catch-up run (doctor only)
+    
+    - Catch-up drains overdue reminders and no-shows after downtime
+    - Reports backlog window, totals and processed counts
+    """
+    progress = await get_catchup_progress()
+    if progress is None:
+        return {"state": "idle"}
+    return progress
+
+
+@router.get("/scheduler/reminders")
+async def get_reminder_dispatch_metrics(
+    current_user: Dict[str, Any] = Depends(get_current_doctor)
+):
+    """
+    Get reminder dispatch metrics (doctor only)
+    
+    - Queue depth: reminders within the dispatch window not yet claimed
+    - Dispatch lag: send time minus due time (negative when sent early)
+    - Written by the scheduler leader after every reminder sweep
+    """
+    metrics = await get_scheduler_status("reminder_dispatch")
+    if metrics is None:
+        return {"sent": 0, "queueDepth": 0}
+    return metrics
+
+
+@router.get("/stats/clinic")
+async def get_clinic_appointment_stats(
+    groupBy: str = Query("month", description="Group by: month or day"),
+    bySpecialization: bool = Query(False, description="Group doctors by specialization"),
+    from_date: Optional[datetime] = Query(None, alias="from", description="Start time lower bound (inclusive, UTC)"),
+    to_date: Optional[datetime] = Query(None, alias="to", description="Start time upper bound (exclusive, UTC)"),
+    current_user: Dict[str, Any] = Depends(get_current_doctor)
+):
+    """
+    Get clinic-wide appointment statistics for every doctor (doctor only)
+    
+    - One aggregation grouped by doctor (or specialization) and period
+    - Includes show, no-show and cancellation rates
+    - Streamed as newline-delimited JSON, one row per line
+    - Runs on the configured analytics read preference
+    """
+    if from_date is not None:
+        from_date = ensure_utc(from_date).replace(tzinfo=None)
+    if to_date is not None:
+        to_date = ensure_utc(to_date).replace(tzinfo=None)
+    
+    rows = await stream_clinic_stats(
+        group_by=groupBy,
+        by_specialization=bySpecialization,
+        from_date=from_date,
+        to_date=to_date
+    )
+    
+    async def ndjson():
+        async for row in rows:
+            yield json.dumps(row, default=str) + "\n"
+    
+    return StreamingResponse(ndjson(), media_type="application/x-ndjson")
+
+
+@router.get("/stats/utilization", response_model=UtilizationReportResponse)
+async def get_slot_utilization(
+    from_date: date = Query(..., alias="from", description="First day (YYYY-MM-DD, inclusive)"),
+    to_date: date = Query(..., alias="to", description="Last day (YYYY-MM-DD, exclusive)"),
+    groupBy: str = Query("day", description="Group by: day or week"),
+    doctorId: Optional[List[str]] = Query(None, description="Limit to these doctors (repeatable)"),
+    current_user: Dict[str, Any] = Depends(get_current_doctor)
+):
+    """
+    Get slot utilization (booked slots / offered slots) per doctor (doctor only)
+    
+    - Offered capacity comes from weekly schedules, explicit slots and exceptions
+    - Booked excludes cancelled appointments
+    - Arrays in each doctor row align with the returned periods
+    """
+    report = await get_utilization_report(
+        start_date=from_date,
+        end_date=to_date,
+        group_by=groupBy,
+        doctor_ids=doctorId
+    )
+    return report
+
+
 @router.get("/slots/{doctor_id}", response_model=List[SlotResponse])
 async def get_available_slots(
     doctor_id: str,
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Request, HTTPException, status, Header
 from twilio.request_validator import RequestValidator
 from app.config import settings
-from app.core.db import get_appointments_collection, get_twilio_logs_collection
+from app.core.db import get_appointments_collection
 from app.services.appointment_service import update_appointment_status
+from app.services.twilio_service import twilio_log_writer
 from datetime import datetime
 from bson import ObjectId
 import re
@@ -19,9 +20,7 @@ def verify_twilio_signature(url: str, post_data: dict, signature: str) -> bool:
 
 
 async def log_incoming_sms(from_number: str, to_number: str, body: str, message_sid: str):
-    """Log incoming SMS to database"""
-    twilio_logs_collection = get_twilio_logs_collection()
-    
+    """Log incoming SMS to database (buffered)"""
     log_doc = {
         "to": to_number,
         "from": from_number,
@@ -32,8 +31,8 @@ async def log_incoming_sms(from_number: str, to_number: str, body: str, message_
         "twilioSid": message_sid
     }
     
-    result = await twilio_logs_collection.insert_one(log_doc)
-    return str(result.inserted_id)
+    log_id = twilio_log_writer.add(log_doc)
+    return str(log_id) if log_id else None
 
 
 async def process_sms_command(body: str, from_number: str) -> dict:
@@ -1,6 +1,6 @@
 from pydantic import BaseModel, Field
-from typing import Optional, Literal
-from datetime import datetime
+from typing import Optional, Literal, List
+from datetime import datetime, date
 
 
 class CreateAppointmentRequest(BaseModel):
@@ -23,11 +23,34 @@ class AppointmentResponse(BaseModel):
     createdBy: Literal["patient", "system"]
     reminder3hSent: bool
     reminderJobMeta: Optional[dict] = None
+    pendingReminders: Optional[List[datetime]] = None
+    patientNoShowRisk: Optional[float] = None  # Doctor listings only
     
     class Config:
         populate_by_name = True
 
 
+class BulkStatusUpdateRequest(BaseModel):
+    """Bulk status update request"""
+    appointmentIds: List[str] = Field(..., min_length=1, max_length=100)
+    status: Literal["completed", "cancelled", "no_show"]
+
+
+class BulkStatusResult(BaseModel):
+    """Per-appointment result of a bulk status update"""
+    appointmentId: str
+    success: bool
+    status: Optional[str] = None
+    error: Optional[str] = None
+
+
+class BulkStatusUpdateResponse(BaseModel):
+    """Bulk status update response"""
+    status: str
+    updated: int
+    results: List[BulkStatusResult]
+
+
 class SlotResponse(BaseModel):
     """Slot availability response"""
     start: datetime
@@ -50,3 +73,25 @@ class DoctorStatsResponse(BaseModel):
     doctorId: str
     totalAppointments: int
     stats: list[StatsGroupItem]
+
+
+class DoctorUtilization(BaseModel):
+    """Per-doctor utilization arrays, aligned with the report periods"""
+    doctorId: str
+    doctorName: str
+    specialization: Optional[str] = None
+    offered: List[int]
+    booked: List[int]
+    utilization: List[Optional[float]]
+    totalOffered: int
+    totalBooked: int
+    overallUtilization: Optional[float] = None
+
+
+class UtilizationReportResponse(BaseModel):
+    """Slot utilization report (booked slots / offered slots)"""
+    startDate: date
+    endDate: date
+    groupBy: Literal["day", "week"]
+    periods: List[str]
+    doctors: List[DoctorUtilization]
@@ -16,6 +16,8 @@ class DoctorProfileResponse(BaseModel):
     slotDurationMin: int
     weeklySchedule: List[WeeklyScheduleResponse]
     explicitSlots: Optional[List[datetime]] = None
+    scheduleExceptions: Optional[List[datetime]] = None
+    reminderOffsetsHours: Optional[List[float]] = None
 
 
 class PatientProfileResponse(BaseModel):
@@ -2,11 +2,28 @@ from fastapi import HTTPException, status
 from app.core.db import get_appointments_collection, get_users_collection
 from app.utils.availability import validate_appointment_slot, generate_slots_for_day, filter_past_slots
 from app.utils.time_utils import utc_now, ensure_utc
+from app.services.stats_service import (
+    record_appointment_created,
+    record_status_transition,
+    record_status_transitions,
+    get_rollup_doctor_stats,
+    doctor_stats_cache
+)
+from app.services.risk_service import is_high_risk
+from app.services.scheduler_service import (
+    get_reminder_offsets,
+    pending_reminders,
+    clear_batch_fields,
+    ACTIVE_STATUSES,
+    REMINDER_FIELDS,
+    CLEAR_REMINDER
+)
+from app.config import settings
 from datetime import datetime, timedelta
 from bson import ObjectId
-from pymongo.errors import DuplicateKeyError
-from pymongo import ReturnDocument
-from typing import Dict, Any, List, Optional
+from pymongo.errors import DuplicateKeyError, ExecutionTimeout
+from pymongo import ReturnDocument, UpdateOne
+from typing import Dict, Any, List, Optional, Tuple
 
 
 async def get_doctor_by_id(doctor_id: str) -> Dict[str, Any]:
@@ -37,9 +54,16 @@ async def create_appointment(
     doctor_id: str,
     patient_id: str,
     start: datetime,
-    reason: str
+    reason: str,
+    patient_risk: Optional[float] = None
 ) -> Dict[str, Any]:
-    """Create a new appointment with validation"""
+    """
+    Create a new appointment with validation
+    
+    Reminders follow the doctor's reminder policy and are sent by the
+    reminder sweep as each pendingReminders time passes. patient_risk is the
+    patient's stored no-show risk; high-risk patients get an extra early reminder
+    """
     appointments_collection = get_appointments_collection()
     
     # Ensure start time is in UTC (naive datetime)
@@ -76,29 +100,28 @@ async def create_appointment(
         "twilioLogs": []
     }
     
+    # Pending reminders, picked up by the reminder sweep
+    reminders = pending_reminders(
+        start.replace(tzinfo=None),
+        now.replace(tzinfo=None),
+        get_reminder_offsets(doctor_profile, high_risk=is_high_risk(patient_risk))
+    )
+    # Booked too late for any reminder: null marks that none is owed, so
+    # startup rehydration doesn't mistake it for a lost reminder
+    appointment_doc["pendingReminders"] = reminders or None
+    
     # Try to insert (will fail if slot taken due to unique index)
     try:
         result = await appointments_collection.insert_one(appointment_doc)
         
+        # Count the booking in the stats rollup
+        await record_appointment_created(appointment_doc)
+        
         # Convert ObjectIds to strings for JSON serialization
         appointment_doc["_id"] = str(result.inserted_id)
         appointment_doc["doctorId"] = str(appointment_doc["doctorId"])
         appointment_doc["patientId"] = str(appointment_doc["patientId"])
         
-        # Schedule reminder job if appointment is more than 3 hours away
-        reminder_time = start - timedelta(hours=3)
-        if reminder_time > now:
-            from app.services.scheduler_service import schedule_reminder_job
-            job_meta = await schedule_reminder_job(str(result.inserted_id), reminder_time.replace(tzinfo=None))
-            
-            # Update appointment with job metadata
-            if job_meta:
-                await appointments_collection.update_one(
-                    {"_id": result.inserted_id},
-                    {"$set": {"reminderJobMeta": job_meta}}
-                )
-                appointment_doc["reminderJobMeta"] = job_meta
-        
         return appointment_doc
         
     except DuplicateKeyError:
@@ -108,21 +131,50 @@ async def create_appointment(
         )
 
 
-async def get_appointments(
+APPOINTMENT_STATUSES = ["scheduled", "confirmed", "completed", "cancelled", "no_show"]
+
+
+def build_appointments_query(
     role: str,
     user_id: str,
-    limit: int = 10,
-    month: Optional[str] = None
-) -> List[Dict[str, Any]]:
-    """Get appointments for user (patient or doctor)"""
-    appointments_collection = get_appointments_collection()
+    month: Optional[str] = None,
+    statuses: Optional[List[str]] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    upcoming: Optional[bool] = None,
+    now: Optional[datetime] = None
+) -> Tuple[Dict[str, Any], int]:
+    """
+    Build the listing query and sort direction for get_appointments
     
+    Field order follows the ESR rule so every combination is served by the
+    {owner, status, start} compound indexes:
+    - Equality: doctorId/patientId, status
+    - Sort: start
+    - Range: start (month, from/to, upcoming)
+    """
     # Build query - convert string ID to ObjectId for proper matching
     if role == "doctor":
         query = {"doctorId": ObjectId(user_id)}
     else:
         query = {"patientId": ObjectId(user_id)}
     
+    # Status filter (equality / $in)
+    if statuses:
+        invalid = [s for s in statuses if s not in APPOINTMENT_STATUSES]
+        if invalid:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail=f"Invalid status filter: {', '.join(invalid)}"
+            )
+        unique_statuses = list(dict.fromkeys(statuses))
+        if len(unique_statuses) == 1:
+            query["status"] = unique_statuses[0]
+        else:
+            query["status"] = {"$in": unique_statuses}
+    
+    start_range: Dict[str, datetime] = {}
+    
     # Add month filter if provided
     if month:
         try:
@@ -133,17 +185,81 @@ async def get_appointments(
             else:
                 end_date = datetime(int(year), int(month_num) + 1, 1)
             
-            query["start"] = {"$gte": start_date, "$lt": end_date}
+            start_range["$gte"] = start_date
+            start_range["$lt"] = end_date
         except (ValueError, IndexError):
             raise HTTPException(
                 status_code=status.HTTP_400_BAD_REQUEST,
                 detail="Invalid month format. Use YYYY-MM"
             )
     
+    # Explicit date range (naive UTC, intersected with month if both given)
+    if from_date is not None:
+        from_date = ensure_utc(from_date).replace(tzinfo=None)
+        start_range["$gte"] = max(start_range.get("$gte", from_date), from_date)
+    
+    if to_date is not None:
+        to_date = ensure_utc(to_date).replace(tzinfo=None)
+        start_range["$lt"] = min(start_range.get("$lt", to_date), to_date)
+    
+    # Upcoming/past relative to now; upcoming lists soonest first
+    sort_direction = -1
+    if upcoming is not None:
+        if now is None:
+            now = utc_now()
+        now = now.replace(tzinfo=None)
+        if upcoming:
+            start_range["$gte"] = max(start_range.get("$gte", now), now)
+            sort_direction = 1
+        else:
+            start_range["$lt"] = min(start_range.get("$lt", now), now)
+    
+    if start_range:
+        query["start"] = start_range
+    
+    return query, sort_direction
+
+
+async def get_appointments(
+    role: str,
+    user_id: str,
+    limit: int = 10,
+    month: Optional[str] = None,
+    statuses: Optional[List[str]] = None,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    upcoming: Optional[bool] = None
+) -> List[Dict[str, Any]]:
+    """Get appointments for user (patient or doctor)"""
+    appointments_collection = get_appointments_collection()
+    
+    query, sort_direction = build_appointments_query(
+        role=role,
+        user_id=user_id,
+        month=month,
+        statuses=statuses,
+        from_date=from_date,
+        to_date=to_date,
+        upcoming=upcoming
+    )
+    
     # Fetch appointments
-    cursor = appointments_collection.find(query).sort("start", -1).limit(limit)
+    cursor = appointments_collection.find(query).sort("start", sort_direction).limit(limit)
     appointments = await cursor.to_list(length=limit)
     
+    # Doctors see each patient's no-show risk on their day sheet (one $in lookup)
+    if role == "doctor" and appointments:
+        patients = await get_users_collection().find(
+            {"_id": {"$in": list({apt["patientId"] for apt in appointments})}},
+            {"patientProfile.noShowRisk": 1}
+        ).to_list(length=None)
+        risk_by_patient = {
+            patient["_id"]: (patient.get("patientProfile") or {}).get("noShowRisk")
+            for patient in patients
+        }
+        for apt in appointments:
+            apt["patientNoShowRisk"] = risk_by_patient.get(apt["patientId"])
+    
     # Convert ObjectIds to strings for JSON serialization
     for apt in appointments:
         apt["_id"] = str(apt["_id"])
@@ -178,59 +294,157 @@ async def get_appointment_by_id(appointment_id: str) -> Dict[str, Any]:
     return appointment
 
 
-async def update_appointment_status(
+# Allowed current statuses for each target status (None = any current status)
+STATUS_TRANSITIONS: Dict[str, Optional[List[str]]] = {
+    "confirmed": ["scheduled"],
+    "cancelled": ["scheduled", "confirmed", "cancelled"],
+    "completed": None,
+    "no_show": ["scheduled", "confirmed"],
+}
+
+# Bulk updates only apply real transitions out of an active status: a bulk
+# "complete" never overwrites a cancellation or no-show, and rows that are
+# already cancelled aren't touched (or notified) again
+BULK_STATUS_TRANSITIONS: Dict[str, Optional[List[str]]] = {
+    "completed": ["scheduled", "confirmed"],
+    "cancelled": ["scheduled", "confirmed"],
+    "no_show": ["scheduled", "confirmed"],
+}
+
+
+def build_transition_filter(
     appointment_id: str,
     new_status: str,
     user_id: str,
-    user_role: str
+    user_role: str,
+    transitions: Dict[str, Optional[List[str]]] = STATUS_TRANSITIONS
 ) -> Dict[str, Any]:
-    """Update appointment status"""
-    appointments_collection = get_appointments_collection()
-    
-    # Get appointment
-    appointment = await get_appointment_by_id(appointment_id)
+    """
+    Build the find_one_and_update filter for a status transition
     
-    # Validate permissions - compare ObjectIds
-    if user_role == "patient" and str(appointment["patientId"]) != user_id:
+    Encodes ownership and the transition table so the check and the write
+    happen atomically in a single round trip
+    """
+    try:
+        query = {"_id": ObjectId(appointment_id)}
+    except Exception:
         raise HTTPException(
-            status_code=status.HTTP_403_FORBIDDEN,
-            detail="You can only modify your own appointments"
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid appointment ID"
         )
     
-    if user_role == "doctor" and str(appointment["doctorId"]) != user_id:
+    owner_field = "doctorId" if user_role == "doctor" else "patientId"
+    query[owner_field] = ObjectId(user_id)
+    
+    allowed = transitions.get(new_status)
+    if allowed is not None:
+        query["status"] = {"$in": allowed}
+    
+    return query
+
+
+def canonical_id(appointment_id: str) -> str:
+    """Lowercase hex form of a valid ObjectId; invalid IDs are returned unchanged"""
+    try:
+        return str(ObjectId(appointment_id))
+    except Exception:
+        return appointment_id
+
+
+async def raise_transition_error(
+    appointment_id: str,
+    new_status: str,
+    user_id: str,
+    user_role: str
+):
+    """
+    Explain why a guarded transition matched nothing
+    
+    Only called on the failure path, so the extra read never costs
+    a successful transition a round trip
+    """
+    appointment = await get_appointment_by_id(appointment_id)
+    
+    owner_field = "doctorId" if user_role == "doctor" else "patientId"
+    if str(appointment[owner_field]) != user_id:
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="You can only modify your own appointments"
         )
     
-    # Validate status transitions
-    current_status = appointment["status"]
-    
-    if new_status == "confirmed" and current_status not in ["scheduled"]:
+    if new_status == "confirmed":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Can only confirm scheduled appointments"
         )
     
-    if new_status == "cancelled" and current_status in ["completed", "no_show"]:
+    if new_status == "cancelled":
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail="Cannot cancel completed or no-show appointments"
         )
     
+    if new_status == "no_show":
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Can only mark scheduled or confirmed appointments as no-show"
+        )
+    
+    raise HTTPException(
+        status_code=status.HTTP_409_CONFLICT,
+        detail=f"Appointment status changed concurrently (current status: {appointment['status']})"
+    )
+
+
+async def update_appointment_status(
+    appointment_id: str,
+    new_status: str,
+    user_id: str,
+    user_role: str
+) -> Dict[str, Any]:
+    """
+    Update appointment status
+    
+    Ownership and the allowed current statuses are part of the update
+    filter, so a concurrent sweep can't flip the status between check and write
+    """
+    appointments_collection = get_appointments_collection()
+    
     if new_status == "completed" and user_role != "doctor":
         raise HTTPException(
             status_code=status.HTTP_403_FORBIDDEN,
             detail="Only doctors can mark appointments as completed"
         )
     
-    # Update status
+    query = build_transition_filter(appointment_id, new_status, user_id, user_role)
+    
+    set_fields = {"status": new_status}
+    if new_status == "confirmed":
+        # Confirmation latency feeds no-show risk scoring
+        set_fields["confirmedAt"] = utc_now().replace(tzinfo=None)
+    
+    update = {"$set": set_fields}
+    if new_status not in ACTIVE_STATUSES:
+        # Drop the pending reminder with the transition
+        update["$unset"] = CLEAR_REMINDER
+    
+    # Check and update in one round trip (BEFORE keeps the old status for the rollup)
     updated = await appointments_collection.find_one_and_update(
-        {"_id": ObjectId(appointment_id)},
-        {"$set": {"status": new_status}},
-        return_document=ReturnDocument.AFTER
+        query,
+        update,
+        return_document=ReturnDocument.BEFORE
     )
     
+    if updated is None:
+        await raise_transition_error(appointment_id, new_status, user_id, user_role)
+    
+    old_status = updated["status"]
+    updated.update(set_fields)
+    if "$unset" in update:
+        for field in REMINDER_FIELDS:
+            updated.pop(field, None)
+    await record_status_transition(updated, old_status, new_status)
+    
     # Send notifications
     if new_status == "confirmed":
         from app.services.twilio_service import send_confirmation_notification
@@ -246,6 +460,107 @@ async def update_appointment_status(
     return updated
 
 
+async def bulk_update_appointment_status(
+    appointment_ids: List[str],
+    new_status: str,
+    user_id: str,
+    user_role: str
+) -> Tuple[List[Dict[str, Any]], List[Dict[str, Any]]]:
+    """
+    Apply one status transition to many appointments
+    
+    All guarded updates go out in a single unordered bulk_write. Each write
+    is tagged with a batch ID so the updated documents can be fetched back
+    in one query; the tag is removed again afterwards. Only transitions out of an active status apply
+    (BULK_STATUS_TRANSITIONS); the route restricts callers to doctors.
+    
+    Returns (per-ID results, updated appointment documents)
+    """
+    appointments_collection = get_appointments_collection()
+    batch_id = ObjectId()
+    results: Dict[str, Dict[str, Any]] = {}
+    operations = []
+    matched_ids = []
+    
+    # Preserve request order, ignore duplicates; results are keyed by the
+    # canonical hex so e.g. uppercase IDs match the documents read back
+    for appointment_id in dict.fromkeys(canonical_id(apt_id) for apt_id in appointment_ids):
+        try:
+            query = build_transition_filter(
+                appointment_id, new_status, user_id, user_role, transitions=BULK_STATUS_TRANSITIONS
+            )
+        except HTTPException as e:
+            results[appointment_id] = {
+                "appointmentId": appointment_id,
+                "success": False,
+                "error": e.detail
+            }
+            continue
+        
+        # Pipeline update keeps the old status for the stats rollup
+        operations.append(UpdateOne(
+            query,
+            [
+                {"$set": {
+                    "previousStatus": "$status",
+                    "status": new_status,
+                    "statusBatchId": batch_id
+                }},
+                {"$unset": REMINDER_FIELDS}
+            ]
+        ))
+        results[appointment_id] = None
+        matched_ids.append(query["_id"])
+    
+    updated_docs = []
+    if operations:
+        await appointments_collection.bulk_write(operations, ordered=False)
+        
+        # _id bound lets the read-back use the primary key index
+        updated_docs = await appointments_collection.find(
+            {"_id": {"$in": matched_ids}, "statusBatchId": batch_id}
+        ).to_list(length=None)
+        
+        await record_status_transitions([
+            (apt, apt["previousStatus"], new_status) for apt in updated_docs
+        ])
+        await clear_batch_fields(batch_id, updated_docs)
+    
+    for apt in updated_docs:
+        results[str(apt["_id"])] = {
+            "appointmentId": str(apt["_id"]),
+            "success": True,
+            "status": new_status
+        }
+    
+    # One read to explain the misses
+    missed_ids = [apt_id for apt_id, result in results.items() if result is None]
+    if missed_ids:
+        owner_field = "doctorId" if user_role == "doctor" else "patientId"
+        current = await appointments_collection.find(
+            {"_id": {"$in": [ObjectId(apt_id) for apt_id in missed_ids]}},
+            {owner_field: 1, "status": 1}
+        ).to_list(length=None)
+        current_map = {str(apt["_id"]): apt for apt in current}
+        
+        for apt_id in missed_ids:
+            apt = current_map.get(apt_id)
+            if apt is None:
+                error = "Appointment not found"
+            elif str(apt[owner_field]) != user_id:
+                error = "You can only modify your own appointments"
+            else:
+                error = f"Cannot change status from {apt['status']} to {new_status}"
+            results[apt_id] = {
+                "appointmentId": apt_id,
+                "success": False,
+                "status": apt["status"] if apt else None,
+                "error": error
+            }
+    
+    return list(results.values()), updated_docs
+
+
 async def get_doctor_slots(doctor_id: str, date_str: str) -> List[Dict[str, Any]]:
     """Get available and taken slots for a doctor on a specific date"""
     # Parse date
@@ -298,19 +613,57 @@ async def get_doctor_slots(doctor_id: str, date_str: str) -> List[Dict[str, Any]
 async def get_doctor_stats(
     doctor_id: str,
     group_by: str = "month",
-    limit: int = 10
+    limit: int = 10,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
 ) -> Dict[str, Any]:
     """
     Get doctor appointment statistics with aggregation
     
     Groups appointments by specified period (month or day)
     Returns counts by status
+    Reads the doctor_stats_daily rollup unless STATS_USE_ROLLUP is disabled
+    Optional from/to window bounds the appointment start times considered
+    Results are cached per (doctorId, groupBy, limit, from, to); concurrent
+    identical requests share one aggregation and writes invalidate the doctor
     """
-    appointments_collection = get_appointments_collection()
+    if from_date is not None:
+        from_date = ensure_utc(from_date).replace(tzinfo=None)
+    if to_date is not None:
+        to_date = ensure_utc(to_date).replace(tzinfo=None)
+    
+    doctor_key = str(ObjectId(doctor_id)) if ObjectId.is_valid(doctor_id) else doctor_id
     
+    return await doctor_stats_cache.get_or_compute(
+        (doctor_key, group_by, limit, from_date, to_date),
+        lambda: _compute_doctor_stats(doctor_id, group_by, limit, from_date, to_date),
+        tag=doctor_key
+    )
+
+
+async def _compute_doctor_stats(
+    doctor_id: str,
+    group_by: str,
+    limit: int,
+    from_date: Optional[datetime],
+    to_date: Optional[datetime]
+) -> Dict[str, Any]:
+    """Compute doctor stats from the rollup or the live aggregation (uncached)"""
     # Verify doctor exists
     await get_doctor_by_id(doctor_id)
     
+    # Serve from the incrementally maintained daily rollup
+    if settings.STATS_USE_ROLLUP:
+        return await get_rollup_doctor_stats(
+            doctor_id,
+            group_by=group_by,
+            limit=limit,
+            from_date=from_date,
+            to_date=to_date
+        )
+    
+    appointments_collection = get_appointments_collection()
+    
     # Build aggregation pipeline
     if group_by == "month":
         group_format = "%Y-%m"
@@ -322,76 +675,92 @@ async def get_doctor_stats(
             detail="Invalid groupBy parameter. Use 'month' or 'day'"
         )
     
+    # Match appointments for this doctor - {doctorId, start} keeps this an
+    # index range scan on doctor_appointments
+    match = {"doctorId": ObjectId(doctor_id)}
+    start_range = {}
+    if from_date is not None:
+        start_range["$gte"] = from_date
+    if to_date is not None:
+        start_range["$lt"] = to_date
+    if start_range:
+        match["start"] = start_range
+    
     pipeline = [
-        # Match appointments for this doctor - use ObjectId
-        {"$match": {"doctorId": ObjectId(doctor_id)}},
+        {"$match": match},
         
-        # Add period field
+        # Single pass: per-period counts and the overall total
         {
-            "$addFields": {
-                "period": {
-                    "$dateToString": {
-                        "format": group_format,
-                        "date": "$start"
+            "$facet": {
+                "stats": [
+                    # Group by period
+                    {
+                        "$group": {
+                            "_id": {
+                                "$dateToString": {
+                                    "format": group_format,
+                                    "date": "$start"
+                                }
+                            },
+                            "total": {"$sum": 1},
+                            "completed": {
+                                "$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}
+                            },
+                            "cancelled": {
+                                "$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}
+                            },
+                            "no_show": {
+                                "$sum": {"$cond": [{"$eq": ["$status", "no_show"]}, 1, 0]}
+                            },
+                            "scheduled": {
+                                "$sum": {"$cond": [{"$eq": ["$status", "scheduled"]}, 1, 0]}
+                            },
+                            "confirmed": {
+                                "$sum": {"$cond": [{"$eq": ["$status", "confirmed"]}, 1, 0]}
+                            }
+                        }
+                    },
+                    
+                    # Sort by period descending
+                    {"$sort": {"_id": -1}},
+                    
+                    # Limit results
+                    {"$limit": limit},
+                    
+                    # Project to desired format
+                    {
+                        "$project": {
+                            "_id": 0,
+                            "period": "$_id",
+                            "count": "$total",
+                            "completed": 1,
+                            "cancelled": 1,
+                            "no_show": 1,
+                            "scheduled": 1,
+                            "confirmed": 1
+                        }
                     }
-                }
-            }
-        },
-        
-        # Group by period
-        {
-            "$group": {
-                "_id": "$period",
-                "total": {"$sum": 1},
-                "completed": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "completed"]}, 1, 0]}
-                },
-                "cancelled": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}
-                },
-                "no_show": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "no_show"]}, 1, 0]}
-                },
-                "scheduled": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "scheduled"]}, 1, 0]}
-                },
-                "confirmed": {
-                    "$sum": {"$cond": [{"$eq": ["$status", "confirmed"]}, 1, 0]}
-                }
-            }
-        },
-        
-        # Sort by period descending
-        {"$sort": {"_id": -1}},
-        
-        # Limit results
-        {"$limit": limit},
-        
-        # Project to desired format
-        {
-            "$project": {
-                "_id": 0,
-                "period": "$_id",
-                "count": "$total",
-                "completed": 1,
-                "cancelled": 1,
-                "no_show": 1,
-                "scheduled": 1,
-                "confirmed": 1
+                ],
+                "total": [{"$count": "count"}]
             }
         }
     ]
     
-    # Execute aggregation
-    cursor = appointments_collection.aggregate(pipeline)
-    stats = await cursor.to_list(length=limit)
-    
-    # Get total count - use ObjectId
-    total_count = await appointments_collection.count_documents({"doctorId": ObjectId(doctor_id)})
+    # Execute aggregation (bounded so a huge history can't tie up the database)
+    try:
+        cursor = appointments_collection.aggregate(
+            pipeline,
+            maxTimeMS=settings.STATS_MAX_TIME_MS
+        )
+        result = (await cursor.to_list(length=1))[0]
+    except ExecutionTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Stats query timed out. Use a narrower from/to window"
+        )
     
     return {
         "doctorId": doctor_id,
-        "totalAppointments": total_count,
-        "stats": stats
+        "totalAppointments": result["total"][0]["count"] if result["total"] else 0,
+        "stats": result["stats"]
     }
-
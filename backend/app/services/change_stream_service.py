@@ -0,0 +1,194 @@
+"""
+Change stream listener on appointments, used for cache invalidation only
+
+Publishes appointment inserts and status changes to in-process subscribers,
+so an API process drops cached results invalidated by writes from other
+processes (other API processes, the app.worker sweeps) within milliseconds
+instead of waiting for the cache TTL. The writer's own process already
+invalidates on its write path.
+
+It doesn't drive the stats rollup, notifications or the sweeps: those stay
+on their write paths and polling schedules. It runs in API processes only,
+since the worker serves no cached reads.
+
+Requires a replica set (a single-node replica set works locally); enabled
+with CHANGE_STREAM_ENABLED.
+"""
+import asyncio
+import time
+from datetime import datetime
+from typing import Any, Awaitable, Callable, Dict, List, Optional
+from app.core.db import get_appointments_collection, get_scheduler_status_collection
+from app.config import settings
+from pymongo.errors import OperationFailure, PyMongoError
+
+
+AppointmentEvent = Dict[str, Any]
+Subscriber = Callable[[AppointmentEvent], Awaitable[None]]
+
+# Inserts and updates that touch status; updateLookup adds doctor/patient for updates
+CHANGE_PIPELINE = [
+    {
+        "$match": {
+            "$or": [
+                {"operationType": "insert"},
+                {"operationType": "update", "updateDescription.updatedFields.status": {"$exists": True}}
+            ]
+        }
+    },
+    {
+        "$project": {
+            "operationType": 1,
+            "documentKey": 1,
+            "fullDocument.doctorId": 1,
+            "fullDocument.patientId": 1,
+            "fullDocument.status": 1,
+            "fullDocument.start": 1
+        }
+    }
+]
+
+# $changeStream is only supported on replica sets
+CHANGE_STREAM_UNSUPPORTED = 40573
+# Saved resume token is no longer in the oplog / can't be resumed
+RESUME_TOKEN_LOST = {280, 286}
+
+subscribers: List[Subscriber] = []
+
+listener_state: Dict[str, Any] = {"task": None, "published": 0, "lastEventAt": None}
+
+
+def subscribe(callback: Subscriber) -> Subscriber:
+    """Register an async callback for appointment events (usable as a decorator)"""
+    subscribers.append(callback)
+    return callback
+
+
+async def publish(event: AppointmentEvent):
+    """Deliver an event to every subscriber; one failing subscriber doesn't stop the rest"""
+    for callback in subscribers:
+        try:
+            await callback(event)
+        except Exception as e:
+            print(f"⚠️ Change stream subscriber {callback.__name__} failed: {str(e)}")
+
+
+def to_event(change: Dict[str, Any]) -> Optional[AppointmentEvent]:
+    """Turn a change stream document into an appointment event"""
+    operation = change["operationType"]
+    if operation not in ["insert", "update"]:
+        return None
+    
+    # fullDocument is None if the appointment was deleted before the lookup
+    document = change.get("fullDocument") or {}
+    doctor_id = document.get("doctorId")
+    patient_id = document.get("patientId")
+    
+    return {
+        "type": "created" if operation == "insert" else "status_changed",
+        "appointmentId": str(change["documentKey"]["_id"]),
+        "doctorId": str(doctor_id) if doctor_id else None,
+        "patientId": str(patient_id) if patient_id else None,
+        "status": document.get("status"),
+        "start": document.get("start")
+    }
+
+
+def _token_id() -> str:
+    return f"change_stream:{settings.CHANGE_STREAM_CONSUMER}"
+
+
+async def load_resume_token() -> Optional[Dict[str, Any]]:
+    """Last persisted resume token for this consumer, if any"""
+    try:
+        document = await get_scheduler_status_collection().find_one({"_id": _token_id()}, {"resumeToken": 1})
+    except PyMongoError as e:
+        print(f"⚠️ Failed to load change stream resume token: {str(e)}")
+        return None
+    return document.get("resumeToken") if document else None
+
+
+async def save_resume_token(resume_token: Optional[Dict[str, Any]]):
+    """Persist the resume token (and listener counters) so a restart continues where it stopped"""
+    if resume_token is None:
+        return
+    try:
+        await get_scheduler_status_collection().replace_one(
+            {"_id": _token_id()},
+            {
+                "resumeToken": resume_token,
+                "published": listener_state["published"],
+                "lastEventAt": listener_state["lastEventAt"],
+                "updatedAt": datetime.utcnow()
+            },
+            upsert=True
+        )
+    except Exception as e:
+        print(f"⚠️ Failed to save change stream resume token: {str(e)}")
+
+
+async def watch_appointments():
+    """
+    Listen to the appointments change stream until cancelled
+    
+    Resumes from the persisted token; the token is saved at most every
+    CHANGE_STREAM_TOKEN_SAVE_SECONDS and on shutdown. Transient errors
+    reconnect after CHANGE_STREAM_RETRY_SECONDS; a lost token restarts from now.
+    """
+    resume_token = await load_resume_token()
+    last_saved = time.monotonic()
+    
+    while True:
+        try:
+            async with get_appointments_collection().watch(
+                CHANGE_PIPELINE,
+                full_document="updateLookup",
+                resume_after=resume_token
+            ) as stream:
+                print("✅ Listening to appointments change stream")
+                async for change in stream:
+                    resume_token = stream.resume_token
+                    event = to_event(change)
+                    if event:
+                        await publish(event)
+                        listener_state["published"] += 1
+                        listener_state["lastEventAt"] = datetime.utcnow()
+                    
+                    if time.monotonic() - last_saved >= settings.CHANGE_STREAM_TOKEN_SAVE_SECONDS:
+                        await save_resume_token(resume_token)
+                        last_saved = time.monotonic()
+        except asyncio.CancelledError:
+            await save_resume_token(resume_token)
+            raise
+        except OperationFailure as e:
+            if e.code == CHANGE_STREAM_UNSUPPORTED:
+                print("⚠️ Change streams need a replica set; change stream listener disabled")
+                return
+            if e.code in RESUME_TOKEN_LOST:
+                print("⚠️ Change stream resume token lost; resuming from now")
+                resume_token = None
+                continue
+            print(f"⚠️ Change stream failed: {str(e)}")
+            await asyncio.sleep(settings.CHANGE_STREAM_RETRY_SECONDS)
+        except PyMongoError as e:
+            print(f"⚠️ Change stream failed: {str(e)}")
+            await asyncio.sleep(settings.CHANGE_STREAM_RETRY_SECONDS)
+
+
+def start_change_stream():
+    """Start the listener in the background"""
+    listener_state["task"] = asyncio.create_task(watch_appointments())
+
+
+async def stop_change_stream():
+    """Stop the listener; it saves its resume token on the way out"""
+    task = listener_state["task"]
+    if task is None:
+        return
+    
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+    listener_state["task"] = None
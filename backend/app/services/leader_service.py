@@ -0,0 +1,101 @@
+"""
+Leader service: Mongo-backed lease so only one process runs the sweeps
+"""
+from app.core.db import get_scheduler_leases_collection
+from app.config import settings
+from datetime import datetime, timedelta
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+from typing import Optional
+import os
+import socket
+import time
+import uuid
+
+
+class LeaderLease:
+    """
+    Named lease held by at most one process at a time
+    
+    - Every process calls heartbeat() periodically; the holder renews the
+      lease, others take it over once it has expired
+    - The lease document carries expiresAt with a TTL index, so a dead
+      leader's lease also disappears on its own
+    - is_leader is also bounded by a local monotonic deadline, so a leader
+      whose heartbeat stalls stops acting before another process can take over
+    """
+    
+    def __init__(self, name: str, ttl_seconds: float):
+        self.name = name
+        self.ttl_seconds = ttl_seconds
+        self.holder_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+        self._valid_until = 0.0
+    
+    @property
+    def is_leader(self) -> bool:
+        return time.monotonic() < self._valid_until
+    
+    async def heartbeat(self) -> bool:
+        """Acquire or renew the lease; returns whether this process is leader"""
+        leases_collection = get_scheduler_leases_collection()
+        was_leader = self.is_leader
+        started = time.monotonic()
+        now = datetime.utcnow()
+        
+        try:
+            # Matches only if we hold the lease or it has expired; otherwise the
+            # upsert collides with the current holder's document
+            lease = await leases_collection.find_one_and_update(
+                {
+                    "_id": self.name,
+                    "$or": [
+                        {"holder": self.holder_id},
+                        {"expiresAt": {"$lte": now}}
+                    ]
+                },
+                {
+                    "$set": {
+                        "holder": self.holder_id,
+                        "renewedAt": now,
+                        "expiresAt": now + timedelta(seconds=self.ttl_seconds)
+                    },
+                    "$setOnInsert": {"acquiredAt": now}
+                },
+                upsert=True,
+                return_document=ReturnDocument.AFTER
+            )
+        except DuplicateKeyError:
+            lease = None
+        except Exception as e:
+            # Can't confirm the lease; keep acting only until the local deadline
+            print(f"⚠️ Leader heartbeat for '{self.name}' failed: {str(e)}")
+            return self.is_leader
+        
+        if lease and lease["holder"] == self.holder_id:
+            # Count the lease from before the round trip so we never outlive it
+            self._valid_until = started + self.ttl_seconds
+        else:
+            self._valid_until = 0.0
+        
+        if self.is_leader != was_leader:
+            print(f"👑 {'Acquired' if self.is_leader else 'Lost'} leader lease '{self.name}' ({self.holder_id})")
+        
+        return self.is_leader
+    
+    async def release(self):
+        """Give up the lease on shutdown so another process takes over immediately"""
+        self._valid_until = 0.0
+        try:
+            await get_scheduler_leases_collection().delete_one({"_id": self.name, "holder": self.holder_id})
+        except Exception as e:
+            print(f"⚠️ Failed to release leader lease '{self.name}': {str(e)}")
+    
+    async def current_holder(self) -> Optional[str]:
+        """Holder ID of the current unexpired lease, if any"""
+        lease = await get_scheduler_leases_collection().find_one({"_id": self.name})
+        if lease and lease["expiresAt"] > datetime.utcnow():
+            return lease["holder"]
+        return None
+
+
+scheduler_leader = LeaderLease("scheduler", settings.LEADER_LEASE_TTL_SECONDS)
@@ -0,0 +1,152 @@
+"""
+Risk service for batch patient no-show risk scoring
+"""
+from app.core.db import get_appointments_collection, get_users_collection
+from app.config import settings
+from datetime import datetime
+from pymongo import UpdateOne
+from typing import Dict, Any, List
+import numpy as np
+
+
+# Logistic model weights over the per-patient features
+RISK_MODEL = {
+    "intercept": -2.5,
+    "no_show_rate": 5.0,
+    "cancel_rate": 1.5,
+    "log_lead_time_days": 0.4,
+    "confirm_latency_hours": 0.15,
+}
+
+# Rates are shrunk towards clinic-wide priors so patients with little history
+# don't get extreme scores from one or two appointments
+PRIOR_NO_SHOW_RATE = 0.1
+PRIOR_CANCEL_RATE = 0.15
+PRIOR_WEIGHT = 5.0
+
+WRITE_BATCH_SIZE = 1000
+
+
+async def aggregate_patient_features(now: datetime) -> List[Dict[str, Any]]:
+    """
+    Compute per-patient history features in one aggregation pass
+    
+    Only finished appointments (completed, cancelled, no_show) in the past count
+    """
+    pipeline = [
+        {
+            "$match": {
+                "status": {"$in": ["completed", "cancelled", "no_show"]},
+                "start": {"$lt": now}
+            }
+        },
+        {
+            "$group": {
+                "_id": "$patientId",
+                "total": {"$sum": 1},
+                "noShows": {"$sum": {"$cond": [{"$eq": ["$status", "no_show"]}, 1, 0]}},
+                "cancels": {"$sum": {"$cond": [{"$eq": ["$status", "cancelled"]}, 1, 0]}},
+                # Booking lead time; $avg skips appointments without createdAt
+                "leadTimeHours": {
+                    "$avg": {"$divide": [{"$subtract": ["$start", "$createdAt"]}, 3600000]}
+                },
+                # Time from reminder (or booking) to confirmation
+                "confirmLatencyHours": {
+                    "$avg": {
+                        "$cond": [
+                            {"$ifNull": ["$confirmedAt", False]},
+                            {
+                                "$divide": [
+                                    {"$subtract": [
+                                        "$confirmedAt",
+                                        {"$ifNull": ["$firstReminderSentAt", "$createdAt"]}
+                                    ]},
+                                    3600000
+                                ]
+                            },
+                            None
+                        ]
+                    }
+                }
+            }
+        }
+    ]
+    
+    cursor = get_appointments_collection().aggregate(pipeline, allowDiskUse=True)
+    return await cursor.to_list(length=None)
+
+
+def score_patients(features: List[Dict[str, Any]]) -> np.ndarray:
+    """Score all patients at once with the logistic model (0..1)"""
+    if not features:
+        return np.zeros(0)
+    
+    total = np.array([f["total"] for f in features], dtype=float)
+    no_shows = np.array([f["noShows"] for f in features], dtype=float)
+    cancels = np.array([f["cancels"] for f in features], dtype=float)
+    lead_time_hours = np.array(
+        [f.get("leadTimeHours") if f.get("leadTimeHours") is not None else np.nan for f in features],
+        dtype=float
+    )
+    confirm_latency_hours = np.array(
+        [f.get("confirmLatencyHours") if f.get("confirmLatencyHours") is not None else np.nan for f in features],
+        dtype=float
+    )
+    
+    no_show_rate = (no_shows + PRIOR_NO_SHOW_RATE * PRIOR_WEIGHT) / (total + PRIOR_WEIGHT)
+    cancel_rate = (cancels + PRIOR_CANCEL_RATE * PRIOR_WEIGHT) / (total + PRIOR_WEIGHT)
+    log_lead_time_days = np.log1p(np.clip(np.nan_to_num(lead_time_hours), 0, None) / 24)
+    confirm_latency = np.clip(np.nan_to_num(confirm_latency_hours), 0, 3)
+    
+    z = (
+        RISK_MODEL["intercept"]
+        + RISK_MODEL["no_show_rate"] * no_show_rate
+        + RISK_MODEL["cancel_rate"] * cancel_rate
+        + RISK_MODEL["log_lead_time_days"] * log_lead_time_days
+        + RISK_MODEL["confirm_latency_hours"] * confirm_latency
+    )
+    return 1 / (1 + np.exp(-z))
+
+
+async def compute_no_show_risk() -> int:
+    """
+    Batch job: score every patient with history and store it on the patient
+    
+    Returns number of patients scored
+    """
+    users_collection = get_users_collection()
+    now = datetime.utcnow()
+    
+    features = await aggregate_patient_features(now)
+    scores = np.round(score_patients(features), 4)
+    
+    operations = []
+    for feature, score in zip(features, scores.tolist()):
+        # Pipeline update: a dotted $set fails on patients whose patientProfile is null
+        operations.append(UpdateOne(
+            {"_id": feature["_id"], "role": "patient"},
+            [{"$set": {
+                "patientProfile": {
+                    "$mergeObjects": [
+                        {"$ifNull": ["$patientProfile", {}]},
+                        {"noShowRisk": score, "noShowRiskUpdatedAt": now}
+                    ]
+                }
+            }}]
+        ))
+    
+    for i in range(0, len(operations), WRITE_BATCH_SIZE):
+        try:
+            await users_collection.bulk_write(operations[i:i + WRITE_BATCH_SIZE], ordered=False)
+        except Exception as e:
+            print(f"⚠️ Failed to store some no-show risk scores: {str(e)}")
+    
+    high_risk = int((scores >= settings.NO_SHOW_RISK_THRESHOLD).sum())
+    print(f"📊 Scored no-show risk for {len(features)} patient(s), {high_risk} high-risk")
+    
+    return len(features)
+
+
+def is_high_risk(risk: Any) -> bool:
+    """Check a stored risk score against the configured threshold"""
+    return risk is not None and risk >= settings.NO_SHOW_RISK_THRESHOLD
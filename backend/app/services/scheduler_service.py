@@ -1,180 +1,835 @@
 """
 Scheduler service for managing appointment reminders and no-show detection
 """
+import asyncio
+import time
 from datetime import datetime, timedelta
-from typing import Optional, Dict, Any
-from app.core.db import get_appointments_collection
+from typing import Optional, Dict, Any, List
+from app.core.db import get_appointments_collection, get_users_collection, get_scheduler_status_collection
+from app.config import settings
+from app.services.stats_service import record_status_transitions
+from app.services.leader_service import scheduler_leader
+from app.utils.rate_limit import TokenBucket
+from app.utils.clock import get_clock
 from bson import ObjectId
-from pymongo import ReturnDocument
+from pymongo import ReturnDocument, UpdateOne
 
 
-async def send_3h_reminder(appointment_id: str):
+ACTIVE_STATUSES = ["scheduled", "confirmed"]
+
+# Pending reminder state; cleared on every transition out of an active status
+# so the pendingReminders index only holds reminders that will be sent
+REMINDER_FIELDS = ["pendingReminders", "reminderLeaseUntil"]
+CLEAR_REMINDER = {field: "" for field in REMINDER_FIELDS}
+
+# Bookkeeping set by batch status updates only so the changed rows can be
+# read back; removed again by clear_batch_fields
+BATCH_FIELDS = ["previousStatus", "statusBatchId"]
+
+
+async def save_scheduler_status(name: str, status: Dict[str, Any]):
+    """Persist a scheduler status document (progress, metrics) for the API to read"""
+    try:
+        await get_scheduler_status_collection().replace_one(
+            {"_id": name},
+            {**status, "updatedAt": get_clock().utcnow()},
+            upsert=True
+        )
+    except Exception as e:
+        print(f"⚠️ Failed to save scheduler status '{name}': {str(e)}")
+
+
+async def clear_batch_fields(batch_id: ObjectId, appointments: List[Dict[str, Any]]):
+    """Remove batch bookkeeping from a batch's rows once they were read back and recorded"""
+    for apt in appointments:
+        for field in BATCH_FIELDS:
+            apt.pop(field, None)
+    if not appointments:
+        return
+    
+    try:
+        await get_appointments_collection().update_many(
+            {"_id": {"$in": [apt["_id"] for apt in appointments]}, "statusBatchId": batch_id},
+            {"$unset": {field: "" for field in BATCH_FIELDS}}
+        )
+    except Exception as e:
+        # Harmless if left behind: every batch reads back by its own ID
+        print(f"⚠️ Failed to clear status batch fields: {str(e)}")
+
+
+async def get_scheduler_status(name: str) -> Optional[Dict[str, Any]]:
+    """Latest scheduler status document written by the leader"""
+    return await get_scheduler_status_collection().find_one({"_id": name}, {"_id": 0})
+
+
+def get_reminder_offsets(doctor_profile: Optional[Dict[str, Any]], high_risk: bool = False) -> List[float]:
     """
-    Send 3-hour reminder SMS to patient
-    Called by APScheduler job
+    Reminder offsets (hours before start) for a doctor's appointments
+    
+    Policy: the doctor's own reminderOffsetsHours, else the offsets for their
+    specialization (REMINDER_OFFSETS_BY_SPECIALIZATION), else REMINDER_OFFSETS_HOURS.
+    High-risk patients also get the extra NO_SHOW_EXTRA_REMINDER_HOURS reminder.
+    """
+    doctor_profile = doctor_profile or {}
+    offsets = doctor_profile.get("reminderOffsetsHours")
+    if not offsets:
+        offsets = settings.REMINDER_OFFSETS_BY_SPECIALIZATION.get(
+            doctor_profile.get("specialization"),
+            settings.REMINDER_OFFSETS_HOURS
+        )
+    
+    offsets = set(offsets)
+    if high_risk:
+        offsets.add(settings.NO_SHOW_EXTRA_REMINDER_HOURS)
+    
+    return sorted(offsets, reverse=True)
+
+
+def pending_reminders(start: datetime, now: datetime, offsets_hours: List[float]) -> List[datetime]:
+    """Due times of the reminders still ahead of now, earliest first"""
+    due_times = {start - timedelta(hours=offset) for offset in offsets_hours}
+    return sorted(due_at for due_at in due_times if due_at > now)
+
+
+def spread_filter(now: datetime) -> Dict[str, Any]:
+    """
+    Reminders whose spread send time has come
+    
+    Each appointment sends its reminders a fixed 0..REMINDER_SPREAD_SECONDS
+    early, taken from its _id timestamp (booking second modulo the window).
+    Appointments sharing a :00/:30 slot are booked at different times, so
+    their reminders spread evenly over the window before the due time.
+    Callers pair this with a pendingReminders range so the index bounds the scan.
+    """
+    if settings.REMINDER_SPREAD_SECONDS <= 0:
+        return {"pendingReminders": {"$lte": now}}
+    
+    offset_ms = {
+        "$multiply": [
+            {"$mod": [{"$divide": [{"$toLong": {"$toDate": "$_id"}}, 1000]}, settings.REMINDER_SPREAD_SECONDS]},
+            1000
+        ]
+    }
+    return {
+        "pendingReminders": {"$lte": now + timedelta(seconds=settings.REMINDER_SPREAD_SECONDS)},
+        "$expr": {"$lte": [{"$subtract": [{"$min": "$pendingReminders"}, offset_ms]}, now]}
+    }
+
+
+async def claim_due_reminders(
+    now: datetime,
+    limit: int,
+    due_before: Optional[datetime] = None
+) -> List[Dict[str, Any]]:
+    """
+    Lease up to limit appointments with a due reminder, earliest first
+    
+    pendingReminders holds every pending reminder time of an appointment, so
+    one multikey index serves all offsets: a range match hits if any
+    element is due and the sort orders by the earliest one.
+    
+    Each claim is a find_one_and_update that sets reminderLeaseUntil, so
+    concurrent sweepers never claim the same reminder; if a sweeper dies the
+    lease expires and the reminder is claimed again. due_before narrows the
+    claim to reminders due before that time (defaults to each reminder's
+    spread send time, see spread_filter).
+    """
+    appointments_collection = get_appointments_collection()
+    lease_until = now + timedelta(seconds=settings.REMINDER_LEASE_SECONDS)
+    due_filter = {"pendingReminders": {"$lte": due_before}} if due_before else spread_filter(now)
+    
+    claimed = []
+    while len(claimed) < limit:
+        appointment = await appointments_collection.find_one_and_update(
+            {
+                **due_filter,
+                "reminderLeaseUntil": {"$not": {"$gt": now}}
+            },
+            {"$set": {"reminderLeaseUntil": lease_until}},
+            sort=[("pendingReminders", 1)],
+            return_document=ReturnDocument.AFTER
+        )
+        if not appointment:
+            break
+        claimed.append(appointment)
+    
+    return claimed
+
+
+# Reminder dispatch pacing: one bucket per process (only the leader sends)
+reminder_bucket = TokenBucket(settings.REMINDER_RATE_PER_SECOND, settings.REMINDER_BURST)
+
+# Dispatch metrics for this process; also persisted in scheduler_status
+reminder_dispatch_metrics: Dict[str, Any] = {
+    "sent": 0,
+    "failed": 0,
+    "queueDepth": 0,
+    "lastLagSeconds": None,
+    "maxLagSeconds": None,
+    "totalLagSeconds": 0.0
+}
+
+
+def record_dispatch_lag(lag_seconds: float):
+    """Track send time minus due time (negative when sent early within the spread window)"""
+    metrics = reminder_dispatch_metrics
+    metrics["sent"] += 1
+    metrics["lastLagSeconds"] = round(lag_seconds, 3)
+    metrics["totalLagSeconds"] += lag_seconds
+    if metrics["maxLagSeconds"] is None or lag_seconds > metrics["maxLagSeconds"]:
+        metrics["maxLagSeconds"] = round(lag_seconds, 3)
+
+
+def get_reminder_dispatch_stats() -> Dict[str, Any]:
+    """Dispatch metrics with average lag and token bucket state"""
+    metrics = reminder_dispatch_metrics
+    return {
+        "sent": metrics["sent"],
+        "failed": metrics["failed"],
+        "queueDepth": metrics["queueDepth"],
+        "lastLagSeconds": metrics["lastLagSeconds"],
+        "maxLagSeconds": metrics["maxLagSeconds"],
+        "avgLagSeconds": round(metrics["totalLagSeconds"] / metrics["sent"], 3) if metrics["sent"] else None,
+        "spreadSeconds": settings.REMINDER_SPREAD_SECONDS,
+        "bucket": reminder_bucket.stats()
+    }
+
+
+async def deliver_reminder(
+    appointment: Dict[str, Any],
+    now: datetime,
+    users: Optional[Dict[ObjectId, Dict[str, Any]]] = None
+) -> bool:
+    """
+    Send a leased appointment's earliest pending reminder and remove it
+    
+    Reminders that are already overdue as well (e.g. after downtime) are
+    collapsed into this one SMS. Waits for a dispatch token first, so bursts
+    are paced to REMINDER_RATE_PER_SECOND; if the lease ran out meanwhile the
+    reminder is left to whoever claims it next. A failed send keeps the lease,
+    so the reminder is retried once it expires. Returns True if an SMS was sent
     """
     from app.services.twilio_service import send_reminder_sms
     
     appointments_collection = get_appointments_collection()
     
-    # Get appointment
-    try:
-        appointment = await appointments_collection.find_one({"_id": ObjectId(appointment_id)})
-    except Exception:
-        print(f"❌ Invalid appointment ID in reminder job: {appointment_id}")
-        return
+    # Only the current lease holder may update the reminder state
+    lease_filter = {"_id": appointment["_id"], "reminderLeaseUntil": appointment["reminderLeaseUntil"]}
     
-    if not appointment:
-        print(f"❌ Appointment not found for reminder: {appointment_id}")
-        return
+    # Drop reminders for appointments that are no longer active or already started
+    if appointment["status"] not in ACTIVE_STATUSES or appointment["start"] <= now:
+        await appointments_collection.update_one(lease_filter, {"$unset": CLEAR_REMINDER})
+        print(f"ℹ️ Appointment {appointment['_id']} is {appointment['status']}, skipping reminder")
+        return False
     
-    # Check if appointment is still active
-    if appointment["status"] not in ["scheduled", "confirmed"]:
-        print(f"ℹ️ Appointment {appointment_id} is {appointment['status']}, skipping reminder")
-        return
+    due_at = min(appointment["pendingReminders"])
+    
+    await reminder_bucket.acquire()
+    
+    # Another sweeper may have claimed it after the lease expired; never send twice
+    if get_clock().utcnow() >= appointment["reminderLeaseUntil"]:
+        print(f"⚠️ Lease on appointment {appointment['_id']} expired before its reminder was sent")
+        return False
     
-    # Send reminder SMS
     try:
-        await send_reminder_sms(appointment)
-        
-        # Mark reminder as sent
-        await appointments_collection.update_one(
-            {"_id": ObjectId(appointment_id)},
-            {"$set": {"reminder3hSent": True}}
-        )
-        
-        print(f"✅ Sent 3h reminder for appointment {appointment_id}")
-        
+        result = await send_reminder_sms(appointment, users)
     except Exception as e:
-        print(f"❌ Failed to send reminder for {appointment_id}: {str(e)}")
+        result = {"success": False, "error": str(e)}
+    
+    if not result["success"]:
+        # Keep the lease; the reminder is retried once it expires
+        reminder_dispatch_metrics["failed"] += 1
+        print(f"❌ Failed to send reminder for {appointment['_id']}: {result.get('error')}")
+        return False
+    
+    sent_at = get_clock().utcnow()
+    record_dispatch_lag((sent_at - due_at).total_seconds())
+    
+    # Remove this reminder and any others already due; drop the array once empty
+    handled_until = max(due_at, sent_at)
+    await appointments_collection.update_one(lease_filter, [
+        {"$set": {
+            "pendingReminders": {
+                "$filter": {"input": "$pendingReminders", "cond": {"$gt": ["$$this", handled_until]}}
+            },
+            "reminder3hSent": True,
+            "firstReminderSentAt": {"$ifNull": ["$firstReminderSentAt", sent_at]},
+            "lastReminderSentAt": sent_at
+        }},
+        {"$set": {
+            "pendingReminders": {
+                "$cond": [{"$eq": [{"$size": "$pendingReminders"}, 0]}, "$$REMOVE", "$pendingReminders"]
+            }
+        }},
+        {"$unset": "reminderLeaseUntil"}
+    ])
+    
+    hours_before = (appointment["start"] - due_at).total_seconds() / 3600
+    print(f"✅ Sent {hours_before:g}h reminder for appointment {appointment['_id']}")
+    return True
 
 
-async def schedule_reminder_job(appointment_id: str, reminder_time: datetime, scheduler=None) -> Optional[Dict[str, Any]]:
+async def sweep_due_reminders() -> int:
     """
-    Schedule a reminder job for an appointment using APScheduler
+    Periodic job: claim due reminders in a batch and send them
+    
+    Each appointment's reminders become claimable at their spread send time
+    (see spread_filter), so the burst for a :00/:30 slot is spread over the
+    REMINDER_SPREAD_SECONDS before it, and sending is paced by the token
+    bucket. Each sweep claims only what the bucket can send before the next
+    sweep (and well within the lease); the rest waits in Mongo (reported as
+    queue depth).
+    
+    Returns number of reminders sent
     """
-    if scheduler is None:
-        from app.main import scheduler as default_scheduler
-        scheduler = default_scheduler
+    appointments_collection = get_appointments_collection()
+    now = get_clock().utcnow()
     
-    try:
-        job = scheduler.add_job(
-            send_3h_reminder,
-            'date',
-            run_date=reminder_time,
-            args=[appointment_id],
-            id=f"reminder_{appointment_id}",
-            replace_existing=True
+    send_seconds = min(settings.REMINDER_SWEEP_INTERVAL_SECONDS, settings.REMINDER_LEASE_SECONDS / 2)
+    limit = min(
+        settings.REMINDER_SWEEP_BATCH_SIZE,
+        int(settings.REMINDER_RATE_PER_SECOND * send_seconds + settings.REMINDER_BURST)
+    )
+    claimed = await claim_due_reminders(now, limit)
+    
+    sent_count = await deliver_reminders(claimed, now) if claimed else 0
+    
+    # Reminders whose send time has come still waiting to be claimed
+    reminder_dispatch_metrics["queueDepth"] = await appointments_collection.count_documents(
+        spread_filter(get_clock().utcnow())
+    )
+    await save_scheduler_status("reminder_dispatch", get_reminder_dispatch_stats())
+    
+    if claimed:
+        print(
+            f"📊 Reminder sweep: sent {sent_count} of {len(claimed)} claimed reminder(s), "
+            f"{reminder_dispatch_metrics['queueDepth']} still queued"
         )
-        
-        return {
-            "job_id": job.id,
-            "scheduled_at": reminder_time
-        }
-    except Exception as e:
-        print(f"❌ Failed to schedule reminder job for {appointment_id}: {str(e)}")
-        return None
+    return sent_count
+
+
+async def deliver_reminders(claimed: List[Dict[str, Any]], now: datetime) -> int:
+    """Send claimed reminders with bounded concurrency; returns number sent"""
+    from app.services.twilio_service import get_appointment_users
+    
+    # Patients and doctors for the whole batch in one (cached) lookup
+    users = await get_appointment_users(claimed)
+    semaphore = asyncio.Semaphore(settings.NOTIFICATION_CONCURRENCY)
+    
+    async def deliver(appointment: Dict[str, Any]) -> bool:
+        async with semaphore:
+            return await deliver_reminder(appointment, now, users)
+    
+    results = await asyncio.gather(*(deliver(appointment) for appointment in claimed))
+    return sum(results)
 
 
-async def auto_cancel_unconfirmed():
+async def auto_cancel_unconfirmed() -> int:
     """
     Cron job to auto-cancel appointments that weren't confirmed
     Cancels appointments where:
     - status is 'scheduled' (not confirmed by patient)
     - appointment time is less than 15 minutes away
-    - reminder was sent (3h before) but patient didn't confirm within 2:45h
+    - a reminder was sent (reminder3hSent, set for any offset) but the patient didn't confirm
+    
+    The cancel is one update_many guarded on status 'scheduled', so a patient
+    confirming mid-sweep is never cancelled.
     """
-    from app.services.twilio_service import send_cancellation_notification
+    from app.services.twilio_service import send_status_notifications
     
+    started = time.perf_counter()
     appointments_collection = get_appointments_collection()
-    now = datetime.utcnow()
+    now = get_clock().utcnow()
+    sweep_id = ObjectId()
     
     # Time window: 15 minutes before appointment
     # If patient hasn't confirmed by now, cancel
     cutoff_time = now + timedelta(minutes=15)
+    window = {"$lte": cutoff_time, "$gte": now}
     
-    # Find scheduled appointments with reminder sent but not confirmed
-    cursor = appointments_collection.find({
-        "status": "scheduled",
-        "reminder3hSent": True,
-        "start": {"$lte": cutoff_time, "$gte": now}
-    })
-    
-    cancelled_count = 0
-    async for appointment in cursor:
-        try:
-            # Cancel the appointment
-            await appointments_collection.update_one(
-                {"_id": appointment["_id"]},
-                {
-                    "$set": {
-                        "status": "cancelled",
-                        "cancelledAt": now,
-                        "cancelReason": "Auto-cancelled: Not confirmed within required timeframe"
-                    }
-                }
-            )
-            
-            # Send cancellation SMS
-            try:
-                await send_cancellation_notification(appointment)
-            except Exception as e:
-                print(f"⚠️ Failed to send cancellation SMS for {appointment['_id']}: {str(e)}")
-            
-            cancelled_count += 1
-            print(f"✅ Auto-cancelled unconfirmed appointment {appointment['_id']}")
-            
-        except Exception as e:
-            print(f"❌ Failed to cancel appointment {appointment['_id']}: {str(e)}")
+    result = await appointments_collection.update_many(
+        {
+            "status": "scheduled",
+            "reminder3hSent": True,
+            "start": window
+        },
+        {
+            "$set": {
+                "status": "cancelled",
+                "cancelledAt": now,
+                "cancelReason": "Auto-cancelled: Not confirmed within required timeframe",
+                "statusBatchId": sweep_id
+            },
+            "$unset": CLEAR_REMINDER
+        }
+    )
+    if result.modified_count == 0:
+        return 0
+    
+    # Fetch exactly the rows this sweep cancelled (served by the status/start index)
+    cancelled = await appointments_collection.find({
+        "status": "cancelled",
+        "start": window,
+        "statusBatchId": sweep_id
+    }).to_list(length=None)
     
-    if cancelled_count > 0:
-        print(f"📊 Auto-cancelled {cancelled_count} unconfirmed appointment(s)")
+    await record_status_transitions([
+        (apt, "scheduled", "cancelled") for apt in cancelled
+    ])
+    await clear_batch_fields(sweep_id, cancelled)
     
-    return cancelled_count
+    # Send cancellation SMS (users resolved in bulk, bounded concurrency)
+    await send_status_notifications(cancelled, "cancelled")
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"📊 Auto-cancelled {len(cancelled)} unconfirmed appointment(s) in {elapsed_ms:.0f} ms")
+    
+    return len(cancelled)
 
 
-async def auto_cancel_no_shows():
+async def auto_cancel_no_shows(limit: Optional[int] = None) -> int:
     """
     Cron job that runs every minute to mark no-shows
-    Finds appointments where:
+    Marks appointments where:
     - status is scheduled or confirmed
     - start time was more than 15 minutes ago
-    - appointment not completed
+    
+    The whole batch is claimed with one update_many tagged with a sweep ID,
+    so overlapping runs never mark or notify the same appointment twice.
+    limit bounds the batch to the oldest overdue appointments (catch-up mode).
     """
-    from app.services.twilio_service import send_no_show_notification
+    from app.services.twilio_service import send_status_notifications
     
+    started = time.perf_counter()
     appointments_collection = get_appointments_collection()
-    now = datetime.utcnow()
+    now = get_clock().utcnow()
     cutoff_time = now - timedelta(minutes=15)
+    sweep_id = ObjectId()
     
-    # Find appointments to mark as no-show
-    cursor = appointments_collection.find({
-        "status": {"$in": ["scheduled", "confirmed"]},
+    overdue_filter = {
+        "status": {"$in": ACTIVE_STATUSES},
         "start": {"$lte": cutoff_time}
-    })
-    
-    no_show_count = 0
-    async for appointment in cursor:
-        try:
-            # Update to no_show status
-            updated = await appointments_collection.find_one_and_update(
-                {"_id": appointment["_id"]},
-                {"$set": {"status": "no_show"}},
-                return_document=ReturnDocument.AFTER
-            )
+    }
+    
+    if limit is not None:
+        oldest = await appointments_collection.find(
+            overdue_filter,
+            {"_id": 1}
+        ).sort("start", 1).limit(limit).to_list(length=limit)
+        if not oldest:
+            return 0
+        overdue_filter["_id"] = {"$in": [apt["_id"] for apt in oldest]}
+    
+    # Claim and update in one round trip; previousStatus feeds the stats rollup
+    result = await appointments_collection.update_many(
+        overdue_filter,
+        [
+            {"$set": {
+                "previousStatus": "$status",
+                "status": "no_show",
+                "statusBatchId": sweep_id
+            }},
+            {"$unset": REMINDER_FIELDS}
+        ]
+    )
+    if result.modified_count == 0:
+        return 0
+    
+    # Fetch exactly the rows this sweep changed (served by the status/start index)
+    updated = await appointments_collection.find({
+        "status": "no_show",
+        "start": {"$lte": cutoff_time},
+        "statusBatchId": sweep_id
+    }).to_list(length=None)
+    
+    await record_status_transitions([
+        (apt, apt["previousStatus"], "no_show") for apt in updated
+    ])
+    await clear_batch_fields(sweep_id, updated)
+    
+    await send_status_notifications(updated, "no_show")
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(f"✅ Marked {len(updated)} appointments as no-show in {elapsed_ms:.0f} ms")
+    return len(updated)
+
+
+async def rehydrate_reminders() -> int:
+    """
+    Startup reconciliation: give future active appointments that lost their
+    pending reminders (legacy in-memory jobs, direct imports) their
+    pendingReminders from the doctor's reminder policy
+    
+    Late bookings whose reminder times had already passed when they were
+    booked never get a reminder; they are marked with pendingReminders: null
+    (as create_appointment does) instead of being reminded on restart.
+    
+    Pages through the status/start index; updated rows drop out of the
+    filter, so each page is simply the next batch. Also migrates the older
+    single reminderDueAt field. Safe to run in every process. Returns number
+    of appointments restored.
+    """
+    appointments_collection = get_appointments_collection()
+    started = time.perf_counter()
+    now = get_clock().utcnow()
+    page_size = settings.REMINDER_REHYDRATE_PAGE_SIZE
+    
+    missing_reminder = {
+        "status": {"$in": ACTIVE_STATUSES},
+        "start": {"$gt": now},
+        "reminder3hSent": False,
+        "pendingReminders": {"$exists": False}
+    }
+    
+    restored = 0
+    late = 0
+    pages = 0
+    while True:
+        page = await appointments_collection.find(
+            missing_reminder,
+            {"start": 1, "doctorId": 1, "createdAt": 1}
+        ).sort("start", 1).limit(page_size).to_list(length=page_size)
+        if not page:
+            break
+        
+        # One lookup for the reminder policy of every doctor on the page
+        doctors = await get_users_collection().find(
+            {"_id": {"$in": list({apt["doctorId"] for apt in page})}},
+            {"doctorProfile.reminderOffsetsHours": 1, "doctorProfile.specialization": 1}
+        ).to_list(length=None)
+        offsets_by_doctor = {
+            doctor["_id"]: get_reminder_offsets(doctor.get("doctorProfile")) for doctor in doctors
+        }
+        
+        restore_operations = []
+        late_operations = []
+        for apt in page:
+            offsets = offsets_by_doctor.get(apt["doctorId"]) or get_reminder_offsets(None)
+            reminders = pending_reminders(apt["start"], now, offsets)
+            if not reminders:
+                last_due_at = apt["start"] - timedelta(hours=min(offsets))
+                if apt.get("createdAt") and last_due_at <= apt["createdAt"]:
+                    # Booked after its last reminder time: it never had a reminder
+                    late_operations.append(UpdateOne(
+                        {"_id": apt["_id"], "pendingReminders": {"$exists": False}},
+                        {"$set": {"pendingReminders": None}, "$unset": {"reminderDueAt": ""}}
+                    ))
+                    continue
+                # Every reminder time has passed since booking; send the last one on the next sweep
+                reminders = [last_due_at]
+            restore_operations.append(UpdateOne(
+                {"_id": apt["_id"], "pendingReminders": {"$exists": False}},
+                {"$set": {"pendingReminders": reminders}, "$unset": {"reminderDueAt": ""}}
+            ))
+        
+        modified = 0
+        if restore_operations:
+            result = await appointments_collection.bulk_write(restore_operations, ordered=False)
+            restored += result.modified_count
+            modified += result.modified_count
+        if late_operations:
+            result = await appointments_collection.bulk_write(late_operations, ordered=False)
+            late += result.modified_count
+            modified += result.modified_count
+        pages += 1
+        
+        # Nothing changed (e.g. concurrent rehydration); the rest will be handled there
+        if modified == 0:
+            break
+    
+    elapsed_ms = (time.perf_counter() - started) * 1000
+    print(
+        f"📊 Reminder rehydration: restored {restored} reminder(s), marked {late} late booking(s) "
+        f"in {pages} page(s), {elapsed_ms:.0f} ms"
+    )
+    
+    return restored
+
+
+async def purge_orphan_reminders() -> int:
+    """
+    Periodic reconciliation: clear pending reminders left on inactive appointments
+    
+    Transitions clear reminders themselves; this catches writes that bypass
+    them (imports, manual edits) in one update_many over the partial index
+    """
+    result = await get_appointments_collection().update_many(
+        {
+            "pendingReminders": {"$exists": True},
+            "status": {"$nin": ACTIVE_STATUSES}
+        },
+        {"$unset": CLEAR_REMINDER}
+    )
+    
+    if result.modified_count > 0:
+        print(f"🧹 Purged {result.modified_count} orphaned reminder(s)")
+    
+    return result.modified_count
+
+
+# Catch-up mode state for this process; progress is also persisted in scheduler_status
+catchup_state: Dict[str, Any] = {"task": None}
+
+# Regular sweeps that catch-up mode replaces while it drains the backlog
+CATCHUP_JOBS = ["sweep_due_reminders", "auto_cancel_no_shows"]
+
+
+def is_catching_up() -> bool:
+    task = catchup_state["task"]
+    return task is not None and not task.done()
+
+
+async def save_catchup_progress(progress: Dict[str, Any]):
+    """Persist catch-up progress so any API process can report it"""
+    await save_scheduler_status("catchup", progress)
+
+
+async def get_catchup_progress() -> Optional[Dict[str, Any]]:
+    """Latest catch-up progress (from whichever process ran it)"""
+    return await get_scheduler_status("catchup")
+
+
+async def has_catchup_backlog(now: datetime) -> bool:
+    """
+    Whether anything is overdue by more than a couple of regular sweep runs
+    
+    A short lease hand-over leaves nothing the regular sweeps won't pick up
+    on their next run, so it doesn't warrant a catch-up scan
+    """
+    appointments_collection = get_appointments_collection()
+    grace = timedelta(seconds=2 * max(settings.REMINDER_SWEEP_INTERVAL_SECONDS, 60))
+    
+    if await appointments_collection.find_one({"pendingReminders": {"$lte": now - grace}}, {"_id": 1}):
+        return True
+    
+    overdue_no_show = await appointments_collection.find_one(
+        {"status": {"$in": ACTIVE_STATUSES}, "start": {"$lte": now - timedelta(minutes=15) - grace}},
+        {"_id": 1}
+    )
+    return overdue_no_show is not None
+
+
+async def run_catchup() -> Dict[str, Any]:
+    """
+    Drain the reminder and no-show backlog left by downtime
+    
+    - The backlog window is everything overdue when catch-up starts
+    - Work is done in batches of CATCHUP_BATCH_SIZE, paced to
+      CATCHUP_MAX_PER_SECOND appointments so Twilio and Mongo aren't flooded
+    - Progress is persisted after every batch; stops if leadership is lost
+      or when cancelled (stop_catchup), recording the run as interrupted
+    """
+    appointments_collection = get_appointments_collection()
+    started_at = get_clock().utcnow()
+    batch_size = settings.CATCHUP_BATCH_SIZE
+    
+    reminder_backlog = {"pendingReminders": {"$lte": started_at}}
+    no_show_backlog = {
+        "status": {"$in": ACTIVE_STATUSES},
+        "start": {"$lte": started_at - timedelta(minutes=15)}
+    }
+    
+    # Backlog window starts at the oldest overdue item
+    backlog_starts = []
+    oldest_reminder = await appointments_collection.find_one(
+        reminder_backlog, {"pendingReminders": 1}, sort=[("pendingReminders", 1)]
+    )
+    if oldest_reminder:
+        backlog_starts.append(min(oldest_reminder["pendingReminders"]))
+    oldest_no_show = await appointments_collection.find_one(
+        no_show_backlog, {"start": 1}, sort=[("start", 1)]
+    )
+    if oldest_no_show:
+        backlog_starts.append(oldest_no_show["start"])
+    backlog_from = min(backlog_starts, default=None)
+    
+    progress = {
+        "state": "running",
+        "holder": scheduler_leader.holder_id,
+        "startedAt": started_at,
+        "finishedAt": None,
+        "backlogFrom": backlog_from,
+        "backlogTo": started_at,
+        "reminders": {
+            "total": await appointments_collection.count_documents(reminder_backlog),
+            "processed": 0,
+            "sent": 0
+        },
+        "noShows": {
+            "total": await appointments_collection.count_documents(no_show_backlog),
+            "processed": 0
+        }
+    }
+    await save_catchup_progress(progress)
+    print(
+        f"⏩ Catch-up started: {progress['reminders']['total']} reminder(s), "
+        f"{progress['noShows']['total']} no-show(s) overdue since {backlog_from}"
+    )
+    
+    async def pace(count: int, batch_started: float):
+        """Sleep so batches average at most CATCHUP_MAX_PER_SECOND appointments"""
+        min_duration = count / settings.CATCHUP_MAX_PER_SECOND
+        await get_clock().sleep(max(0.0, min_duration - (get_clock().monotonic() - batch_started)))
+    
+    cancelled = False
+    try:
+        # Overdue reminders first; deliver_reminder drops those whose appointment already started
+        while scheduler_leader.is_leader:
+            batch_started = get_clock().monotonic()
+            now = get_clock().utcnow()
+            claimed = await claim_due_reminders(now, batch_size, due_before=started_at)
+            if not claimed:
+                break
             
-            if updated:
-                no_show_count += 1
-                print(f"🚫 Marked appointment {appointment['_id']} as no-show")
-                
-                # Send notifications
-                await send_no_show_notification(updated)
-                
-        except Exception as e:
-            print(f"❌ Failed to mark no-show for {appointment['_id']}: {str(e)}")
+            progress["reminders"]["sent"] += await deliver_reminders(claimed, now)
+            progress["reminders"]["processed"] += len(claimed)
+            await save_catchup_progress(progress)
+            await pace(len(claimed), batch_started)
+        
+        # Then overdue no-shows, oldest first
+        while scheduler_leader.is_leader:
+            batch_started = get_clock().monotonic()
+            marked = await auto_cancel_no_shows(limit=batch_size)
+            if not marked:
+                break
+            
+            progress["noShows"]["processed"] += marked
+            await save_catchup_progress(progress)
+            await pace(marked, batch_started)
+        
+        progress["state"] = "done" if scheduler_leader.is_leader else "interrupted"
+    except asyncio.CancelledError:
+        # Shutdown or lost lease; record where it stopped
+        progress["state"] = "interrupted"
+        cancelled = True
+    except Exception as e:
+        progress["state"] = "failed"
+        progress["error"] = str(e)
+        print(f"❌ Catch-up failed: {str(e)}")
+    
+    progress["finishedAt"] = get_clock().utcnow()
+    await save_catchup_progress(progress)
+    
+    elapsed = (progress["finishedAt"] - started_at).total_seconds()
+    print(
+        f"📊 Catch-up {progress['state']} in {elapsed:.1f}s: "
+        f"{progress['reminders']['sent']} reminder(s) sent, {progress['noShows']['processed']} no-show(s) marked"
+    )
+    if cancelled:
+        raise asyncio.CancelledError()
+    return progress
+
+
+async def stop_catchup():
+    """Cancel a running catch-up and wait until it has stopped writing"""
+    task = catchup_state["task"]
+    catchup_state["task"] = None
+    if task is None or task.done():
+        return
+    
+    task.cancel()
+    try:
+        await task
+    except asyncio.CancelledError:
+        pass
+
+
+async def run_leader_job(job_name: str):
+    """
+    APScheduler entry point for sweeps that must run in one process only
+    Skips the run unless this process holds the scheduler leader lease
+    """
+    from app.services.risk_service import compute_no_show_risk
+    
+    if not scheduler_leader.is_leader:
+        return
+    
+    # Catch-up mode is draining this backlog in paced batches
+    if job_name in CATCHUP_JOBS and is_catching_up():
+        return
     
-    if no_show_count > 0:
-        print(f"✅ Marked {no_show_count} appointments as no-show")
+    jobs = {
+        "sweep_due_reminders": sweep_due_reminders,
+        "purge_orphan_reminders": purge_orphan_reminders,
+        "auto_cancel_unconfirmed": auto_cancel_unconfirmed,
+        "auto_cancel_no_shows": auto_cancel_no_shows,
+        "compute_no_show_risk": compute_no_show_risk,
+    }
+    await jobs[job_name]()
+
+
+async def leader_heartbeat():
+    """
+    Acquire or renew the scheduler leader lease (runs in every process)
+    
+    A process that just became leader starts catch-up mode in the background
+    if there is a real backlog (see has_catchup_backlog); losing the lease
+    stops a running catch-up right away instead of after its current batch
+    """
+    was_leader = scheduler_leader.is_leader
+    
+    if not await scheduler_leader.heartbeat():
+        await stop_catchup()
+        return
+    
+    if not was_leader and not is_catching_up() and await has_catchup_backlog(get_clock().utcnow()):
+        catchup_state["task"] = asyncio.create_task(run_catchup())
+
+
+def start_leader_election(scheduler):
+    """Start the leader lease heartbeat, trying to acquire the lease right away"""
+    try:
+        scheduler.add_job(
+            leader_heartbeat,
+            'interval',
+            seconds=settings.LEADER_HEARTBEAT_SECONDS,
+            id='leader_heartbeat',
+            next_run_time=datetime.now(),
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        print(f"✅ Started leader heartbeat (every {settings.LEADER_HEARTBEAT_SECONDS}s, holder {scheduler_leader.holder_id})")
+    except Exception as e:
+        print(f"❌ Failed to start leader heartbeat: {str(e)}")
+
+
+def start_reminder_sweep(scheduler):
+    """Start the periodic reminder sweep job and a one-off startup rehydration"""
+    try:
+        # Runs once in the background so startup never waits on it
+        scheduler.add_job(
+            rehydrate_reminders,
+            'date',
+            id='rehydrate_reminders',
+            replace_existing=True
+        )
+        
+        scheduler.add_job(
+            run_leader_job,
+            'interval',
+            seconds=settings.REMINDER_SWEEP_INTERVAL_SECONDS,
+            args=['sweep_due_reminders'],
+            id='sweep_due_reminders',
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        print(f"✅ Started reminder sweep job (runs every {settings.REMINDER_SWEEP_INTERVAL_SECONDS}s)")
+        
+        scheduler.add_job(
+            run_leader_job,
+            'interval',
+            minutes=settings.REMINDER_PURGE_INTERVAL_MINUTES,
+            args=['purge_orphan_reminders'],
+            id='purge_orphan_reminders',
+            max_instances=1,
+            coalesce=True,
+            replace_existing=True
+        )
+        print(f"✅ Started orphan reminder purge job (runs every {settings.REMINDER_PURGE_INTERVAL_MINUTES} min)")
+    except Exception as e:
+        print(f"❌ Failed to start reminder sweep: {str(e)}")
 
 
 def start_auto_cancel_cron(scheduler):
@@ -182,22 +837,49 @@ def start_auto_cancel_cron(scheduler):
     try:
         # Job 1: Auto-cancel unconfirmed appointments (runs every minute)
         scheduler.add_job(
-            auto_cancel_unconfirmed,
+            run_leader_job,
             'cron',
             minute='*',
+            args=['auto_cancel_unconfirmed'],
             id='auto_cancel_unconfirmed',
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=30,
             replace_existing=True
         )
         print("✅ Started auto-cancel unconfirmed appointments cron job (runs every minute)")
         
         # Job 2: Mark no-shows (runs every minute)
         scheduler.add_job(
-            auto_cancel_no_shows,
+            run_leader_job,
             'cron',
             minute='*',
+            args=['auto_cancel_no_shows'],
             id='auto_cancel_no_shows',
+            max_instances=1,
+            coalesce=True,
+            misfire_grace_time=30,
             replace_existing=True
         )
         print("✅ Started auto-cancel no-shows cron job (runs every minute)")
     except Exception as e:
         print(f"❌ Failed to start auto-cancel cron: {str(e)}")
+
+
+def start_risk_scoring_cron(scheduler):
+    """Start the nightly no-show risk scoring job"""
+    try:
+        scheduler.add_job(
+            run_leader_job,
+            'cron',
+            hour=2,
+            minute=0,
+            args=['compute_no_show_risk'],
+            id='compute_no_show_risk',
+            coalesce=True,
+            misfire_grace_time=3600,
+            replace_existing=True
+        )
+        print("✅ Started no-show risk scoring cron job (runs daily at 02:00 UTC)")
+    except Exception as e:
+        print(f"❌ Failed to start risk scoring cron: {str(e)}")
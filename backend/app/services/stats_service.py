@@ -0,0 +1,444 @@
+"""
+Stats service for the incrementally maintained doctor_stats_daily rollup
+"""
+from fastapi import HTTPException, status
+from app.core.db import (
+    get_appointments_collection,
+    get_doctor_stats_daily_collection,
+    get_analytics_collection
+)
+from app.config import settings
+from app.utils.cache import AsyncTTLCache
+from app.services.change_stream_service import subscribe
+from datetime import datetime
+from bson import ObjectId
+from pymongo import UpdateOne
+from pymongo.errors import ExecutionTimeout
+from typing import Dict, Any, List, Optional, Tuple, AsyncIterator
+
+
+STATUS_FIELDS = ["scheduled", "confirmed", "completed", "cancelled", "no_show"]
+
+# Doctor stats results keyed by (doctorId, groupBy, limit, from, to), tagged by doctorId
+doctor_stats_cache = AsyncTTLCache(
+    ttl_seconds=settings.STATS_CACHE_TTL_SECONDS,
+    max_entries=settings.STATS_CACHE_MAX_ENTRIES
+)
+
+
+@subscribe
+async def invalidate_doctor_stats(event: Dict[str, Any]):
+    """Drop cached stats when another process books or changes a doctor's appointment"""
+    if event["doctorId"]:
+        doctor_stats_cache.invalidate(event["doctorId"])
+
+
+def _status_counters(field_prefix: str = "$") -> Dict[str, Any]:
+    """$sum expressions for every status counter"""
+    return {
+        name: {"$sum": f"{field_prefix}{name}"}
+        for name in ["total"] + STATUS_FIELDS
+    }
+
+
+async def _apply_increments(increments: Dict[Tuple[Any, str], Dict[str, int]]):
+    """Apply merged counter increments with a single unordered bulk_write"""
+    now = datetime.utcnow()
+    operations = []
+    
+    # Any counter change makes that doctor's cached stats stale
+    doctor_ids = {str(doctor_id) for doctor_id, _ in increments.keys()}
+    for doctor_id in doctor_ids:
+        doctor_stats_cache.invalidate(doctor_id)
+    
+    for (doctor_id, day), inc in increments.items():
+        inc = {field: value for field, value in inc.items() if value}
+        if not inc:
+            continue
+        operations.append(UpdateOne(
+            {"doctorId": doctor_id, "day": day},
+            {
+                "$inc": inc,
+                "$set": {"month": day[:7], "updatedAt": now}
+            },
+            upsert=True
+        ))
+    
+    if not operations:
+        return
+    
+    try:
+        await get_doctor_stats_daily_collection().bulk_write(operations, ordered=False)
+    except Exception as e:
+        # Rollup is derived data - rebuild_doctor_stats repairs any drift
+        print(f"⚠️ Failed to update doctor stats rollup: {str(e)}")
+    finally:
+        # Again after the write: a read that started during the write may have
+        # cached the old counters
+        for doctor_id in doctor_ids:
+            doctor_stats_cache.invalidate(doctor_id)
+
+
+async def record_appointments_created(appointments: List[Dict[str, Any]]):
+    """Count newly inserted appointments in the rollup"""
+    increments: Dict[Tuple[Any, str], Dict[str, int]] = {}
+    
+    for apt in appointments:
+        key = (apt["doctorId"], apt["start"].strftime("%Y-%m-%d"))
+        inc = increments.setdefault(key, {})
+        inc["total"] = inc.get("total", 0) + 1
+        inc[apt["status"]] = inc.get(apt["status"], 0) + 1
+    
+    await _apply_increments(increments)
+
+
+async def record_appointment_created(appointment: Dict[str, Any]):
+    """Count a newly inserted appointment in the rollup"""
+    await record_appointments_created([appointment])
+
+
+async def record_status_transitions(transitions: List[Tuple[Dict[str, Any], str, str]]):
+    """
+    Move rollup counters for a batch of status transitions
+    
+    transitions: (appointment, old_status, new_status) tuples, where the
+    appointment still has its original doctorId and start
+    """
+    increments: Dict[Tuple[Any, str], Dict[str, int]] = {}
+    
+    for apt, old_status, new_status in transitions:
+        if old_status == new_status:
+            continue
+        key = (apt["doctorId"], apt["start"].strftime("%Y-%m-%d"))
+        inc = increments.setdefault(key, {})
+        inc[old_status] = inc.get(old_status, 0) - 1
+        inc[new_status] = inc.get(new_status, 0) + 1
+    
+    await _apply_increments(increments)
+
+
+async def record_status_transition(appointment: Dict[str, Any], old_status: str, new_status: str):
+    """Move rollup counters for a single status transition"""
+    await record_status_transitions([(appointment, old_status, new_status)])
+
+
+def day_range(from_date: Optional[datetime] = None, to_date: Optional[datetime] = None) -> Dict[str, str]:
+    """
+    Translate a [from, to) start-time window into a rollup day range
+    
+    Rollup rows are day-granular, so partial days at either edge are included
+    """
+    day_filter = {}
+    if from_date is not None:
+        day_filter["$gte"] = from_date.strftime("%Y-%m-%d")
+    if to_date is not None:
+        to_day = to_date.strftime("%Y-%m-%d")
+        if to_date.time() == datetime.min.time():
+            day_filter["$lt"] = to_day
+        else:
+            day_filter["$lte"] = to_day
+    return day_filter
+
+
+async def get_rollup_doctor_stats(
+    doctor_id: str,
+    group_by: str = "month",
+    limit: int = 10,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
+) -> Dict[str, Any]:
+    """
+    Read doctor stats from the daily rollup
+    
+    Reads at most one row per day of history through the {doctorId, day}
+    index instead of scanning the appointments collection
+    """
+    if group_by == "month":
+        period_field = "$month"
+    elif group_by == "day":
+        period_field = "$day"
+    else:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid groupBy parameter. Use 'month' or 'day'"
+        )
+    
+    match = {"doctorId": ObjectId(doctor_id)}
+    day_filter = day_range(from_date, to_date)
+    if day_filter:
+        match["day"] = day_filter
+    
+    pipeline = [
+        {"$match": match},
+        {
+            "$facet": {
+                "stats": [
+                    {"$group": {"_id": period_field, **_status_counters()}},
+                    {"$sort": {"_id": -1}},
+                    {"$limit": limit},
+                    {
+                        "$project": {
+                            "_id": 0,
+                            "period": "$_id",
+                            "count": "$total",
+                            "completed": 1,
+                            "cancelled": 1,
+                            "no_show": 1,
+                            "scheduled": 1,
+                            "confirmed": 1
+                        }
+                    }
+                ],
+                "total": [
+                    {"$group": {"_id": None, "count": {"$sum": "$total"}}}
+                ]
+            }
+        }
+    ]
+    
+    cursor = get_doctor_stats_daily_collection().aggregate(
+        pipeline,
+        maxTimeMS=settings.STATS_MAX_TIME_MS
+    )
+    result = (await cursor.to_list(length=1))[0]
+    
+    return {
+        "doctorId": doctor_id,
+        "totalAppointments": result["total"][0]["count"] if result["total"] else 0,
+        "stats": result["stats"]
+    }
+
+
+def _rate(numerator: str, denominator: Any) -> Dict[str, Any]:
+    """Division expression that yields 0 for an empty denominator"""
+    return {
+        "$cond": [
+            {"$gt": [denominator, 0]},
+            {"$round": [{"$divide": [numerator, denominator]}, 4]},
+            0
+        ]
+    }
+
+
+def build_clinic_stats_pipeline(
+    group_by: str = "month",
+    by_specialization: bool = False,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None,
+    use_rollup: bool = True
+) -> List[Dict[str, Any]]:
+    """
+    Build the clinic-wide analytics pipeline
+    
+    One $group by {doctorId, period} over either the daily rollup or the
+    raw appointments, then a $lookup of doctor name/specialization per group.
+    Rates per row:
+    - showRate: completed / (total - cancelled), share of kept bookings that were seen
+      (slot utilization against offered capacity is /stats/utilization)
+    - noShowRate: no_show / total
+    - cancellationRate: cancelled / total
+    """
+    if group_by not in ["month", "day"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid groupBy parameter. Use 'month' or 'day'"
+        )
+    
+    if use_rollup:
+        match = {}
+        day_filter = day_range(from_date, to_date)
+        if day_filter:
+            match["day"] = day_filter
+        group = {
+            "_id": {"doctorId": "$doctorId", "period": f"${group_by}"},
+            **_status_counters()
+        }
+    else:
+        match = {}
+        start_range = {}
+        if from_date is not None:
+            start_range["$gte"] = from_date
+        if to_date is not None:
+            start_range["$lt"] = to_date
+        if start_range:
+            match["start"] = start_range
+        group_format = "%Y-%m" if group_by == "month" else "%Y-%m-%d"
+        group = {
+            "_id": {
+                "doctorId": "$doctorId",
+                "period": {"$dateToString": {"format": group_format, "date": "$start"}}
+            },
+            "total": {"$sum": 1},
+            **{
+                name: {"$sum": {"$cond": [{"$eq": ["$status", name]}, 1, 0]}}
+                for name in STATUS_FIELDS
+            }
+        }
+    
+    pipeline = [
+        {"$match": match},
+        {"$group": group},
+        {
+            "$lookup": {
+                "from": "users",
+                "localField": "_id.doctorId",
+                "foreignField": "_id",
+                "pipeline": [{"$project": {"_id": 0, "name": 1, "specialization": "$doctorProfile.specialization"}}],
+                "as": "doctor"
+            }
+        },
+        {"$unwind": {"path": "$doctor", "preserveNullAndEmptyArrays": True}},
+    ]
+    
+    if by_specialization:
+        pipeline.extend([
+            {
+                "$group": {
+                    "_id": {
+                        "specialization": {"$ifNull": ["$doctor.specialization", "Unknown"]},
+                        "period": "$_id.period"
+                    },
+                    "doctors": {"$addToSet": "$_id.doctorId"},
+                    **_status_counters()
+                }
+            },
+            {"$set": {"doctors": {"$size": "$doctors"}}},
+        ])
+        key_fields = {
+            "specialization": "$_id.specialization",
+            "doctors": 1
+        }
+        sort = {"_id.period": -1, "_id.specialization": 1}
+    else:
+        key_fields = {
+            "doctorId": {"$toString": "$_id.doctorId"},
+            "doctorName": "$doctor.name",
+            "specialization": "$doctor.specialization"
+        }
+        sort = {"_id.period": -1, "doctor.name": 1}
+    
+    pipeline.extend([
+        {"$sort": sort},
+        {
+            "$project": {
+                "_id": 0,
+                "period": "$_id.period",
+                **key_fields,
+                "count": "$total",
+                **{name: 1 for name in STATUS_FIELDS},
+                "showRate": _rate("$completed", {"$subtract": ["$total", "$cancelled"]}),
+                "noShowRate": _rate("$no_show", "$total"),
+                "cancellationRate": _rate("$cancelled", "$total")
+            }
+        }
+    ])
+    
+    return pipeline
+
+
+async def stream_clinic_stats(
+    group_by: str = "month",
+    by_specialization: bool = False,
+    from_date: Optional[datetime] = None,
+    to_date: Optional[datetime] = None
+) -> AsyncIterator[Dict[str, Any]]:
+    """
+    Stream clinic-wide stats rows for every doctor (or specialization)
+    
+    Runs on ANALYTICS_READ_PREFERENCE so the scan can be pointed at a
+    secondary, and yields rows as cursor batches arrive. Parameters are
+    validated and the first batch is fetched eagerly, so bad input and a
+    query that exceeds ANALYTICS_MAX_TIME_MS surface as an error status
+    before the response starts streaming.
+    """
+    use_rollup = settings.STATS_USE_ROLLUP
+    pipeline = build_clinic_stats_pipeline(
+        group_by=group_by,
+        by_specialization=by_specialization,
+        from_date=from_date,
+        to_date=to_date,
+        use_rollup=use_rollup
+    )
+    
+    collection_name = "doctor_stats_daily" if use_rollup else "appointments"
+    cursor = get_analytics_collection(collection_name).aggregate(
+        pipeline,
+        allowDiskUse=True,
+        maxTimeMS=settings.ANALYTICS_MAX_TIME_MS
+    )
+    
+    # The aggregation (including its $group) runs before the first batch returns
+    try:
+        first = await cursor.to_list(length=1)
+    except ExecutionTimeout:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="Clinic stats query timed out. Use a narrower from/to window"
+        )
+    
+    async def rows():
+        for row in first:
+            yield row
+        async for row in cursor:
+            yield row
+    
+    return rows()
+
+
+async def rebuild_doctor_stats(doctor_id: Optional[str] = None) -> int:
+    """
+    Rebuild (or backfill) the doctor_stats_daily rollup from appointments
+    
+    Recomputes counters server-side and $merges them into the rollup.
+    Run while bookings are quiet - increments that land mid-rebuild can be lost.
+    
+    Returns number of rollup rows written
+    """
+    appointments_collection = get_appointments_collection()
+    doctor_stats_collection = get_doctor_stats_daily_collection()
+    
+    match = {"doctorId": ObjectId(doctor_id)} if doctor_id else {}
+    
+    await doctor_stats_collection.delete_many(match)
+    
+    pipeline = [
+        {"$match": match},
+        {
+            "$group": {
+                "_id": {
+                    "doctorId": "$doctorId",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$start"}}
+                },
+                "total": {"$sum": 1},
+                **{
+                    name: {"$sum": {"$cond": [{"$eq": ["$status", name]}, 1, 0]}}
+                    for name in STATUS_FIELDS
+                }
+            }
+        },
+        {
+            "$project": {
+                "_id": 0,
+                "doctorId": "$_id.doctorId",
+                "day": "$_id.day",
+                "month": {"$substrBytes": ["$_id.day", 0, 7]},
+                "total": 1,
+                **{name: 1 for name in STATUS_FIELDS},
+                "updatedAt": "$$NOW"
+            }
+        },
+        {
+            "$merge": {
+                "into": "doctor_stats_daily",
+                "on": ["doctorId", "day"],
+                "whenMatched": "replace",
+                "whenNotMatched": "insert"
+            }
+        }
+    ]
+    
+    await appointments_collection.aggregate(pipeline).to_list(length=None)
+    
+    doctor_stats_cache.clear()
+    
+    return await doctor_stats_collection.count_documents(match)
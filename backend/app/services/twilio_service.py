@@ -2,15 +2,45 @@
 Twilio service for sending SMS messages and logging
 """
 from twilio.rest import Client
+from twilio.http.http_client import TwilioHttpClient
+from requests.adapters import HTTPAdapter
 from app.config import settings
 from app.core.db import get_twilio_logs_collection, get_users_collection
+from app.utils.bulk_writer import BufferedInsertWriter
+from app.services.user_cache import notification_user_cache
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+from functools import partial
 from bson import ObjectId
-from typing import Dict, Any
+from typing import Dict, Any, List, Optional, Tuple
+import asyncio
 
 
-# Initialize Twilio client
-twilio_client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN)
+# Initialize Twilio client with a keep-alive connection pool sized to the executor
+twilio_http_client = TwilioHttpClient(timeout=settings.TWILIO_TIMEOUT_SECONDS)
+twilio_http_client.session.mount("https://", HTTPAdapter(pool_maxsize=settings.TWILIO_MAX_CONCURRENCY))
+twilio_client = Client(settings.TWILIO_ACCOUNT_SID, settings.TWILIO_AUTH_TOKEN, http_client=twilio_http_client)
+
+# The Twilio SDK is blocking; API calls run here so the event loop never waits on HTTPS
+twilio_executor = ThreadPoolExecutor(max_workers=settings.TWILIO_MAX_CONCURRENCY, thread_name_prefix="twilio")
+
+
+# Outbound and inbound SMS logs, written in batches
+twilio_log_writer = BufferedInsertWriter(
+    get_twilio_logs_collection,
+    batch_size=settings.TWILIO_LOG_BATCH_SIZE,
+    flush_interval_seconds=settings.TWILIO_LOG_FLUSH_SECONDS,
+    max_buffer=settings.TWILIO_LOG_MAX_BUFFER
+)
+
+
+async def create_message(to: str, from_: str, body: str):
+    """Create a Twilio message on the bounded executor (queues beyond TWILIO_MAX_CONCURRENCY)"""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(
+        twilio_executor,
+        partial(twilio_client.messages.create, to=to, from_=from_, body=body)
+    )
 
 
 async def log_twilio_message(
@@ -23,10 +53,12 @@ async def log_twilio_message(
     twilio_sid: str = None,
     error_code: str = None,
     error_message: str = None
-) -> str:
-    """Log Twilio message to database"""
-    twilio_logs_collection = get_twilio_logs_collection()
+) -> Optional[str]:
+    """
+    Log Twilio message to database (buffered; the log ID is valid right away)
     
+    Returns None if the log was dropped because the write buffer is full
+    """
     log_doc = {
         "to": to,
         "from": from_,
@@ -40,8 +72,8 @@ async def log_twilio_message(
         "errorMessage": error_message
     }
     
-    result = await twilio_logs_collection.insert_one(log_doc)
-    return str(result.inserted_id)
+    log_id = twilio_log_writer.add(log_doc)
+    return str(log_id) if log_id else None
 
 
 async def send_sms(to: str, body: str, from_number: str = None, appointment_id: str = None) -> Dict[str, Any]:
@@ -72,7 +104,7 @@ async def send_sms(to: str, body: str, from_number: str = None, appointment_id:
     
     try:
         # Send message to real numbers only
-        message = twilio_client.messages.create(
+        message = await create_message(
             to=to,
             from_=from_number,
             body=body
@@ -117,33 +149,77 @@ async def send_sms(to: str, body: str, from_number: str = None, appointment_id:
         }
 
 
-async def send_reminder_sms(appointment: Dict[str, Any]):
+async def get_users_by_ids(user_ids: List[Any]) -> Dict[ObjectId, Dict[str, Any]]:
     """
-    Send 3-hour reminder SMS to patient
+    Resolve many users for notifications (name and phone only); invalid IDs are skipped
+    
+    Served from notification_user_cache where possible; the rest are
+    fetched with one $in query and cached
     """
-    users_collection = get_users_collection()
+    ids = {ObjectId(user_id) for user_id in user_ids if ObjectId.is_valid(user_id)}
+    
+    users = {}
+    missing = []
+    for user_id in ids:
+        user = notification_user_cache.get(user_id)
+        if user is None:
+            missing.append(user_id)
+        else:
+            users[user_id] = user
+    
+    if missing:
+        cursor = get_users_collection().find({"_id": {"$in": missing}}, {"name": 1, "phone": 1})
+        async for user in cursor:
+            users[user["_id"]] = user
+            notification_user_cache.set(user["_id"], user, tag=user["_id"])
+    
+    return users
+
+
+async def resolve_appointment_users(
+    appointment: Dict[str, Any],
+    users: Optional[Dict[ObjectId, Dict[str, Any]]] = None
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """Return (patient, doctor) from a pre-resolved users map, or look them up"""
+    patient_id = ObjectId(appointment["patientId"])
+    doctor_id = ObjectId(appointment["doctorId"])
+    
+    if users is None:
+        users = await get_users_by_ids([patient_id, doctor_id])
     
-    # Get patient info
+    return users.get(patient_id), users.get(doctor_id)
+
+
+async def get_appointment_users(appointments: List[Dict[str, Any]]) -> Dict[ObjectId, Dict[str, Any]]:
+    """Resolve every patient and doctor needed to notify a batch of appointments"""
+    return await get_users_by_ids(
+        [apt["patientId"] for apt in appointments] + [apt["doctorId"] for apt in appointments]
+    )
+
+
+async def send_reminder_sms(
+    appointment: Dict[str, Any],
+    users: Optional[Dict[ObjectId, Dict[str, Any]]] = None
+) -> Dict[str, Any]:
+    """
+    Send reminder SMS to patient
+    
+    users can carry pre-resolved patient/doctor docs (see get_appointment_users).
+    Returns the send_sms result; success is False if the SMS wasn't sent.
+    """
     try:
-        patient = await users_collection.find_one({"_id": ObjectId(appointment["patientId"])})
-    except Exception:
-        print(f"❌ Invalid patient ID: {appointment['patientId']}")
-        return
+        patient, doctor = await resolve_appointment_users(appointment, users)
+    except Exception as e:
+        print(f"❌ Error fetching user data: {str(e)}")
+        return {"success": False, "error": f"Error fetching user data: {str(e)}"}
     
     if not patient:
         print(f"❌ Patient not found: {appointment['patientId']}")
-        return
-    
-    # Get doctor info
-    try:
-        doctor = await users_collection.find_one({"_id": ObjectId(appointment["doctorId"])})
-    except Exception:
-        print(f"❌ Invalid doctor ID: {appointment['doctorId']}")
-        return
+        return {"success": False, "error": "Patient not found"}
     
     if not doctor:
         print(f"❌ Doctor not found: {appointment['doctorId']}")
-        return
+        return {"success": False, "error": "Doctor not found"}
     
     # Format appointment time
     start_time = appointment["start"].strftime("%I:%M %p")
@@ -165,8 +241,8 @@ async def send_reminder_sms(appointment: Dict[str, Any]):
         appointment_id=appointment_id
     )
     
-    if result["success"]:
-        # Add log ID to appointment
+    if result["success"] and result["log_id"]:
+        # Add log ID to appointment (none if the log was dropped)
         from app.core.db import get_appointments_collection
         appointments_collection = get_appointments_collection()
         
@@ -174,19 +250,19 @@ async def send_reminder_sms(appointment: Dict[str, Any]):
             {"_id": appointment["_id"]},
             {"$push": {"twilioLogs": result["log_id"]}}
         )
+    
+    return result
 
 
-async def send_no_show_notification(appointment: Dict[str, Any]):
+async def send_no_show_notification(appointment: Dict[str, Any], users: Optional[Dict[ObjectId, Dict[str, Any]]] = None):
     """
     Send no-show notification to both patient and doctor
     Smart filtering: Only sends to real phone numbers (skips +1555* test numbers)
-    """
-    users_collection = get_users_collection()
     
-    # Get patient and doctor
+    users can carry pre-resolved patient/doctor docs (see get_appointment_users)
+    """
     try:
-        patient = await users_collection.find_one({"_id": ObjectId(appointment["patientId"])})
-        doctor = await users_collection.find_one({"_id": ObjectId(appointment["doctorId"])})
+        patient, doctor = await resolve_appointment_users(appointment, users)
     except Exception as e:
         print(f"❌ Error fetching user data: {str(e)}")
         return
@@ -209,32 +285,30 @@ async def send_no_show_notification(appointment: Dict[str, Any]):
         f"Appointment has been marked as no-show."
     )
     
-    # Send to both (will auto-skip test numbers)
-    await send_sms(
-        to=patient["phone"],
-        body=patient_body,
-        from_number=settings.TWILIO_FROM_PATIENT,
-        appointment_id=str(appointment["_id"])
-    )
-    
-    await send_sms(
-        to=doctor["phone"],
-        body=doctor_body,
-        from_number=settings.TWILIO_FROM_DOCTOR,
-        appointment_id=str(appointment["_id"])
+    # Send to both concurrently (will auto-skip test numbers)
+    await asyncio.gather(
+        send_sms(
+            to=patient["phone"],
+            body=patient_body,
+            from_number=settings.TWILIO_FROM_PATIENT,
+            appointment_id=str(appointment["_id"])
+        ),
+        send_sms(
+            to=doctor["phone"],
+            body=doctor_body,
+            from_number=settings.TWILIO_FROM_DOCTOR,
+            appointment_id=str(appointment["_id"])
+        )
     )
 
 
-async def send_confirmation_notification(appointment: Dict[str, Any]):
+async def send_confirmation_notification(appointment: Dict[str, Any], users: Optional[Dict[ObjectId, Dict[str, Any]]] = None):
     """
     Send confirmation notification to doctor
     Smart filtering: Only sends to real phone numbers (skips +1555* test numbers)
     """
-    users_collection = get_users_collection()
-    
     try:
-        patient = await users_collection.find_one({"_id": ObjectId(appointment["patientId"])})
-        doctor = await users_collection.find_one({"_id": ObjectId(appointment["doctorId"])})
+        patient, doctor = await resolve_appointment_users(appointment, users)
     except Exception as e:
         print(f"❌ Error fetching user data: {str(e)}")
         return
@@ -256,16 +330,13 @@ async def send_confirmation_notification(appointment: Dict[str, Any]):
     )
 
 
-async def send_cancellation_notification(appointment: Dict[str, Any]):
+async def send_cancellation_notification(appointment: Dict[str, Any], users: Optional[Dict[ObjectId, Dict[str, Any]]] = None):
     """
     Send cancellation notification to doctor
     Smart filtering: Only sends to real phone numbers (skips +1555* test numbers)
     """
-    users_collection = get_users_collection()
-    
     try:
-        patient = await users_collection.find_one({"_id": ObjectId(appointment["patientId"])})
-        doctor = await users_collection.find_one({"_id": ObjectId(appointment["doctorId"])})
+        patient, doctor = await resolve_appointment_users(appointment, users)
     except Exception as e:
         print(f"❌ Error fetching user data: {str(e)}")
         return
@@ -285,3 +356,35 @@ async def send_cancellation_notification(appointment: Dict[str, Any]):
         from_number=settings.TWILIO_FROM_DOCTOR,
         appointment_id=str(appointment["_id"])
     )
+
+
+async def send_status_notifications(appointments: List[Dict[str, Any]], new_status: str):
+    """
+    Send notifications for a batch of status transitions
+    Fans out with bounded concurrency so a large batch doesn't flood Twilio
+    """
+    if new_status == "confirmed":
+        notify = send_confirmation_notification
+    elif new_status == "cancelled":
+        notify = send_cancellation_notification
+    elif new_status == "no_show":
+        notify = send_no_show_notification
+    else:
+        return
+    
+    if not appointments:
+        return
+    
+    # Resolve all patients and doctors with one query
+    users = await get_appointment_users(appointments)
+    
+    semaphore = asyncio.Semaphore(settings.NOTIFICATION_CONCURRENCY)
+    
+    async def notify_one(appointment: Dict[str, Any]):
+        async with semaphore:
+            try:
+                await notify(appointment, users)
+            except Exception as e:
+                print(f"⚠️ Failed to send {new_status} notification for {appointment['_id']}: {str(e)}")
+    
+    await asyncio.gather(*(notify_one(apt) for apt in appointments))
@@ -0,0 +1,15 @@
+"""
+User cache shared by the notification senders and the user service
+
+Kept in its own module so user_service can invalidate entries on profile
+updates without importing the Twilio client.
+"""
+from app.config import settings
+from app.utils.cache import AsyncTTLCache
+
+
+# Patient/doctor name and phone for notifications, keyed and tagged by user ID
+notification_user_cache = AsyncTTLCache(
+    ttl_seconds=settings.NOTIFICATION_USER_CACHE_SECONDS,
+    max_entries=settings.NOTIFICATION_USER_CACHE_MAX_ENTRIES
+)
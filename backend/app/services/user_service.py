@@ -3,6 +3,7 @@ from app.core.db import get_users_collection
 from app.core.security import hash_password, verify_password
 from app.core.jwt import create_access_token, create_refresh_token, decode_token, verify_token_type
 from app.models.user_model import UserModel
+from app.services.user_cache import notification_user_cache
 from bson import ObjectId
 from datetime import datetime
 from typing import Dict, Any
@@ -210,6 +211,9 @@ async def update_user(user_id: str, update_data: Dict[str, Any]) -> Dict[str, An
         return_document=ReturnDocument.AFTER
     )
     
+    # Notifications must pick up a new name or phone right away
+    notification_user_cache.invalidate(ObjectId(user_id))
+    
     if not result:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
@@ -0,0 +1,294 @@
+"""
+Utilization service: booked slots / offered slots per doctor over a date range
+
+Offered capacity is computed as (doctors x days) arrays from each doctor's
+weekly schedule, explicit slots and schedule exceptions, without generating
+individual slot dicts. Booked counts come from the stats rollup (or a single
+aggregation) and are scattered into a matching array.
+"""
+from fastapi import HTTPException, status
+from app.core.db import get_users_collection, get_appointments_collection, get_doctor_stats_daily_collection
+from app.config import settings
+from app.utils.availability import parse_time
+from datetime import date, datetime, timedelta
+from bson import ObjectId
+from typing import Dict, Any, List, Optional, Tuple
+import numpy as np
+
+
+MAX_REPORT_DAYS = 731
+
+
+def weekly_windows(doctor_profile: Dict[str, Any]) -> List[Tuple[int, int, int]]:
+    """(weekday, start minute, end minute) spans covered by full weekly slots"""
+    windows = []
+    slot_duration = doctor_profile.get("slotDurationMin", 30)
+    
+    for schedule in doctor_profile.get("weeklySchedule") or []:
+        start_hour, start_min = parse_time(schedule["start"])
+        end_hour, end_min = parse_time(schedule["end"])
+        start = start_hour * 60 + start_min
+        minutes = (end_hour * 60 + end_min) - start
+        
+        # Only full slots fit, matching generate_slots_for_day
+        if minutes > 0:
+            windows.append((schedule["weekday"], start, start + minutes // slot_duration * slot_duration))
+    
+    return windows
+
+
+def weekly_capacity(doctor_profile: Dict[str, Any]) -> np.ndarray:
+    """Offered slots per weekday (0=Monday) from the weekly schedule"""
+    capacity = np.zeros(7, dtype=np.int64)
+    slot_duration = doctor_profile.get("slotDurationMin", 30)
+    
+    for weekday, start, end in weekly_windows(doctor_profile):
+        capacity[weekday] += (end - start) // slot_duration
+    
+    return capacity
+
+
+def extra_explicit_slots(doctor_profile: Dict[str, Any]) -> List[datetime]:
+    """
+    Explicit slots that add capacity beyond the weekly schedule
+    
+    Duplicates count once, and slots overlapping weekly hours on a day the
+    weekly schedule applies (not an exception) are already counted there
+    """
+    slot_duration = doctor_profile.get("slotDurationMin", 30)
+    windows = weekly_windows(doctor_profile)
+    exception_days = {dt.date() for dt in doctor_profile.get("scheduleExceptions") or []}
+    
+    seen = set()
+    extra = []
+    for slot in doctor_profile.get("explicitSlots") or []:
+        start = slot.replace(second=0, microsecond=0)
+        if start in seen:
+            continue
+        seen.add(start)
+        
+        minute = start.hour * 60 + start.minute
+        if start.date() not in exception_days and any(
+            weekday == start.weekday() and minute < end and minute + slot_duration > begin
+            for weekday, begin, end in windows
+        ):
+            continue
+        extra.append(start)
+    
+    return extra
+
+
+def _scatter_indices(
+    dates_per_profile: List[List[datetime]],
+    start_date: date,
+    n_days: int
+) -> Tuple[np.ndarray, np.ndarray]:
+    """(row, day index) pairs for per-profile datetime lists, clipped to the range"""
+    rows = []
+    ordinals = []
+    for row, dates in enumerate(dates_per_profile):
+        for dt in dates:
+            rows.append(row)
+            ordinals.append(dt.toordinal())
+    
+    rows = np.asarray(rows, dtype=np.int64)
+    days = np.asarray(ordinals, dtype=np.int64) - start_date.toordinal()
+    in_range = (days >= 0) & (days < n_days)
+    return rows[in_range], days[in_range]
+
+
+def compute_offered_capacity(
+    profiles: List[Dict[str, Any]],
+    start_date: date,
+    n_days: int
+) -> np.ndarray:
+    """
+    Offered slots as a (doctors x days) matrix
+    
+    - Weekly schedule: per-weekday capacity indexed by each day's weekday
+    - Schedule exceptions: zero the weekly capacity on those days
+    - Explicit slots: add one slot each on their day, unless already
+      offered by the weekly schedule (see extra_explicit_slots)
+    """
+    weekly = np.zeros((len(profiles), 7), dtype=np.int64)
+    for row, profile in enumerate(profiles):
+        weekly[row] = weekly_capacity(profile)
+    
+    weekdays = (start_date.weekday() + np.arange(n_days)) % 7
+    offered = weekly[:, weekdays]
+    
+    exception_rows, exception_days = _scatter_indices(
+        [profile.get("scheduleExceptions") or [] for profile in profiles],
+        start_date,
+        n_days
+    )
+    offered[exception_rows, exception_days] = 0
+    
+    explicit_rows, explicit_days = _scatter_indices(
+        [extra_explicit_slots(profile) for profile in profiles],
+        start_date,
+        n_days
+    )
+    np.add.at(offered, (explicit_rows, explicit_days), 1)
+    
+    return offered
+
+
+def group_columns(
+    matrix: np.ndarray,
+    start_date: date,
+    group_by: str
+) -> Tuple[np.ndarray, List[str]]:
+    """Sum day columns into periods; returns (grouped matrix, period labels)"""
+    n_days = matrix.shape[1]
+    
+    if group_by == "day":
+        labels = [(start_date + timedelta(days=i)).isoformat() for i in range(n_days)]
+        return matrix, labels
+    
+    # Weeks start on Monday; the first period may be partial
+    day_index = np.arange(n_days)
+    week_starts = day_index[(start_date.weekday() + day_index) % 7 == 0]
+    if week_starts.size == 0 or week_starts[0] != 0:
+        week_starts = np.concatenate(([0], week_starts))
+    
+    labels = []
+    for offset in week_starts:
+        year, week, _ = (start_date + timedelta(days=int(offset))).isocalendar()
+        labels.append(f"{year}-W{week:02d}")
+    
+    return np.add.reduceat(matrix, week_starts, axis=1), labels
+
+
+async def _booked_counts(
+    doctor_ids: List[ObjectId],
+    start_date: date,
+    end_date: date
+) -> List[Dict[str, Any]]:
+    """Booked (non-cancelled) appointments per doctor per day"""
+    if settings.STATS_USE_ROLLUP:
+        cursor = get_doctor_stats_daily_collection().find(
+            {
+                "doctorId": {"$in": doctor_ids},
+                "day": {"$gte": start_date.isoformat(), "$lt": end_date.isoformat()}
+            },
+            {"_id": 0, "doctorId": 1, "day": 1, "total": 1, "cancelled": 1}
+        )
+        return [
+            {"doctorId": row["doctorId"], "day": row["day"], "booked": row["total"] - row.get("cancelled", 0)}
+            async for row in cursor
+        ]
+    
+    pipeline = [
+        {
+            "$match": {
+                "doctorId": {"$in": doctor_ids},
+                "start": {
+                    "$gte": datetime.combine(start_date, datetime.min.time()),
+                    "$lt": datetime.combine(end_date, datetime.min.time())
+                },
+                "status": {"$ne": "cancelled"}
+            }
+        },
+        {
+            "$group": {
+                "_id": {
+                    "doctorId": "$doctorId",
+                    "day": {"$dateToString": {"format": "%Y-%m-%d", "date": "$start"}}
+                },
+                "booked": {"$sum": 1}
+            }
+        },
+        {"$project": {"_id": 0, "doctorId": "$_id.doctorId", "day": "$_id.day", "booked": 1}}
+    ]
+    cursor = get_appointments_collection().aggregate(pipeline, maxTimeMS=settings.STATS_MAX_TIME_MS)
+    return await cursor.to_list(length=None)
+
+
+async def get_utilization_report(
+    start_date: date,
+    end_date: date,
+    group_by: str = "day",
+    doctor_ids: Optional[List[str]] = None
+) -> Dict[str, Any]:
+    """
+    Build the booked / offered utilization report for [start_date, end_date)
+    
+    Returns one row per doctor with per-period offered, booked and
+    utilization arrays (utilization is None where nothing was offered)
+    """
+    if group_by not in ["day", "week"]:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Invalid groupBy parameter. Use 'day' or 'week'"
+        )
+    
+    n_days = (end_date - start_date).days
+    if n_days <= 0 or n_days > MAX_REPORT_DAYS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Date range must cover 1 to {MAX_REPORT_DAYS} days"
+        )
+    
+    query = {"role": "doctor"}
+    if doctor_ids:
+        try:
+            query["_id"] = {"$in": [ObjectId(doctor_id) for doctor_id in doctor_ids]}
+        except Exception:
+            raise HTTPException(
+                status_code=status.HTTP_400_BAD_REQUEST,
+                detail="Invalid doctor ID"
+            )
+    
+    doctors = await get_users_collection().find(
+        query,
+        {"name": 1, "doctorProfile": 1}
+    ).sort("name", 1).to_list(length=None)
+    
+    profiles = [doctor.get("doctorProfile") or {} for doctor in doctors]
+    offered = compute_offered_capacity(profiles, start_date, n_days)
+    
+    # Scatter booked counts into the same (doctors x days) shape
+    booked = np.zeros_like(offered)
+    row_of = {doctor["_id"]: row for row, doctor in enumerate(doctors)}
+    counts = await _booked_counts(list(row_of.keys()), start_date, end_date)
+    if counts:
+        rows = np.fromiter((row_of[c["doctorId"]] for c in counts), dtype=np.int64, count=len(counts))
+        days = np.fromiter(
+            (date.fromisoformat(c["day"]).toordinal() for c in counts),
+            dtype=np.int64,
+            count=len(counts)
+        ) - start_date.toordinal()
+        np.add.at(booked, (rows, days), np.fromiter((c["booked"] for c in counts), dtype=np.int64, count=len(counts)))
+    
+    offered, periods = group_columns(offered, start_date, group_by)
+    booked, _ = group_columns(booked, start_date, group_by)
+    
+    utilization = np.round(
+        np.divide(booked, offered, out=np.full(offered.shape, np.nan), where=offered > 0),
+        4
+    )
+    total_offered = offered.sum(axis=1)
+    total_booked = booked.sum(axis=1)
+    
+    report = []
+    for row, doctor in enumerate(doctors):
+        report.append({
+            "doctorId": str(doctor["_id"]),
+            "doctorName": doctor["name"],
+            "specialization": profiles[row].get("specialization"),
+            "offered": offered[row].tolist(),
+            "booked": booked[row].tolist(),
+            "utilization": [None if np.isnan(u) else u for u in utilization[row].tolist()],
+            "totalOffered": int(total_offered[row]),
+            "totalBooked": int(total_booked[row]),
+            "overallUtilization": round(float(total_booked[row] / total_offered[row]), 4) if total_offered[row] else None
+        })
+    
+    return {
+        "startDate": start_date,
+        "endDate": end_date,
+        "groupBy": group_by,
+        "periods": periods,
+        "doctors": report
+    }
@@ -19,6 +19,15 @@ async def test_db():
     client.close()
 
 
+@pytest_asyncio.fixture(autouse=True)
+async def close_twilio_log_writer():
+    """Stop the shared SMS log writer after each test so its flusher task never outlives the event loop"""
+    yield
+    
+    from app.services.twilio_service import twilio_log_writer
+    await twilio_log_writer.close()
+
+
 @pytest.fixture
 def sample_user_data():
     """Sample user data for testing"""
@@ -242,3 +242,128 @@ async def test_get_doctor_slots(test_db, test_client):
         assert "start" in slot
         assert "end" in slot
         assert "available" in slot
+
+
+@pytest.mark.asyncio
+async def test_bulk_status_update(test_db, test_client):
+    """Test doctor marks several appointments completed in one request"""
+    from app.core.security import hash_password
+    from app.models import initialize_indexes
+    from bson import ObjectId
+    
+    await initialize_indexes(test_db)
+    
+    # Create doctor
+    users_collection = test_db["users"]
+    doctor_data = {
+        "role": "doctor",
+        "name": "Dr. Bulk",
+        "email": "dr.bulk@test.com",
+        "phone": "+1234567820",
+        "passwordHash": hash_password("password123"),
+        "createdAt": datetime.utcnow(),
+        "doctorProfile": {
+            "specialization": "Cardiology",
+            "slotDurationMin": 30,
+            "weeklySchedule": []
+        }
+    }
+    doctor_result = await users_collection.insert_one(doctor_data)
+    doctor_id = doctor_result.inserted_id
+    
+    login_response = await test_client.post(
+        "/api/v1/auth/doctor/login",
+        json={"email": "dr.bulk@test.com", "password": "password123"}
+    )
+    headers = {"Authorization": f"Bearer {login_response.json()['access_token']}"}
+    
+    # Two appointments for this doctor, one for another doctor
+    appointments_collection = test_db["appointments"]
+    base = datetime.utcnow().replace(minute=0, second=0, microsecond=0) - timedelta(hours=3)
+    own_ids = []
+    for i in range(2):
+        result = await appointments_collection.insert_one({
+            "doctorId": doctor_id,
+            "patientId": ObjectId(),
+            "start": base + timedelta(minutes=30 * i),
+            "end": base + timedelta(minutes=30 * (i + 1)),
+            "status": "confirmed",
+            "reason": "Session",
+            "createdAt": datetime.utcnow(),
+            "createdBy": "patient",
+            "reminder3hSent": True,
+            "twilioLogs": []
+        })
+        own_ids.append(str(result.inserted_id))
+    
+    other = await appointments_collection.insert_one({
+        "doctorId": ObjectId(),
+        "patientId": ObjectId(),
+        "start": base,
+        "end": base + timedelta(minutes=30),
+        "status": "confirmed",
+        "reason": "Session",
+        "createdAt": datetime.utcnow(),
+        "createdBy": "patient",
+        "reminder3hSent": True,
+        "twilioLogs": []
+    })
+    other_id = str(other.inserted_id)
+    
+    response = await test_client.patch(
+        "/api/v1/appointments/status/bulk",
+        # Uppercase hex is the same appointment, not an extra "not found"
+        json={"appointmentIds": [own_ids[0], own_ids[1].upper(), other_id, "invalid"], "status": "completed"},
+        headers=headers
+    )
+    
+    assert response.status_code == 200
+    data = response.json()
+    assert data["updated"] == 2
+    assert len(data["results"]) == 4
+    results = {r["appointmentId"]: r for r in data["results"]}
+    assert all(results[apt_id]["success"] for apt_id in own_ids)
+    assert results[other_id]["success"] is False
+    assert results["invalid"]["success"] is False
+    
+    # Read-back bookkeeping doesn't stay on the documents
+    async for apt in appointments_collection.find({"_id": {"$in": [ObjectId(apt_id) for apt_id in own_ids]}}):
+        assert apt["status"] == "completed"
+        assert "statusBatchId" not in apt
+        assert "previousStatus" not in apt
+    
+    # Other doctor's appointment is untouched
+    untouched = await appointments_collection.find_one({"_id": ObjectId(other_id)})
+    assert untouched["status"] == "confirmed"
+    
+    # Finished appointments are never overwritten or re-notified by a bulk update
+    finished_ids = {}
+    for finished_status in ["cancelled", "no_show"]:
+        result = await appointments_collection.insert_one({
+            "doctorId": doctor_id,
+            "patientId": ObjectId(),
+            "start": base - timedelta(days=1),
+            "end": base - timedelta(days=1) + timedelta(minutes=30),
+            "status": finished_status,
+            "reason": "Session",
+            "createdAt": datetime.utcnow(),
+            "createdBy": "patient",
+            "twilioLogs": []
+        })
+        finished_ids[finished_status] = str(result.inserted_id)
+    
+    for new_status, apt_ids in [("completed", list(finished_ids.values())), ("cancelled", [finished_ids["cancelled"]])]:
+        response = await test_client.patch(
+            "/api/v1/appointments/status/bulk",
+            json={"appointmentIds": apt_ids, "status": new_status},
+            headers=headers
+        )
+        
+        assert response.status_code == 200
+        assert response.json()["updated"] == 0
+        assert not any(r["success"] for r in response.json()["results"])
+    
+    for finished_status, apt_id in finished_ids.items():
+        apt = await appointments_collection.find_one({"_id": ObjectId(apt_id)})
+        assert apt["status"] == finished_status
+        assert "statusBatchId" not in apt
@@ -69,6 +69,10 @@ async def test_get_doctor_stats(test_db, test_client):
         }
         await appointments_collection.insert_one(apt_doc)
     
+    # Backfill the stats rollup for directly inserted appointments
+    from app.services.stats_service import rebuild_doctor_stats
+    await rebuild_doctor_stats()
+    
     # Get stats
     response = await test_client.get(f"/api/v1/appointments/stats/doctor/{doctor_id}?groupBy=month&limit=10")
     
@@ -85,6 +89,61 @@ async def test_get_doctor_stats(test_db, test_client):
     assert "completed" in first_stat
 
 
+@pytest.mark.asyncio
+async def test_doctor_stats_rollup_incremental(test_db, test_client):
+    """Test rollup counters follow inserts and status transitions"""
+    from bson import ObjectId
+    from app.services.stats_service import (
+        record_appointment_created,
+        record_status_transition,
+        get_rollup_doctor_stats,
+        rebuild_doctor_stats
+    )
+    
+    doctor_id = ObjectId()
+    appointments_collection = test_db["appointments"]
+    base_date = datetime(2025, 11, 3, 10, 0)
+    
+    appointments = []
+    for i in range(3):
+        apt_doc = {
+            "doctorId": doctor_id,
+            "patientId": ObjectId(),
+            "start": base_date + timedelta(minutes=30 * i),
+            "end": base_date + timedelta(minutes=30 * (i + 1)),
+            "status": "scheduled",
+            "reason": "Test",
+        }
+        await appointments_collection.insert_one(apt_doc)
+        await record_appointment_created(apt_doc)
+        appointments.append(apt_doc)
+    
+    # Move one appointment through confirmed -> completed, cancel another
+    await appointments_collection.update_one({"_id": appointments[0]["_id"]}, {"$set": {"status": "completed"}})
+    await record_status_transition(appointments[0], "scheduled", "confirmed")
+    await record_status_transition(appointments[0], "confirmed", "completed")
+    await appointments_collection.update_one({"_id": appointments[1]["_id"]}, {"$set": {"status": "cancelled"}})
+    await record_status_transition(appointments[1], "scheduled", "cancelled")
+    
+    stats = await get_rollup_doctor_stats(str(doctor_id), group_by="day", limit=10)
+    
+    assert stats["totalAppointments"] == 3
+    assert stats["stats"] == [{
+        "period": "2025-11-03",
+        "count": 3,
+        "scheduled": 1,
+        "confirmed": 0,
+        "completed": 1,
+        "cancelled": 1,
+        "no_show": 0
+    }]
+    
+    # A full rebuild produces the same counters
+    await rebuild_doctor_stats(str(doctor_id))
+    rebuilt = await get_rollup_doctor_stats(str(doctor_id), group_by="day", limit=10)
+    assert rebuilt == stats
+
+
 @pytest.mark.asyncio
 async def test_get_server_time(test_client):
     """Test server time endpoint"""
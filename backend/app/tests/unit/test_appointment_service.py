@@ -0,0 +1,59 @@
+import pytest
+from fastapi import HTTPException
+from bson import ObjectId
+from app.services.appointment_service import build_transition_filter, BULK_STATUS_TRANSITIONS
+
+
+class TestTransitionFilter:
+    """Test the guarded status transition filter"""
+    
+    def test_confirm_requires_scheduled_and_patient_owner(self):
+        """Test confirm filter encodes owner and allowed current status"""
+        appointment_id = str(ObjectId())
+        user_id = str(ObjectId())
+        
+        query = build_transition_filter(appointment_id, "confirmed", user_id, "patient")
+        
+        assert query["_id"] == ObjectId(appointment_id)
+        assert query["patientId"] == ObjectId(user_id)
+        assert "doctorId" not in query
+        assert query["status"] == {"$in": ["scheduled"]}
+    
+    def test_cancel_excludes_completed_and_no_show(self):
+        """Test cancel filter never matches completed or no-show appointments"""
+        query = build_transition_filter(str(ObjectId()), "cancelled", str(ObjectId()), "patient")
+        
+        assert "completed" not in query["status"]["$in"]
+        assert "no_show" not in query["status"]["$in"]
+    
+    def test_complete_matches_doctor_owner(self):
+        """Test complete filter is scoped to the doctor"""
+        user_id = str(ObjectId())
+        
+        query = build_transition_filter(str(ObjectId()), "completed", user_id, "doctor")
+        
+        assert query["doctorId"] == ObjectId(user_id)
+        assert "status" not in query
+    
+    def test_bulk_complete_only_from_active_statuses(self):
+        """Test bulk complete never overwrites cancelled or no-show appointments"""
+        query = build_transition_filter(
+            str(ObjectId()), "completed", str(ObjectId()), "doctor", transitions=BULK_STATUS_TRANSITIONS
+        )
+        
+        assert query["status"] == {"$in": ["scheduled", "confirmed"]}
+    
+    def test_bulk_cancel_skips_already_cancelled(self):
+        """Test bulk cancel doesn't match (and re-notify) cancelled appointments"""
+        query = build_transition_filter(
+            str(ObjectId()), "cancelled", str(ObjectId()), "doctor", transitions=BULK_STATUS_TRANSITIONS
+        )
+        
+        assert query["status"] == {"$in": ["scheduled", "confirmed"]}
+    
+    def test_invalid_appointment_id(self):
+        """Test invalid appointment ID is rejected before querying"""
+        with pytest.raises(HTTPException) as exc_info:
+            build_transition_filter("not-an-id", "confirmed", str(ObjectId()), "patient")
+        
+        assert exc_info.value.status_code == 400
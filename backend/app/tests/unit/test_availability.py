@@ -4,7 +4,8 @@ from app.utils.availability import (
     is_slot_aligned,
     is_within_weekly_schedule,
     validate_appointment_slot,
-    generate_slots_for_day
+    generate_slots_for_day,
+    is_schedule_exception
 )
 from datetime import datetime, timedelta
 
@@ -113,3 +114,27 @@ class TestAvailabilityUtils:
         tuesday = datetime(2025, 11, 18, 0, 0)
         slots_tuesday = generate_slots_for_day(tuesday, doctor_profile)
         assert len(slots_tuesday) == 0
+    
+    def test_schedule_exceptions(self):
+        """Test weekly schedule is skipped on exception dates"""
+        doctor_profile = {
+            "slotDurationMin": 30,
+            "weeklySchedule": [
+                {"weekday": 0, "start": "09:00", "end": "11:00"}
+            ],
+            "scheduleExceptions": [datetime(2025, 11, 17)],
+            "explicitSlots": [datetime(2025, 11, 17, 14, 0)]
+        }
+        now = datetime(2025, 11, 10, 8, 0)
+        
+        assert is_schedule_exception(datetime(2025, 11, 17, 9, 0), doctor_profile["scheduleExceptions"]) is True
+        assert is_schedule_exception(datetime(2025, 11, 24, 9, 0), doctor_profile["scheduleExceptions"]) is False
+        
+        # No weekly slots on the exception day
+        assert generate_slots_for_day(datetime(2025, 11, 17), doctor_profile) == []
+        is_valid, _ = validate_appointment_slot(datetime(2025, 11, 17, 9, 0), doctor_profile, now)
+        assert is_valid is False
+        
+        # Explicit slots still apply
+        is_valid, _ = validate_appointment_slot(datetime(2025, 11, 17, 14, 0), doctor_profile, now)
+        assert is_valid is True
@@ -0,0 +1,86 @@
+import asyncio
+import pytest
+import pytest_asyncio
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+from app.utils.bulk_writer import BufferedInsertWriter
+
+
+class FakeCollection:
+    """Records insert_many batches; can reject the first document of each batch"""
+    
+    def __init__(self, reject_first: bool = False):
+        self.batches = []
+        self.reject_first = reject_first
+    
+    async def insert_many(self, documents, ordered=True):
+        assert ordered is False
+        self.batches.append(list(documents))
+        if self.reject_first:
+            raise BulkWriteError({"nInserted": len(documents) - 1, "writeErrors": [{"index": 0}]})
+        return type("Result", (), {"inserted_ids": [doc["_id"] for doc in documents]})()
+
+
+@pytest_asyncio.fixture
+async def make_writer():
+    """Build writers that are always closed, so no periodic flusher outlives the test"""
+    writers = []
+    
+    def make(collection, **kwargs):
+        writer = BufferedInsertWriter(lambda: collection, **kwargs)
+        writers.append(writer)
+        return writer
+    
+    yield make
+    
+    for writer in writers:
+        await writer.close()
+
+
+class TestBufferedInsertWriter:
+    """Test batching, flushing and loss accounting"""
+    
+    @pytest.mark.asyncio
+    async def test_ids_assigned_and_flushed_on_size(self, make_writer):
+        """Test IDs are returned immediately and a full batch is written in one insert_many"""
+        collection = FakeCollection()
+        writer = make_writer(collection, batch_size=3, flush_interval_seconds=60, max_buffer=100)
+        
+        ids = [writer.add({"n": i}) for i in range(3)]
+        assert all(isinstance(doc_id, ObjectId) for doc_id in ids)
+        
+        await asyncio.sleep(0)
+        assert [[doc["_id"] for doc in batch] for batch in collection.batches] == [ids]
+        
+        await writer.close()
+        assert writer.stats()["written"] == 3
+    
+    @pytest.mark.asyncio
+    async def test_flushed_on_interval_and_close(self, make_writer):
+        """Test partial batches are written by the timer and on close"""
+        collection = FakeCollection()
+        writer = make_writer(collection, batch_size=100, flush_interval_seconds=0.05, max_buffer=100)
+        
+        writer.add({"n": 1})
+        await asyncio.sleep(0.1)
+        assert len(collection.batches) == 1
+        
+        writer.add({"n": 2})
+        await writer.close()
+        assert len(collection.batches) == 2
+        assert writer.stats()["buffered"] == 0
+    
+    @pytest.mark.asyncio
+    async def test_dropped_and_failed_counted(self, make_writer):
+        """Test overflow is dropped and rejected documents are counted as failed"""
+        collection = FakeCollection(reject_first=True)
+        writer = make_writer(collection, batch_size=10, flush_interval_seconds=60, max_buffer=2)
+        
+        ids = [writer.add({"n": i}) for i in range(3)]
+        assert ids[2] is None
+        await writer.close()
+        
+        stats = writer.stats()
+        assert stats["dropped"] == 1
+        assert stats["failed"] == 1
+        assert stats["written"] == 1
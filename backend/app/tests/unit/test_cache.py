@@ -0,0 +1,134 @@
+import asyncio
+import pytest
+from app.utils.cache import AsyncTTLCache
+
+
+@pytest.mark.asyncio
+async def test_cache_hit_and_ttl_expiry():
+    """Test values are cached until the TTL expires"""
+    cache = AsyncTTLCache(ttl_seconds=0.05)
+    calls = []
+    
+    async def compute():
+        calls.append(1)
+        return len(calls)
+    
+    assert await cache.get_or_compute("k", compute) == 1
+    assert await cache.get_or_compute("k", compute) == 1
+    
+    await asyncio.sleep(0.06)
+    assert await cache.get_or_compute("k", compute) == 2
+    
+    stats = cache.stats()
+    assert stats["hits"] == 1
+    assert stats["misses"] == 2
+    assert stats["expirations"] == 1
+
+
+@pytest.mark.asyncio
+async def test_single_flight_coalesces_concurrent_misses():
+    """Test concurrent identical requests share one computation"""
+    cache = AsyncTTLCache(ttl_seconds=60)
+    calls = []
+    
+    async def compute():
+        calls.append(1)
+        await asyncio.sleep(0.01)
+        return "stats"
+    
+    results = await asyncio.gather(*(cache.get_or_compute("k", compute) for _ in range(10)))
+    
+    assert results == ["stats"] * 10
+    assert len(calls) == 1
+    assert cache.stats()["coalesced"] == 9
+
+
+@pytest.mark.asyncio
+async def test_invalidate_during_computation_skips_store():
+    """Test a write mid-computation keeps the stale result out of the cache"""
+    cache = AsyncTTLCache(ttl_seconds=60)
+    
+    async def compute():
+        await asyncio.sleep(0.01)
+        return "stale"
+    
+    task = asyncio.create_task(cache.get_or_compute("k", compute, tag="doctor1"))
+    await asyncio.sleep(0)
+    cache.invalidate("doctor1")
+    
+    assert await task == "stale"
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_invalidate_only_drops_tagged_entries():
+    """Test invalidation is scoped to one tag"""
+    cache = AsyncTTLCache(ttl_seconds=60)
+    
+    async def compute():
+        return "value"
+    
+    await cache.get_or_compute(("doctor1", "month"), compute, tag="doctor1")
+    await cache.get_or_compute(("doctor2", "month"), compute, tag="doctor2")
+    
+    cache.invalidate("doctor1")
+    
+    assert cache.stats()["size"] == 1
+    await cache.get_or_compute(("doctor2", "month"), compute, tag="doctor2")
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.asyncio
+async def test_errors_propagate_and_are_not_cached():
+    """Test failures reach every waiter and aren't cached"""
+    cache = AsyncTTLCache(ttl_seconds=60)
+    
+    async def compute():
+        await asyncio.sleep(0.01)
+        raise ValueError("boom")
+    
+    results = await asyncio.gather(
+        *(cache.get_or_compute("k", compute) for _ in range(3)),
+        return_exceptions=True
+    )
+    
+    assert all(isinstance(r, ValueError) for r in results)
+    assert cache.stats()["size"] == 0
+
+
+@pytest.mark.asyncio
+async def test_lru_eviction():
+    """Test least recently used entries are evicted beyond capacity"""
+    cache = AsyncTTLCache(ttl_seconds=60, max_entries=2)
+    
+    async def compute():
+        return "value"
+    
+    for key in ["a", "b", "c"]:
+        await cache.get_or_compute(key, compute)
+    
+    assert cache.stats()["size"] == 2
+    assert cache.stats()["evictions"] == 1
+
+
+@pytest.mark.asyncio
+async def test_generations_only_kept_while_loading():
+    """Test invalidating many tags doesn't grow per-tag state"""
+    cache = AsyncTTLCache(ttl_seconds=60)
+    
+    async def compute():
+        await asyncio.sleep(0.01)
+        return "value"
+    
+    for i in range(100):
+        cache.invalidate(f"doctor{i}")
+    assert cache._generations == {}
+    
+    task = asyncio.create_task(cache.get_or_compute("k", compute, tag="doctor1"))
+    await asyncio.sleep(0)
+    cache.invalidate("doctor1")
+    assert cache._generations == {"doctor1": 1}
+    
+    await task
+    assert cache._generations == {}
+    assert cache._loading == {}
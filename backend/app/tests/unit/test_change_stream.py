@@ -0,0 +1,80 @@
+import pytest
+from datetime import datetime
+from bson import ObjectId
+from app.services import change_stream_service
+from app.services.change_stream_service import to_event, publish
+
+
+class TestToEvent:
+    """Test change stream documents become appointment events"""
+    
+    def test_insert(self):
+        """Test an insert becomes a created event with string IDs"""
+        appointment_id, doctor_id, patient_id = ObjectId(), ObjectId(), ObjectId()
+        start = datetime(2025, 11, 20, 10, 0)
+        
+        event = to_event({
+            "operationType": "insert",
+            "documentKey": {"_id": appointment_id},
+            "fullDocument": {"doctorId": doctor_id, "patientId": patient_id, "status": "scheduled", "start": start}
+        })
+        
+        assert event == {
+            "type": "created",
+            "appointmentId": str(appointment_id),
+            "doctorId": str(doctor_id),
+            "patientId": str(patient_id),
+            "status": "scheduled",
+            "start": start
+        }
+    
+    def test_status_update_without_full_document(self):
+        """Test a status change whose document was deleted before the lookup"""
+        event = to_event({
+            "operationType": "update",
+            "documentKey": {"_id": ObjectId()},
+            "fullDocument": None
+        })
+        
+        assert event["type"] == "status_changed"
+        assert event["doctorId"] is None
+    
+    def test_other_operations_ignored(self):
+        """Test deletes and replaces produce no event"""
+        assert to_event({"operationType": "delete", "documentKey": {"_id": ObjectId()}}) is None
+
+
+@pytest.mark.asyncio
+async def test_publish_isolates_failing_subscribers(monkeypatch):
+    """Test one failing subscriber doesn't stop delivery to the others"""
+    received = []
+    
+    async def failing(event):
+        raise RuntimeError("boom")
+    
+    async def recording(event):
+        received.append(event)
+    
+    monkeypatch.setattr(change_stream_service, "subscribers", [failing, recording])
+    
+    await publish({"type": "created", "doctorId": None})
+    
+    assert received == [{"type": "created", "doctorId": None}]
+
+
+@pytest.mark.asyncio
+async def test_stats_cache_invalidated_on_event():
+    """Test the doctor stats cache subscribes to appointment events"""
+    from app.services.stats_service import doctor_stats_cache, invalidate_doctor_stats
+    
+    assert invalidate_doctor_stats in change_stream_service.subscribers
+    
+    doctor_id = str(ObjectId())
+    
+    async def compute():
+        return {"total": 1}
+    
+    await doctor_stats_cache.get_or_compute((doctor_id, "month"), compute, tag=doctor_id)
+    await invalidate_doctor_stats({"type": "status_changed", "doctorId": doctor_id})
+    
+    assert (doctor_id, "month") not in doctor_stats_cache._entries
@@ -0,0 +1,40 @@
+import pytest
+from datetime import datetime, timedelta
+from app.utils.clock import VirtualClock, SystemClock, get_clock, set_clock
+
+
+class TestVirtualClock:
+    """Test the injectable virtual clock"""
+    
+    @pytest.mark.asyncio
+    async def test_sleep_advances_time(self):
+        """Test sleeping moves virtual time forward without waiting"""
+        start = datetime(2025, 11, 20, 9, 0)
+        clock = VirtualClock(start)
+        
+        await clock.sleep(90)
+        
+        assert clock.utcnow() == start + timedelta(seconds=90)
+        assert clock.monotonic() == 90
+    
+    def test_advance_to_never_goes_back(self):
+        """Test advance_to ignores moments in the past"""
+        start = datetime(2025, 11, 20, 9, 0)
+        clock = VirtualClock(start)
+        
+        clock.advance_to(start + timedelta(minutes=5))
+        clock.advance_to(start)
+        
+        assert clock.utcnow() == start + timedelta(minutes=5)
+    
+    def test_set_clock(self):
+        """Test the active clock can be swapped and restored"""
+        clock = VirtualClock(datetime(2025, 11, 20, 9, 0))
+        
+        set_clock(clock)
+        try:
+            assert get_clock().utcnow() == datetime(2025, 11, 20, 9, 0)
+        finally:
+            set_clock(SystemClock())
+        
+        assert isinstance(get_clock(), SystemClock)
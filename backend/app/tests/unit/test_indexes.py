@@ -57,6 +57,10 @@ async def test_appointment_indexes_created(db_with_indexes):
     
     # Check no-show detection index exists
     assert "no_show_detection" in indexes
+    
+    # Check ESR listing indexes exist
+    assert "patient_status_start" in indexes
+    assert "doctor_status_start" in indexes
 
 
 @pytest.mark.asyncio
@@ -155,3 +159,61 @@ async def test_user_email_uniqueness(db_with_indexes):
         await users_collection.insert_one(user2_data)
     
     assert "duplicate key error" in str(exc_info.value).lower() or "E11000" in str(exc_info.value)
+
+
+def _plan_stages(plan):
+    """Collect all stage names from an explain() winning plan"""
+    stages = [plan.get("stage")]
+    if "inputStage" in plan:
+        stages.extend(_plan_stages(plan["inputStage"]))
+    for child in plan.get("inputStages", []):
+        stages.extend(_plan_stages(child))
+    return stages
+
+
+@pytest.mark.asyncio
+async def test_appointment_listing_filters_use_index(db_with_indexes):
+    """Test that every supported listing filter combination is an index scan"""
+    from datetime import datetime, timedelta
+    from bson import ObjectId
+    from app.services.appointment_service import build_appointments_query
+    
+    appointments_collection = db_with_indexes["appointments"]
+    doctor_id = ObjectId()
+    patient_id = ObjectId()
+    now = datetime(2025, 11, 15, 12, 0)
+    
+    docs = []
+    for i, apt_status in enumerate(["scheduled", "confirmed", "completed", "cancelled", "no_show"] * 4):
+        start = now + timedelta(days=i - 10)
+        docs.append({
+            "doctorId": doctor_id,
+            "patientId": patient_id,
+            "start": start,
+            "end": start + timedelta(minutes=30),
+            "status": apt_status,
+            "reason": "Checkup",
+        })
+    await appointments_collection.insert_many(docs)
+    
+    combinations = [
+        {},
+        {"statuses": ["confirmed"]},
+        {"statuses": ["scheduled", "confirmed"], "upcoming": True},
+        {"statuses": ["no_show"], "from_date": now - timedelta(days=90), "to_date": now},
+        {"upcoming": False},
+        {"month": "2025-11", "statuses": ["completed", "no_show"]},
+    ]
+    
+    for role, user_id in [("doctor", str(doctor_id)), ("patient", str(patient_id))]:
+        for filters in combinations:
+            query, sort_direction = build_appointments_query(role, user_id, now=now, **filters)
+            explain = await appointments_collection.find(query).sort("start", sort_direction).limit(10).explain()
+            winning_plan = explain["queryPlanner"]["winningPlan"]
+            # Slot-based engine (MongoDB 7+) nests the classic plan under queryPlan
+            stages = _plan_stages(winning_plan.get("queryPlan", winning_plan))
+            
+            assert "COLLSCAN" not in stages, (role, filters, stages)
+            assert "IXSCAN" in stages, (role, filters, stages)
+            # ESR ordering means the index provides the sort order
+            assert "SORT" not in stages, (role, filters, stages)
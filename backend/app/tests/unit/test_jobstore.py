@@ -0,0 +1,87 @@
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from apscheduler.schedulers.asyncio import AsyncIOScheduler
+from apscheduler.triggers.interval import IntervalTrigger
+from apscheduler.job import Job
+from app.core.jobstore import ThreadedMongoDBJobStore
+
+
+class SlowCollection:
+    """Stand-in for a pymongo collection whose writes take a network round trip"""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.documents = {}
+        self.written = threading.Event()
+    
+    def create_index(self, *args, **kwargs):
+        pass
+    
+    def find(self, query, projection=None):
+        return list(self.documents.values())
+    
+    def replace_one(self, query, document, upsert=False):
+        time.sleep(self.delay)
+        self.documents[query["_id"]] = document
+        self.written.set()
+    
+    def delete_one(self, query):
+        time.sleep(self.delay)
+        self.documents.pop(query["_id"], None)
+
+
+def make_job(scheduler, job_id: str) -> Job:
+    return Job(
+        scheduler,
+        id=job_id,
+        func="app.services.scheduler_service:run_leader_job",
+        trigger=IntervalTrigger(seconds=30),
+        executor="default",
+        args=("sweep_due_reminders",),
+        kwargs={},
+        name=job_id,
+        misfire_grace_time=30,
+        coalesce=True,
+        max_instances=1,
+        next_run_time=datetime.now(timezone.utc) + timedelta(seconds=30)
+    )
+
+
+class TestThreadedMongoDBJobStore:
+    """Test jobstore writes stay off the calling thread"""
+    
+    def test_add_job_does_not_wait_for_mongo(self):
+        """Test add_job returns before the write and the write lands in the background"""
+        collection = SlowCollection(delay=0.5)
+        jobstore = ThreadedMongoDBJobStore({"db": {"jobs": collection}}, "db", "jobs")
+        scheduler = AsyncIOScheduler()
+        jobstore.start(scheduler, "default")
+        job = make_job(scheduler, "reminder_sweep")
+        
+        started = time.perf_counter()
+        jobstore.add_job(job)
+        elapsed = time.perf_counter() - started
+        
+        assert elapsed < 0.1
+        assert jobstore.lookup_job("reminder_sweep") is not None
+        assert collection.written.wait(timeout=2)
+        assert "reminder_sweep" in collection.documents
+    
+    def test_persisted_jobs_are_restored(self):
+        """Test jobs written by one store are loaded by the next one"""
+        collection = SlowCollection(delay=0)
+        client = {"db": {"jobs": collection}}
+        
+        first = ThreadedMongoDBJobStore(client, "db", "jobs")
+        first.start(AsyncIOScheduler(), "default")
+        first.add_job(make_job(first._scheduler, "reminder_sweep"))
+        assert collection.written.wait(timeout=2)
+        
+        second = ThreadedMongoDBJobStore(client, "db", "jobs")
+        second.load_persisted()
+        second.start(AsyncIOScheduler(), "default")
+        
+        restored = second.lookup_job("reminder_sweep")
+        assert restored is not None
+        assert restored.args == ("sweep_due_reminders",)
@@ -0,0 +1,51 @@
+import pytest
+from datetime import datetime, timedelta
+
+
+@pytest.mark.asyncio
+async def test_single_leader_and_failover(test_db):
+    """Test only one process holds the lease and another takes over once it expires"""
+    from app.services.leader_service import LeaderLease
+    from app.models import initialize_indexes
+    from app.core import db as db_module
+    
+    await initialize_indexes(test_db)
+    db_module.mongodb.db = test_db
+    
+    first = LeaderLease("test_scheduler", ttl_seconds=30)
+    second = LeaderLease("test_scheduler", ttl_seconds=30)
+    
+    assert await first.heartbeat() is True
+    assert await second.heartbeat() is False
+    
+    # Renewal keeps the lease with the holder
+    assert await first.heartbeat() is True
+    assert await first.current_holder() == first.holder_id
+    
+    # Simulate the leader dying: its lease expires without renewal
+    await test_db["scheduler_leases"].update_one(
+        {"_id": "test_scheduler"},
+        {"$set": {"expiresAt": datetime.utcnow() - timedelta(seconds=1)}}
+    )
+    
+    assert await second.heartbeat() is True
+    assert await first.heartbeat() is False
+    assert first.is_leader is False
+
+
+@pytest.mark.asyncio
+async def test_release_hands_over_immediately(test_db):
+    """Test releasing the lease lets another process acquire it right away"""
+    from app.services.leader_service import LeaderLease
+    from app.core import db as db_module
+    
+    db_module.mongodb.db = test_db
+    
+    first = LeaderLease("test_scheduler", ttl_seconds=30)
+    second = LeaderLease("test_scheduler", ttl_seconds=30)
+    
+    assert await first.heartbeat() is True
+    await first.release()
+    
+    assert first.is_leader is False
+    assert await second.heartbeat() is True
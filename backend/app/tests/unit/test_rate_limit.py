@@ -0,0 +1,63 @@
+import pytest
+from app.utils.rate_limit import TokenBucket
+
+
+class FakeClock:
+    """Manually advanced clock; sleeping advances it"""
+    
+    def __init__(self):
+        self.now = 0.0
+    
+    def __call__(self) -> float:
+        return self.now
+    
+    async def sleep(self, seconds: float):
+        self.now += seconds
+
+
+class TestTokenBucket:
+    """Test token bucket pacing"""
+    
+    @pytest.mark.asyncio
+    async def test_burst_then_rate(self):
+        """Test capacity is available immediately, then tokens come at the rate"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=5, capacity=10, clock=clock, sleep=clock.sleep)
+        
+        for _ in range(10):
+            await bucket.acquire()
+        assert clock.now == 0.0
+        
+        for _ in range(5):
+            await bucket.acquire()
+        assert clock.now == pytest.approx(1.0)
+        assert bucket.acquired == 15
+    
+    @pytest.mark.asyncio
+    async def test_refills_up_to_capacity(self):
+        """Test idle time refills the bucket but never beyond capacity"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=2, capacity=3, clock=clock, sleep=clock.sleep)
+        
+        for _ in range(3):
+            await bucket.acquire()
+        
+        clock.now += 60
+        for _ in range(3):
+            await bucket.acquire()
+        assert clock.now == pytest.approx(60.0)
+        
+        await bucket.acquire()
+        assert clock.now == pytest.approx(60.5)
+    
+    def test_stats(self):
+        """Test stats report configuration and counters"""
+        clock = FakeClock()
+        bucket = TokenBucket(rate=5, capacity=10, clock=clock, sleep=clock.sleep)
+        
+        stats = bucket.stats()
+        
+        assert stats["rate"] == 5
+        assert stats["capacity"] == 10
+        assert stats["tokens"] == 10
+        assert stats["acquired"] == 0
@@ -0,0 +1,84 @@
+import pytest
+from datetime import datetime, timedelta
+from app.services.risk_service import score_patients, is_high_risk
+
+
+def make_features(total, no_shows, cancels=0, lead_time_hours=48.0, confirm_latency_hours=None):
+    """Build a feature row as produced by the aggregation"""
+    return {
+        "total": total,
+        "noShows": no_shows,
+        "cancels": cancels,
+        "leadTimeHours": lead_time_hours,
+        "confirmLatencyHours": confirm_latency_hours
+    }
+
+
+class TestScorePatients:
+    """Test vectorized no-show risk scoring"""
+    
+    def test_empty_input(self):
+        """Test scoring no patients returns an empty array"""
+        assert score_patients([]).shape == (0,)
+    
+    def test_scores_are_probabilities(self):
+        """Test all scores fall between 0 and 1"""
+        scores = score_patients([
+            make_features(0, 0, lead_time_hours=None),
+            make_features(10, 10, cancels=0, lead_time_hours=2000.0, confirm_latency_hours=100.0),
+            make_features(10, 0)
+        ])
+        
+        assert ((scores > 0) & (scores < 1)).all()
+    
+    def test_monotonic_in_no_show_rate(self):
+        """Test more no-shows give a higher score"""
+        scores = score_patients([make_features(10, n) for n in range(11)])
+        
+        assert (scores[1:] > scores[:-1]).all()
+    
+    def test_small_history_is_smoothed(self):
+        """Test one no-show out of one scores lower than ten out of ten"""
+        scores = score_patients([make_features(1, 1), make_features(10, 10)])
+        
+        assert scores[0] < scores[1]
+    
+    def test_repeat_no_show_is_high_risk(self):
+        """Test a patient who keeps missing appointments crosses the threshold"""
+        scores = score_patients([make_features(10, 0), make_features(10, 8)])
+        
+        assert not is_high_risk(scores[0])
+        assert is_high_risk(scores[1])
+    
+    def test_missing_risk_is_not_high_risk(self):
+        """Test unscored patients don't get extra reminders"""
+        assert not is_high_risk(None)
+
+
+@pytest.mark.asyncio
+async def test_compute_risk_stores_score_on_null_profile(test_db):
+    """Test scores are stored for patients with a null or populated patientProfile"""
+    from app.services.risk_service import compute_no_show_risk
+    from app.core import db as db_module
+    
+    db_module.mongodb.db = test_db
+    
+    users_collection = test_db["users"]
+    null_profile = await users_collection.insert_one({"role": "patient", "name": "No Profile", "patientProfile": None})
+    with_profile = await users_collection.insert_one({"role": "patient", "name": "Profile", "patientProfile": {"age": 30}})
+    
+    start = datetime.utcnow() - timedelta(days=1)
+    await test_db["appointments"].insert_many([
+        {"patientId": patient_id, "doctorId": "doctor123", "start": start, "status": "no_show", "createdAt": start - timedelta(days=2)}
+        for patient_id in [null_profile.inserted_id, with_profile.inserted_id]
+    ])
+    
+    assert await compute_no_show_risk() == 2
+    
+    stored = await users_collection.find_one({"_id": null_profile.inserted_id})
+    assert 0 < stored["patientProfile"]["noShowRisk"] < 1
+    assert stored["patientProfile"]["noShowRiskUpdatedAt"] is not None
+    
+    stored = await users_collection.find_one({"_id": with_profile.inserted_id})
+    assert stored["patientProfile"]["age"] == 30
+    assert 0 < stored["patientProfile"]["noShowRisk"] < 1
@@ -31,31 +31,188 @@ async def test_twilio_service_send_sms_mock():
         mock_client.messages.create.assert_called_once()
 
 
+def test_get_reminder_offsets():
+    """Test the reminder policy: doctor override, then specialization, then default"""
+    from app.services.scheduler_service import get_reminder_offsets
+    from app.config import settings
+    
+    by_specialization = {"Cardiology": [2, 24]}
+    with patch.object(settings, 'REMINDER_OFFSETS_HOURS', [3]), \
+         patch.object(settings, 'REMINDER_OFFSETS_BY_SPECIALIZATION', by_specialization):
+        assert get_reminder_offsets(None) == [3]
+        assert get_reminder_offsets({"specialization": "General Practice"}) == [3]
+        assert get_reminder_offsets({"specialization": "Cardiology"}) == [24, 2]
+        assert get_reminder_offsets({"specialization": "Cardiology", "reminderOffsetsHours": [6]}) == [6]
+        
+        # High-risk patients get the extra reminder on top of the policy
+        assert get_reminder_offsets(None, high_risk=True) == [settings.NO_SHOW_EXTRA_REMINDER_HOURS, 3]
+
+
+def test_pending_reminders():
+    """Test pending reminder times for new appointments"""
+    from app.services.scheduler_service import pending_reminders
+    
+    now = datetime(2025, 11, 20, 8, 0)
+    start = now + timedelta(days=3)
+    
+    assert pending_reminders(start, now, [3]) == [start - timedelta(hours=3)]
+    assert pending_reminders(start, now, [2, 24]) == [start - timedelta(hours=24), start - timedelta(hours=2)]
+    
+    # Reminder times already passed are skipped
+    soon = now + timedelta(hours=5)
+    assert pending_reminders(soon, now, [24, 3]) == [soon - timedelta(hours=3)]
+    
+    # Too close for any reminder
+    assert pending_reminders(now + timedelta(hours=2), now, [3]) == []
+
+
 @pytest.mark.asyncio
-async def test_schedule_reminder_job():
-    """Test scheduling a reminder job"""
-    from app.services.scheduler_service import schedule_reminder_job
-    from backend.app.main import get_scheduler
+async def test_sweep_due_reminders(test_db):
+    """Test the reminder sweep sends due reminders once and clears them"""
+    from app.services.scheduler_service import sweep_due_reminders
+    from app.models import initialize_indexes
+    from app.core import db as db_module
+    
+    await initialize_indexes(test_db)
+    db_module.mongodb.db = test_db
+    
+    appointments_collection = test_db["appointments"]
+    now = datetime.utcnow()
+    start = now + timedelta(hours=2)
+    
+    base_doc = {
+        "doctorId": "doctor123",
+        "patientId": "patient123",
+        "end": start + timedelta(minutes=30),
+        "reason": "Test appointment",
+        "createdAt": now,
+        "createdBy": "patient",
+        "reminder3hSent": False,
+        "twilioLogs": []
+    }
+    due = await appointments_collection.insert_one(
+        {**base_doc, "start": start, "status": "scheduled", "pendingReminders": [start - timedelta(hours=3)]}
+    )
+    not_due = await appointments_collection.insert_one(
+        {**base_doc, "start": start + timedelta(days=1), "status": "scheduled", "pendingReminders": [start + timedelta(days=1, hours=-3)]}
+    )
+    cancelled = await appointments_collection.insert_one(
+        {**base_doc, "start": start + timedelta(minutes=30), "status": "cancelled", "pendingReminders": [start - timedelta(hours=3)]}
+    )
+    # 24h reminder due now, 2h reminder still ahead
+    later_start = now + timedelta(hours=23)
+    multi = await appointments_collection.insert_one(
+        {
+            **base_doc,
+            "start": later_start,
+            "end": later_start + timedelta(minutes=30),
+            "status": "scheduled",
+            "pendingReminders": [later_start - timedelta(hours=24), later_start - timedelta(hours=2)]
+        }
+    )
+    
+    with patch('app.services.twilio_service.send_reminder_sms', new_callable=AsyncMock) as mock_send:
+        mock_send.return_value = {"success": True, "log_id": "mock_log"}
+        sent = await sweep_due_reminders()
+        
+        assert sent == 2
+        assert mock_send.call_count == 2
+        
+        # Already handled reminders are not claimed again
+        assert await sweep_due_reminders() == 0
+    
+    due_apt = await appointments_collection.find_one({"_id": due.inserted_id})
+    assert due_apt["reminder3hSent"] is True
+    assert "pendingReminders" not in due_apt
+    assert "reminderLeaseUntil" not in due_apt
+    
+    multi_apt = await appointments_collection.find_one({"_id": multi.inserted_id})
+    assert multi_apt["pendingReminders"] == [later_start - timedelta(hours=2)]
+    
+    not_due_apt = await appointments_collection.find_one({"_id": not_due.inserted_id})
+    assert "pendingReminders" in not_due_apt
+    
+    cancelled_apt = await appointments_collection.find_one({"_id": cancelled.inserted_id})
+    assert "pendingReminders" not in cancelled_apt
+    assert cancelled_apt["reminder3hSent"] is False
+
+
+@pytest.mark.asyncio
+async def test_failed_reminder_send_keeps_reminder_pending():
+    """Test a failed SMS is counted as failed and leaves the reminder state alone"""
+    from bson import ObjectId
+    from app.services.scheduler_service import deliver_reminder, reminder_dispatch_metrics
+    
+    now = datetime.utcnow()
+    patient_id, doctor_id = ObjectId(), ObjectId()
+    appointment = {
+        "_id": ObjectId(),
+        "patientId": patient_id,
+        "doctorId": doctor_id,
+        "start": now + timedelta(hours=3),
+        "status": "scheduled",
+        "pendingReminders": [now - timedelta(minutes=1)],
+        "reminderLeaseUntil": now + timedelta(minutes=5)
+    }
+    users = {
+        patient_id: {"_id": patient_id, "name": "Pat", "phone": "+15550000001"},
+        doctor_id: {"_id": doctor_id, "name": "Dr. Doc", "phone": "+15550000002"}
+    }
+    collection = AsyncMock()
+    failed_before = reminder_dispatch_metrics["failed"]
+    sent_before = reminder_dispatch_metrics["sent"]
     
-    scheduler = get_scheduler()
+    with patch('app.services.scheduler_service.get_appointments_collection', return_value=collection), \
+         patch('app.services.twilio_service.send_sms', new_callable=AsyncMock) as mock_send:
+        mock_send.return_value = {"success": False, "error": "Twilio unavailable", "log_id": "mock_log"}
+        
+        assert await deliver_reminder(appointment, now, users) is False
     
-    # Schedule a job
-    appointment_id = "test_apt_123"
-    reminder_time = datetime.utcnow() + timedelta(hours=1)
+    mock_send.assert_awaited_once()
+    # Nothing written: pendingReminders and the lease stay, reminder3hSent isn't set
+    collection.update_one.assert_not_called()
+    assert reminder_dispatch_metrics["failed"] == failed_before + 1
+    assert reminder_dispatch_metrics["sent"] == sent_before
+
+
+@pytest.mark.asyncio
+async def test_reminders_spread_before_due_time(test_db):
+    """Test each appointment's reminder is claimed at its own offset within the spread window"""
+    from bson import ObjectId
+    from app.services.scheduler_service import claim_due_reminders
+    from app.models import initialize_indexes
+    from app.core import db as db_module
+    from app.config import settings
     
-    job_meta = await schedule_reminder_job(appointment_id, reminder_time)
+    await initialize_indexes(test_db)
+    db_module.mongodb.db = test_db
     
-    assert job_meta is not None
-    assert "job_id" in job_meta
-    assert "scheduled_at" in job_meta
-    assert job_meta["job_id"] == f"reminder_{appointment_id}"
+    appointments_collection = test_db["appointments"]
+    now = datetime.utcnow()
+    start = now + timedelta(hours=3, minutes=5)
+    due_at = start - timedelta(hours=3)
     
-    # Check job exists in scheduler
-    job = scheduler.get_job(f"reminder_{appointment_id}")
-    assert job is not None
+    # 2025-01-01 00:00 UTC is a multiple of 600s, so these IDs spread by 400s and 100s
+    early = ObjectId.from_datetime(datetime(2025, 1, 1, 0, 6, 40))
+    late = ObjectId.from_datetime(datetime(2025, 1, 1, 0, 1, 40))
+    for appointment_id in [early, late]:
+        await appointments_collection.insert_one({
+            "_id": appointment_id,
+            "doctorId": "doctor123",
+            "patientId": "patient123",
+            "start": start,
+            "end": start + timedelta(minutes=30),
+            "status": "scheduled",
+            "pendingReminders": [due_at]
+        })
     
-    # Clean up
-    scheduler.remove_job(f"reminder_{appointment_id}")
+    with patch.object(settings, 'REMINDER_SPREAD_SECONDS', 600):
+        # Due in 5 minutes: only the appointment spread 400s early is ready
+        claimed = await claim_due_reminders(now, 10)
+        assert [apt["_id"] for apt in claimed] == [early]
+        
+        claimed = await claim_due_reminders(now + timedelta(minutes=4), 10)
+        assert [apt["_id"] for apt in claimed] == [late]
 
 
 @pytest.mark.asyncio
@@ -80,6 +237,7 @@ async def test_auto_cancel_no_shows_function(test_db):
         "createdAt": datetime.utcnow(),
         "createdBy": "patient",
         "reminder3hSent": False,
+        "pendingReminders": [past_start - timedelta(hours=3)],
         "twilioLogs": []
     }
     
@@ -96,3 +254,293 @@ async def test_auto_cancel_no_shows_function(test_db):
         # Check appointment was marked no-show
         updated_apt = await appointments_collection.find_one({"_id": appointment_id})
         assert updated_apt["status"] == "no_show"
+        assert "pendingReminders" not in updated_apt
+
+
+@pytest.mark.asyncio
+async def test_auto_cancel_no_shows_claims_batch_once(test_db):
+    """Test one sweep marks every overdue appointment, clears reminders and moves rollup counters once"""
+    from app.services.scheduler_service import auto_cancel_no_shows
+    from app.models import initialize_indexes
+    from app.core import db as db_module
+    from bson import ObjectId
+    
+    await initialize_indexes(test_db)
+    db_module.mongodb.db = test_db
+    
+    appointments_collection = test_db["appointments"]
+    doctor_id = ObjectId()
+    # Same day for every overdue appointment so they share one rollup row
+    past_start = datetime.utcnow().replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=1)
+    day = past_start.strftime("%Y-%m-%d")
+    
+    base_doc = {
+        "doctorId": doctor_id,
+        "patientId": ObjectId(),
+        "reason": "Test appointment",
+        "createdAt": datetime.utcnow(),
+        "createdBy": "patient",
+        "twilioLogs": []
+    }
+    overdue = []
+    for i, apt_status in enumerate(["scheduled", "scheduled", "confirmed"]):
+        start = past_start + timedelta(minutes=30 * i)
+        result = await appointments_collection.insert_one({
+            **base_doc,
+            "start": start,
+            "end": start + timedelta(minutes=30),
+            "status": apt_status,
+            "pendingReminders": [start - timedelta(hours=3)]
+        })
+        overdue.append(result.inserted_id)
+    
+    completed = await appointments_collection.insert_one({
+        **base_doc, "start": past_start, "end": past_start + timedelta(minutes=30), "status": "completed"
+    })
+    future_start = datetime.utcnow() + timedelta(hours=1)
+    upcoming = await appointments_collection.insert_one({
+        **base_doc, "start": future_start, "end": future_start + timedelta(minutes=30),
+        "status": "confirmed", "pendingReminders": [future_start - timedelta(minutes=30)]
+    })
+    
+    with patch('app.services.twilio_service.send_status_notifications', new_callable=AsyncMock) as mock_notify:
+        marked = await auto_cancel_no_shows()
+        # A second sweep finds nothing left to claim
+        marked_again = await auto_cancel_no_shows()
+    
+    assert marked == 3
+    assert marked_again == 0
+    mock_notify.assert_awaited_once()
+    assert len(mock_notify.await_args.args[0]) == 3
+    
+    async for apt in appointments_collection.find({"_id": {"$in": overdue}}):
+        assert apt["status"] == "no_show"
+        assert "pendingReminders" not in apt
+        assert "statusBatchId" not in apt
+        assert "previousStatus" not in apt
+    
+    assert (await appointments_collection.find_one({"_id": completed.inserted_id}))["status"] == "completed"
+    upcoming_apt = await appointments_collection.find_one({"_id": upcoming.inserted_id})
+    assert upcoming_apt["status"] == "confirmed"
+    assert upcoming_apt["pendingReminders"]
+    
+    rollup = await test_db["doctor_stats_daily"].find_one({"doctorId": doctor_id, "day": day})
+    assert rollup["no_show"] == 3
+    assert rollup["scheduled"] == -2
+    assert rollup["confirmed"] == -1
+
+
+@pytest.mark.asyncio
+async def test_auto_cancel_unconfirmed_skips_confirmed(test_db):
+    """Test auto-cancel only cancels appointments still scheduled"""
+    from app.services.scheduler_service import auto_cancel_unconfirmed
+    from app.models import initialize_indexes
+    from app.core import db as db_module
+    
+    await initialize_indexes(test_db)
+    db_module.mongodb.db = test_db
+    
+    appointments_collection = test_db["appointments"]
+    start = datetime.utcnow() + timedelta(minutes=10)
+    
+    base_doc = {
+        "doctorId": "doctor123",
+        "patientId": "patient123",
+        "end": start + timedelta(minutes=30),
+        "reason": "Test appointment",
+        "createdAt": datetime.utcnow(),
+        "createdBy": "patient",
+        "reminder3hSent": True,
+        "twilioLogs": []
+    }
+    scheduled = await appointments_collection.insert_one(
+        {**base_doc, "start": start, "status": "scheduled", "pendingReminders": [start - timedelta(hours=2)]}
+    )
+    confirmed = await appointments_collection.insert_one(
+        {**base_doc, "start": start + timedelta(minutes=30), "status": "confirmed"}
+    )
+    
+    with patch('app.services.twilio_service.send_sms', new_callable=AsyncMock) as mock_send:
+        mock_send.return_value = {"success": True, "log_id": "mock_log"}
+        
+        cancelled_count = await auto_cancel_unconfirmed()
+    
+    assert cancelled_count == 1
+    
+    scheduled_apt = await appointments_collection.find_one({"_id": scheduled.inserted_id})
+    assert scheduled_apt["status"] == "cancelled"
+    assert "pendingReminders" not in scheduled_apt
+    assert "statusBatchId" not in scheduled_apt
+    
+    confirmed_apt = await appointments_collection.find_one({"_id": confirmed.inserted_id})
+    assert confirmed_apt["status"] == "confirmed"
+
+
+@pytest.mark.asyncio
+async def test_purge_orphan_reminders(test_db):
+    """Test reconciliation clears reminders on inactive appointments only"""
+    from app.services.scheduler_service import purge_orphan_reminders
+    from app.models import initialize_indexes
+    from app.core import db as db_module
+    
+    await initialize_indexes(test_db)
+    db_module.mongodb.db = test_db
+    
+    appointments_collection = test_db["appointments"]
+    start = datetime.utcnow() + timedelta(days=1)
+    
+    base_doc = {
+        "doctorId": "doctor123",
+        "patientId": "patient123",
+        "end": start + timedelta(minutes=30),
+        "reason": "Test appointment",
+        "pendingReminders": [start - timedelta(hours=3)]
+    }
+    active = await appointments_collection.insert_one({**base_doc, "start": start, "status": "confirmed"})
+    orphan = await appointments_collection.insert_one(
+        {**base_doc, "start": start + timedelta(minutes=30), "status": "cancelled"}
+    )
+    
+    assert await purge_orphan_reminders() == 1
+    
+    assert "pendingReminders" in await appointments_collection.find_one({"_id": active.inserted_id})
+    assert "pendingReminders" not in await appointments_collection.find_one({"_id": orphan.inserted_id})
+
+
+@pytest.mark.asyncio
+async def test_rehydrate_reminders(test_db):
+    """Test startup rehydration restores missing reminders in pages"""
+    from app.services.scheduler_service import rehydrate_reminders
+    from app.models import initialize_indexes
+    from app.core import db as db_module
+    from app.config import settings
+    
+    await initialize_indexes(test_db)
+    db_module.mongodb.db = test_db
+    
+    appointments_collection = test_db["appointments"]
+    start = datetime.utcnow() + timedelta(days=1)
+    
+    base_doc = {
+        "doctorId": "doctor123",
+        "patientId": "patient123",
+        "reason": "Test appointment",
+        "status": "scheduled",
+        "reminder3hSent": False
+    }
+    await appointments_collection.insert_many([
+        {**base_doc, "start": start + timedelta(minutes=30 * i), "end": start + timedelta(minutes=30 * (i + 1))}
+        for i in range(5)
+    ])
+    await appointments_collection.insert_one(
+        {**base_doc, "start": start, "end": start + timedelta(minutes=30), "status": "cancelled"}
+    )
+    # Booked 1 hour before start: too late for the 3-hour reminder, never owed one
+    late_start = datetime.utcnow() + timedelta(hours=2)
+    late = await appointments_collection.insert_one({
+        **base_doc,
+        "start": late_start,
+        "end": late_start + timedelta(minutes=30),
+        "createdAt": late_start - timedelta(hours=1)
+    })
+    
+    with patch.object(settings, 'REMINDER_REHYDRATE_PAGE_SIZE', 2):
+        assert await rehydrate_reminders() == 5
+    
+    # Idempotent: nothing left to restore
+    assert await rehydrate_reminders() == 0
+    
+    late_apt = await appointments_collection.find_one({"_id": late.inserted_id})
+    assert late_apt["pendingReminders"] is None
+    
+    restored = await appointments_collection.find({"pendingReminders": {"$ne": None}}).to_list(length=None)
+    assert len(restored) == 5
+    assert all(apt["pendingReminders"] == [apt["start"] - timedelta(hours=3)] for apt in restored)
+
+
+@pytest.mark.asyncio
+async def test_catchup_drains_backlog_in_batches(test_db):
+    """Test catch-up mode processes overdue no-shows in bounded batches and records progress"""
+    from app.services import scheduler_service
+    from app.services.leader_service import LeaderLease
+    from app.models import initialize_indexes
+    from app.core import db as db_module
+    from app.config import settings
+    
+    await initialize_indexes(test_db)
+    db_module.mongodb.db = test_db
+    
+    appointments_collection = test_db["appointments"]
+    start = datetime.utcnow() - timedelta(hours=6)
+    
+    await appointments_collection.insert_many([
+        {
+            "doctorId": "doctor123",
+            "patientId": "patient123",
+            "start": start + timedelta(minutes=30 * i),
+            "end": start + timedelta(minutes=30 * (i + 1)),
+            "status": "scheduled",
+            "reason": "Test appointment"
+        }
+        for i in range(5)
+    ])
+    
+    with patch.object(settings, 'CATCHUP_BATCH_SIZE', 2), \
+         patch.object(settings, 'CATCHUP_MAX_PER_SECOND', 1000.0), \
+         patch.object(LeaderLease, 'is_leader', new=property(lambda self: True)), \
+         patch('app.services.twilio_service.send_sms', new_callable=AsyncMock) as mock_send:
+        mock_send.return_value = {"success": True, "log_id": "mock_log"}
+        
+        progress = await scheduler_service.run_catchup()
+    
+    assert progress["state"] == "done"
+    assert progress["noShows"]["total"] == 5
+    assert progress["noShows"]["processed"] == 5
+    assert progress["backlogFrom"] is not None
+    
+    saved = await scheduler_service.get_catchup_progress()
+    assert saved["state"] == "done"
+    assert await appointments_collection.count_documents({"status": "no_show"}) == 5
+
+
+@pytest.mark.asyncio
+async def test_leader_heartbeat_starts_catchup_only_for_backlog_and_stops_it_on_lost_lease():
+    """Test catch-up starts on acquiring the lease with a backlog and is cancelled when the lease is lost"""
+    import asyncio
+    from app.services import scheduler_service
+    
+    leader = Mock(is_leader=False)
+    started = asyncio.Event()
+    
+    async def acquire():
+        leader.is_leader = True
+        return True
+    
+    async def lose():
+        leader.is_leader = False
+        return False
+    
+    async def long_catchup():
+        started.set()
+        await asyncio.sleep(3600)
+    
+    with patch.object(scheduler_service, 'scheduler_leader', leader), \
+         patch.object(scheduler_service, 'run_catchup', long_catchup), \
+         patch.object(scheduler_service, 'has_catchup_backlog', new_callable=AsyncMock) as has_backlog:
+        # Lease regained without a backlog (e.g. a short blip): no catch-up scan
+        has_backlog.return_value = False
+        leader.heartbeat = acquire
+        await scheduler_service.leader_heartbeat()
+        assert scheduler_service.catchup_state["task"] is None
+        
+        leader.is_leader = False
+        has_backlog.return_value = True
+        await scheduler_service.leader_heartbeat()
+        task = scheduler_service.catchup_state["task"]
+        await asyncio.wait_for(started.wait(), timeout=1)
+        
+        leader.heartbeat = lose
+        await scheduler_service.leader_heartbeat()
+    
+    assert task.cancelled()
+    assert scheduler_service.catchup_state["task"] is None
@@ -0,0 +1,118 @@
+import pytest
+from datetime import datetime
+from unittest.mock import Mock, patch
+from fastapi import HTTPException
+from pymongo.errors import ExecutionTimeout
+from app.services.stats_service import day_range, build_clinic_stats_pipeline
+
+
+class TestDayRange:
+    """Test translating start-time windows into rollup day ranges"""
+    
+    def test_no_window(self):
+        """Test empty window produces no day filter"""
+        assert day_range() == {}
+    
+    def test_midnight_upper_bound_is_exclusive(self):
+        """Test a midnight upper bound excludes that day"""
+        day_filter = day_range(datetime(2025, 11, 1, 8, 30), datetime(2025, 12, 1))
+        
+        assert day_filter == {"$gte": "2025-11-01", "$lt": "2025-12-01"}
+    
+    def test_partial_day_upper_bound_is_inclusive(self):
+        """Test a mid-day upper bound includes that day"""
+        day_filter = day_range(to_date=datetime(2025, 11, 15, 12, 0))
+        
+        assert day_filter == {"$lte": "2025-11-15"}
+
+
+class TestClinicStatsPipeline:
+    """Test the clinic-wide analytics pipeline builder"""
+    
+    def test_single_group_by_doctor_and_period(self):
+        """Test the heavy scan is one $group keyed by doctor and period"""
+        pipeline = build_clinic_stats_pipeline(group_by="month", use_rollup=False)
+        
+        groups = [stage["$group"] for stage in pipeline if "$group" in stage]
+        assert len(groups) == 1
+        assert set(groups[0]["_id"].keys()) == {"doctorId", "period"}
+    
+    def test_rollup_source_groups_on_month_field(self):
+        """Test rollup source groups on the precomputed month field"""
+        pipeline = build_clinic_stats_pipeline(
+            group_by="month",
+            from_date=datetime(2025, 1, 1),
+            use_rollup=True
+        )
+        
+        assert pipeline[0]["$match"] == {"day": {"$gte": "2025-01-01"}}
+        assert pipeline[1]["$group"]["_id"]["period"] == "$month"
+    
+    def test_specialization_grouping_regroups_after_lookup(self):
+        """Test specialization grouping adds a second $group after the $lookup"""
+        pipeline = build_clinic_stats_pipeline(by_specialization=True)
+        stage_names = [next(iter(stage)) for stage in pipeline]
+        
+        assert stage_names.index("$lookup") < len(stage_names) - 1 - stage_names[::-1].index("$group")
+    
+    def test_show_rate_excludes_cancelled(self):
+        """Test the kept-booking rate is named showRate, not utilization"""
+        projection = build_clinic_stats_pipeline()[-1]["$project"]
+        
+        assert "utilization" not in projection
+        assert projection["showRate"]["$cond"][0] == {"$gt": [{"$subtract": ["$total", "$cancelled"]}, 0]}
+    
+    def test_invalid_group_by(self):
+        """Test invalid groupBy is rejected"""
+        with pytest.raises(HTTPException) as exc_info:
+            build_clinic_stats_pipeline(group_by="year")
+        
+        assert exc_info.value.status_code == 400
+
+
+@pytest.mark.asyncio
+async def test_rollup_write_invalidates_reads_cached_during_write():
+    """Test stats cached while the rollup write is in flight are dropped afterwards"""
+    from unittest.mock import patch
+    from bson import ObjectId
+    from app.services.stats_service import doctor_stats_cache, record_appointments_created
+    
+    doctor_id = ObjectId()
+    key = (str(doctor_id), "month")
+    
+    class RacingCollection:
+        """Caches a stale result for the doctor while the bulk write runs"""
+        
+        async def bulk_write(self, operations, ordered=True):
+            async def stale():
+                return {"total": 0}
+            await doctor_stats_cache.get_or_compute(key, stale, tag=str(doctor_id))
+    
+    with patch('app.services.stats_service.get_doctor_stats_daily_collection', return_value=RacingCollection()):
+        await record_appointments_created([
+            {"doctorId": doctor_id, "start": datetime(2025, 11, 20, 10, 0), "status": "scheduled"}
+        ])
+    
+    assert key not in doctor_stats_cache._entries
+
+
+class TimedOutCursor:
+    """Aggregation cursor whose first batch exceeds maxTimeMS"""
+    
+    async def to_list(self, length=None):
+        raise ExecutionTimeout("operation exceeded time limit", 50)
+
+
+@pytest.mark.asyncio
+async def test_clinic_stats_timeout_fails_before_streaming():
+    """Test a timed-out clinic aggregation raises 503 instead of breaking the stream"""
+    from app.services.stats_service import stream_clinic_stats
+    
+    collection = Mock()
+    collection.aggregate.return_value = TimedOutCursor()
+    
+    with patch("app.services.stats_service.get_analytics_collection", return_value=collection):
+        with pytest.raises(HTTPException) as exc_info:
+            await stream_clinic_stats()
+    
+    assert exc_info.value.status_code == 503
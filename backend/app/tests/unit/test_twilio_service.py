@@ -0,0 +1,120 @@
+import asyncio
+import threading
+import time
+import pytest
+from unittest.mock import Mock, patch, AsyncMock
+from app.config import settings
+
+
+class SlowMessages:
+    """Blocking stand-in for twilio_client.messages with a fixed HTTPS round trip"""
+    
+    def __init__(self, delay: float):
+        self.delay = delay
+        self.in_flight = 0
+        self.max_in_flight = 0
+        self.lock = threading.Lock()
+    
+    def create(self, to, from_, body):
+        with self.lock:
+            self.in_flight += 1
+            self.max_in_flight = max(self.max_in_flight, self.in_flight)
+        time.sleep(self.delay)
+        with self.lock:
+            self.in_flight -= 1
+        return Mock(sid="SM123", status="queued")
+
+
+@pytest.mark.asyncio
+async def test_sms_burst_does_not_block_event_loop():
+    """Test loop latency stays flat while a burst of SMS is sent, with bounded concurrency"""
+    from app.services.twilio_service import send_sms
+    
+    messages = SlowMessages(delay=0.2)
+    burst = settings.TWILIO_MAX_CONCURRENCY * 2
+    
+    async def probe_latency(stop: asyncio.Event):
+        """Measure how late a 10ms sleep wakes up, like a request waiting for the loop"""
+        worst = 0.0
+        while not stop.is_set():
+            started = time.perf_counter()
+            await asyncio.sleep(0.01)
+            worst = max(worst, time.perf_counter() - started - 0.01)
+        return worst
+    
+    with patch('app.services.twilio_service.twilio_client') as mock_client, \
+         patch('app.services.twilio_service.log_twilio_message', new_callable=AsyncMock) as mock_log:
+        mock_client.messages = messages
+        mock_log.return_value = "log123"
+        
+        stop = asyncio.Event()
+        probe = asyncio.create_task(probe_latency(stop))
+        
+        started = time.perf_counter()
+        results = await asyncio.gather(*(
+            send_sms(to=f"+1234567{i:04d}", body="Reminder", from_number="+10000000000")
+            for i in range(burst)
+        ))
+        elapsed = time.perf_counter() - started
+        
+        stop.set()
+        worst_lag = await probe
+    
+    assert all(result["success"] for result in results)
+    
+    # Serial sends would block the loop for burst x 0.2s
+    assert worst_lag < 0.1
+    assert messages.max_in_flight <= settings.TWILIO_MAX_CONCURRENCY
+    assert elapsed < burst * messages.delay / 2
+
+
+class FakeUsersCollection:
+    """Records find queries and yields matching users"""
+    
+    def __init__(self, users):
+        self.users = {user["_id"]: user for user in users}
+        self.queries = []
+    
+    def find(self, query, projection=None):
+        self.queries.append((query, projection))
+        matches = [self.users[user_id] for user_id in query["_id"]["$in"] if user_id in self.users]
+        
+        async def cursor():
+            for user in matches:
+                yield user
+        
+        return cursor()
+
+
+@pytest.mark.asyncio
+async def test_notification_users_resolved_in_one_query_and_cached():
+    """Test a batch resolves all users with one projected $in query, then hits the cache"""
+    from bson import ObjectId
+    from app.services.twilio_service import get_appointment_users
+    from app.services.user_cache import notification_user_cache
+    
+    patient_id, doctor_id = ObjectId(), ObjectId()
+    collection = FakeUsersCollection([
+        {"_id": patient_id, "name": "Pat", "phone": "+15550000001"},
+        {"_id": doctor_id, "name": "Dr. Doc", "phone": "+15550000002"}
+    ])
+    appointments = [
+        {"_id": ObjectId(), "patientId": str(patient_id), "doctorId": str(doctor_id)}
+        for _ in range(5)
+    ]
+    notification_user_cache.clear()
+    
+    with patch('app.services.twilio_service.get_users_collection', return_value=collection):
+        users = await get_appointment_users(appointments)
+        assert set(users) == {patient_id, doctor_id}
+        assert len(collection.queries) == 1
+        assert collection.queries[0][1] == {"name": 1, "phone": 1}
+        
+        # Second batch is served from the cache
+        await get_appointment_users(appointments)
+        assert len(collection.queries) == 1
+        
+        # Profile updates invalidate the user
+        notification_user_cache.invalidate(patient_id)
+        await get_appointment_users(appointments)
+        assert collection.queries[-1][0] == {"_id": {"$in": [patient_id]}}
@@ -0,0 +1,150 @@
+import time
+import numpy as np
+import pytest
+from datetime import date, datetime, timedelta
+from unittest.mock import patch
+from bson import ObjectId
+from app.services.utilization_service import (
+    weekly_capacity,
+    compute_offered_capacity,
+    group_columns,
+    get_utilization_report
+)
+from app.utils.availability import generate_slots_for_day
+
+
+PROFILE = {
+    "slotDurationMin": 30,
+    "weeklySchedule": [
+        {"weekday": 0, "start": "09:00", "end": "17:00"},  # Monday: 16 slots
+        {"weekday": 2, "start": "09:00", "end": "12:15"},  # Wednesday: 6 full slots
+    ]
+}
+
+
+class TestOfferedCapacity:
+    """Test vectorized offered capacity"""
+    
+    def test_weekly_capacity_matches_generated_slots(self):
+        """Test per-weekday capacity agrees with generate_slots_for_day"""
+        capacity = weekly_capacity(PROFILE)
+        monday = datetime(2025, 11, 17)
+        
+        for offset in range(7):
+            day = monday + timedelta(days=offset)
+            assert capacity[day.weekday()] == len(generate_slots_for_day(day, PROFILE))
+    
+    def test_exceptions_and_explicit_slots(self):
+        """Test exceptions zero the weekly capacity and explicit slots add to it"""
+        profile = {
+            **PROFILE,
+            "scheduleExceptions": [datetime(2025, 11, 17)],
+            "explicitSlots": [datetime(2025, 11, 17, 18, 0), datetime(2025, 11, 18, 10, 0), datetime(2025, 12, 30, 10, 0)]
+        }
+        
+        offered = compute_offered_capacity([profile], date(2025, 11, 17), 7)
+        
+        # Mon exception + 1 explicit, Tue 1 explicit, Wed weekly, out-of-range slot ignored
+        assert offered.tolist() == [[1, 1, 6, 0, 0, 0, 0]]
+    
+    def test_explicit_slots_inside_weekly_hours_count_once(self):
+        """Test explicit slots overlapping weekly hours or each other add no capacity"""
+        profile = {
+            **PROFILE,
+            "scheduleExceptions": [datetime(2025, 11, 24)],
+            "explicitSlots": [
+                datetime(2025, 11, 17, 10, 0),   # Monday, inside weekly hours
+                datetime(2025, 11, 19, 11, 45),  # Wednesday, overlaps the last full slot
+                datetime(2025, 11, 19, 12, 0),   # Wednesday, after the last full slot
+                datetime(2025, 11, 19, 12, 0),   # duplicate
+                datetime(2025, 11, 24, 10, 0),   # Monday exception, weekly hours don't apply
+            ]
+        }
+        
+        offered = compute_offered_capacity([profile], date(2025, 11, 17), 8)
+        
+        assert offered.tolist() == [[16, 0, 7, 0, 0, 0, 0, 1]]
+    
+    def test_group_by_week_handles_partial_first_week(self):
+        """Test week grouping starts a new period every Monday"""
+        offered = compute_offered_capacity([PROFILE], date(2025, 11, 19), 14)  # Wednesday start
+        
+        grouped, labels = group_columns(offered, date(2025, 11, 19), "week")
+        
+        assert labels == ["2025-W47", "2025-W48", "2025-W49"]
+        assert grouped.tolist() == [[6, 22, 16]]
+        assert grouped.sum() == offered.sum()
+    
+    def test_year_for_100_doctors_is_fast(self):
+        """Test a year of capacity across 100 doctors computes well under a second"""
+        profiles = []
+        for i in range(100):
+            profiles.append({
+                **PROFILE,
+                "explicitSlots": [datetime(2025, 1, 1) + timedelta(days=d, hours=18) for d in range(0, 365, 7)],
+                "scheduleExceptions": [datetime(2025, 1, 1) + timedelta(days=d) for d in range(i % 7, 365, 30)]
+            })
+        
+        started = time.perf_counter()
+        offered = compute_offered_capacity(profiles, date(2025, 1, 1), 365)
+        grouped, _ = group_columns(offered, date(2025, 1, 1), "week")
+        elapsed = time.perf_counter() - started
+        
+        assert offered.shape == (100, 365)
+        assert np.array_equal(grouped.sum(axis=1), offered.sum(axis=1))
+        assert elapsed < 0.2
+
+
+class FakeCursor:
+    """Motor-style cursor over fixed documents"""
+    
+    def __init__(self, documents):
+        self.documents = documents
+    
+    def sort(self, *args, **kwargs):
+        return self
+    
+    async def to_list(self, length=None):
+        return self.documents
+    
+    async def __aiter__(self):
+        for document in self.documents:
+            yield document
+
+
+class FakeCollection:
+    """Returns the same documents for every find()"""
+    
+    def __init__(self, documents):
+        self.documents = documents
+    
+    def find(self, query, projection=None):
+        return FakeCursor(self.documents)
+
+
+@pytest.mark.asyncio
+async def test_report_joins_booked_counts_to_doctor_days():
+    """Test rollup rows land on their doctor's row and day, net of cancellations"""
+    first, second = ObjectId(), ObjectId()
+    doctors = [
+        {"_id": first, "name": "Dr. A", "doctorProfile": PROFILE},
+        {"_id": second, "name": "Dr. B", "doctorProfile": {**PROFILE, "explicitSlots": [datetime(2025, 11, 18, 10, 0)]}}
+    ]
+    rollup = [
+        {"doctorId": first, "day": "2025-11-17", "total": 5, "cancelled": 1},
+        {"doctorId": second, "day": "2025-11-18", "total": 1},
+        {"doctorId": second, "day": "2025-11-19", "total": 3, "cancelled": 0}
+    ]
+    
+    with patch("app.services.utilization_service.get_users_collection", return_value=FakeCollection(doctors)), \
+         patch("app.services.utilization_service.get_doctor_stats_daily_collection", return_value=FakeCollection(rollup)), \
+         patch("app.services.utilization_service.settings.STATS_USE_ROLLUP", True):
+        report = await get_utilization_report(date(2025, 11, 17), date(2025, 11, 24))
+    
+    by_name = {row["doctorName"]: row for row in report["doctors"]}
+    assert by_name["Dr. A"]["booked"] == [4, 0, 0, 0, 0, 0, 0]
+    assert by_name["Dr. A"]["utilization"] == [0.25, None, 0.0, None, None, None, None]
+    assert by_name["Dr. B"]["booked"] == [0, 1, 3, 0, 0, 0, 0]
+    assert by_name["Dr. B"]["utilization"][1:3] == [1.0, 0.5]
+    assert by_name["Dr. B"]["totalOffered"] == 23
+    assert by_name["Dr. B"]["overallUtilization"] == round(4 / 23, 4)
@@ -56,6 +56,14 @@ def is_within_explicit_slots(dt: datetime, explicit_slots: List[datetime]) -> bo
     return False
 
 
+def is_schedule_exception(dt: datetime, schedule_exceptions: List[datetime]) -> bool:
+    """Check if datetime falls on a date when the weekly schedule doesn't apply"""
+    if not schedule_exceptions:
+        return False
+    
+    return any(exception.date() == dt.date() for exception in schedule_exceptions)
+
+
 def validate_appointment_slot(
     start: datetime,
     doctor_profile: dict,
@@ -82,8 +90,12 @@ def validate_appointment_slot(
     # 3. Check if within weekly schedule OR explicit slots
     weekly_schedule = doctor_profile.get("weeklySchedule", [])
     explicit_slots = doctor_profile.get("explicitSlots", [])
+    schedule_exceptions = doctor_profile.get("scheduleExceptions", [])
     
-    within_weekly = is_within_weekly_schedule(start, weekly_schedule)
+    within_weekly = (
+        not is_schedule_exception(start, schedule_exceptions)
+        and is_within_weekly_schedule(start, weekly_schedule)
+    )
     within_explicit = is_within_explicit_slots(start, explicit_slots)
     
     if not within_weekly and not within_explicit:
@@ -105,6 +117,10 @@ def generate_slots_for_day(
     slot_duration = doctor_profile.get("slotDurationMin", 30)
     weekly_schedule = doctor_profile.get("weeklySchedule", [])
     
+    # Weekly schedule doesn't apply on exception dates
+    if is_schedule_exception(date, doctor_profile.get("scheduleExceptions", [])):
+        return slots
+    
     # Get weekday
     weekday = date.weekday()
     
@@ -0,0 +1,123 @@
+import asyncio
+from typing import Any, Callable, Dict, List, Optional
+from bson import ObjectId
+from pymongo.errors import BulkWriteError
+
+
+class BufferedInsertWriter:
+    """
+    Buffers documents and writes them in batches with insert_many(ordered=False)
+    
+    - add() assigns the _id client-side and returns it right away
+    - Flushes when batch_size documents are buffered and every
+      flush_interval_seconds; the periodic flusher starts on first use
+    - At most max_buffer documents wait; beyond that new ones are dropped
+      and add() returns None
+    - dropped / failed count documents that were never written
+    """
+    
+    def __init__(
+        self,
+        get_collection: Callable[[], Any],
+        batch_size: int,
+        flush_interval_seconds: float,
+        max_buffer: int
+    ):
+        self.get_collection = get_collection
+        self.batch_size = batch_size
+        self.flush_interval_seconds = flush_interval_seconds
+        self.max_buffer = max_buffer
+        self._buffer: List[Dict[str, Any]] = []
+        self._flusher: Optional[asyncio.Task] = None
+        self._pending_flushes: set = set()
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.flushes = 0
+    
+    def add(self, document: Dict[str, Any]) -> Optional[ObjectId]:
+        """Buffer a document for insertion and return its _id (None if dropped)"""
+        self._ensure_flusher()
+        
+        if len(self._buffer) >= self.max_buffer:
+            # Counted only; close() and stats() report drops
+            self.dropped += 1
+            return None
+        
+        document.setdefault("_id", ObjectId())
+        self._buffer.append(document)
+        if len(self._buffer) >= self.batch_size:
+            self._start_flush()
+        
+        return document["_id"]
+    
+    async def flush(self) -> int:
+        """Write everything buffered so far; returns number of documents written"""
+        written = 0
+        while self._buffer:
+            batch = self._buffer[:self.batch_size]
+            del self._buffer[:self.batch_size]
+            written += await self._write(batch)
+        return written
+    
+    async def _write(self, batch: List[Dict[str, Any]]) -> int:
+        self.flushes += 1
+        try:
+            result = await self.get_collection().insert_many(batch, ordered=False)
+            inserted = len(result.inserted_ids)
+        except BulkWriteError as e:
+            # Unordered: everything except the rejected documents was written
+            inserted = e.details.get("nInserted", 0)
+            print(f"⚠️ {len(batch) - inserted} buffered document(s) rejected: {e.details.get('writeErrors', [])[:1]}")
+        except Exception as e:
+            inserted = 0
+            print(f"⚠️ Failed to write {len(batch)} buffered document(s): {str(e)}")
+        
+        self.written += inserted
+        self.failed += len(batch) - inserted
+        return inserted
+    
+    def _start_flush(self) -> asyncio.Task:
+        # Tracked so close() can wait for writes already taken from the buffer
+        task = asyncio.get_running_loop().create_task(self.flush())
+        self._pending_flushes.add(task)
+        task.add_done_callback(self._pending_flushes.discard)
+        return task
+    
+    def _ensure_flusher(self):
+        loop = asyncio.get_running_loop()
+        if self._flusher is None or self._flusher.done() or self._flusher.get_loop() is not loop:
+            self._flusher = loop.create_task(self._flush_periodically())
+    
+    async def _flush_periodically(self):
+        while True:
+            await asyncio.sleep(self.flush_interval_seconds)
+            # Shielded so close() cancelling the flusher never abandons a batch mid-write
+            await asyncio.shield(self._start_flush())
+    
+    async def close(self):
+        """Stop the periodic flusher and write whatever is still buffered"""
+        if self._flusher is not None and not self._flusher.done():
+            self._flusher.cancel()
+            try:
+                await self._flusher
+            except asyncio.CancelledError:
+                pass
+        self._flusher = None
+        
+        if self._pending_flushes:
+            await asyncio.gather(*self._pending_flushes, return_exceptions=True)
+        await self.flush()
+        
+        if self.dropped or self.failed:
+            print(f"⚠️ Buffered writer closed: {self.dropped} dropped, {self.failed} failed")
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for monitoring lost writes"""
+        return {
+            "buffered": len(self._buffer),
+            "written": self.written,
+            "dropped": self.dropped,
+            "failed": self.failed,
+            "flushes": self.flushes
+        }
@@ -0,0 +1,148 @@
+import asyncio
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Tuple
+
+
+class AsyncTTLCache:
+    """
+    In-process TTL cache for async computations
+    
+    - Entries expire after ttl_seconds; least recently used entries are
+      evicted beyond max_entries
+    - Single-flight: concurrent misses for the same key share one computation
+    - Entries carry a tag (e.g. a doctor ID); invalidate(tag) drops them and
+      discards any in-flight result for that tag so stale data is never stored
+    - Per-tag generations are only kept while a computation for the tag is
+      running, so memory stays bounded by in-flight work
+    """
+    
+    def __init__(self, ttl_seconds: float, max_entries: int = 1024):
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self._entries: "OrderedDict[Hashable, Tuple[float, Any, Hashable]]" = OrderedDict()
+        self._in_flight: Dict[Hashable, Tuple[asyncio.Future, Hashable]] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self._loading: Dict[Hashable, int] = {}
+        self._epoch = 0
+        self.hits = 0
+        self.misses = 0
+        self.coalesced = 0
+        self.expirations = 0
+        self.evictions = 0
+        self.invalidations = 0
+    
+    async def get_or_compute(
+        self,
+        key: Hashable,
+        compute: Callable[[], Awaitable[Any]],
+        tag: Optional[Hashable] = None
+    ) -> Any:
+        """Return the cached value for key, computing it at most once concurrently"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.expirations += 1
+        
+        in_flight = self._in_flight.get(key)
+        if in_flight is not None:
+            self.coalesced += 1
+            # Shield so a disconnecting waiter doesn't cancel the shared computation
+            return await asyncio.shield(in_flight[0])
+        
+        self.misses += 1
+        generation = (self._epoch, self._generations.get(tag, 0))
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[key] = (future, tag)
+        self._loading[tag] = self._loading.get(tag, 0) + 1
+        
+        try:
+            value = await compute()
+        except BaseException as e:
+            future.set_exception(e)
+            # Mark retrieved so an unawaited future doesn't log a warning
+            future.exception()
+            raise
+        else:
+            future.set_result(value)
+            # Skip storing if a write invalidated this tag mid-computation
+            if (self._epoch, self._generations.get(tag, 0)) == generation:
+                self._store(key, value, tag)
+            return value
+        finally:
+            current = self._in_flight.get(key)
+            if current is not None and current[0] is future:
+                del self._in_flight[key]
+            # Last computation for the tag is done; nothing compares its generation now
+            self._loading[tag] -= 1
+            if not self._loading[tag]:
+                del self._loading[tag]
+                self._generations.pop(tag, None)
+    
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for key, or None if missing or expired"""
+        entry = self._entries.get(key)
+        if entry is not None:
+            if entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return entry[1]
+            del self._entries[key]
+            self.expirations += 1
+        
+        self.misses += 1
+        return None
+    
+    def set(self, key: Hashable, value: Any, tag: Optional[Hashable] = None):
+        """Store a value computed by the caller (e.g. one row of a batch query)"""
+        self._store(key, value, tag)
+    
+    def _store(self, key: Hashable, value: Any, tag: Optional[Hashable]):
+        """Store an entry and evict least recently used entries beyond capacity"""
+        self._entries[key] = (time.monotonic() + self.ttl_seconds, value, tag)
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+    
+    def invalidate(self, tag: Hashable):
+        """Drop all entries and in-flight computations for a tag"""
+        if tag in self._loading:
+            self._generations[tag] = self._generations.get(tag, 0) + 1
+        
+        stale_keys = [key for key, entry in self._entries.items() if entry[2] == tag]
+        for key in stale_keys:
+            del self._entries[key]
+        
+        stale_in_flight = [key for key, (_, key_tag) in self._in_flight.items() if key_tag == tag]
+        for key in stale_in_flight:
+            del self._in_flight[key]
+        
+        self.invalidations += 1
+    
+    def clear(self):
+        """Drop everything"""
+        self._epoch += 1
+        self._entries.clear()
+        self._in_flight.clear()
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for tuning TTL and capacity"""
+        lookups = self.hits + self.misses + self.coalesced
+        return {
+            "size": len(self._entries),
+            "inFlight": len(self._in_flight),
+            "maxEntries": self.max_entries,
+            "ttlSeconds": self.ttl_seconds,
+            "hits": self.hits,
+            "misses": self.misses,
+            "coalesced": self.coalesced,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "invalidations": self.invalidations,
+            "hitRate": round((self.hits + self.coalesced) / lookups, 4) if lookups else 0.0
+        }
@@ -0,0 +1,62 @@
+import asyncio
+import time
+from datetime import datetime, timedelta
+
+
+class SystemClock:
+    """Real time (naive UTC datetimes, like the rest of the scheduler code)"""
+    
+    def utcnow(self) -> datetime:
+        return datetime.utcnow()
+    
+    def monotonic(self) -> float:
+        return time.monotonic()
+    
+    async def sleep(self, seconds: float):
+        await asyncio.sleep(seconds)
+
+
+class VirtualClock:
+    """
+    Manually advanced clock for simulations and tests
+    
+    sleep() advances virtual time instead of waiting, so rate limits and
+    pacing cost no wall time
+    """
+    
+    def __init__(self, start: datetime):
+        self._now = start
+        self._elapsed = 0.0
+    
+    def utcnow(self) -> datetime:
+        return self._now
+    
+    def monotonic(self) -> float:
+        return self._elapsed
+    
+    async def sleep(self, seconds: float):
+        self.advance(timedelta(seconds=max(0.0, seconds)))
+        await asyncio.sleep(0)
+    
+    def advance(self, delta: timedelta):
+        self._now += delta
+        self._elapsed += delta.total_seconds()
+    
+    def advance_to(self, moment: datetime):
+        """Move forward to moment (never backwards)"""
+        if moment > self._now:
+            self.advance(moment - self._now)
+
+
+_clock = SystemClock()
+
+
+def get_clock():
+    """Active clock used by the scheduler sweeps"""
+    return _clock
+
+
+def set_clock(clock):
+    """Swap the active clock (e.g. a VirtualClock in simulations)"""
+    global _clock
+    _clock = clock
@@ -0,0 +1,58 @@
+import asyncio
+import time
+from typing import Awaitable, Callable, Dict, Any
+
+
+class TokenBucket:
+    """
+    Async token bucket rate limiter
+    
+    - Refills at rate tokens per second up to capacity (the allowed burst)
+    - acquire() waits until a token is available; waiters are served in order
+    - clock and sleep are injectable so simulations can drive time
+    """
+    
+    def __init__(
+        self,
+        rate: float,
+        capacity: float,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], Awaitable[Any]] = asyncio.sleep
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = asyncio.Lock()
+        self.acquired = 0
+        self.waited_seconds = 0.0
+    
+    def _refill(self):
+        now = self._clock()
+        self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+        self._updated = now
+    
+    async def acquire(self):
+        """Take one token, waiting for the bucket to refill if needed"""
+        async with self._lock:
+            self._refill()
+            if self._tokens < 1:
+                wait = (1 - self._tokens) / self.rate
+                self.waited_seconds += wait
+                await self._sleep(wait)
+                self._refill()
+            self._tokens -= 1
+            self.acquired += 1
+    
+    def stats(self) -> Dict[str, Any]:
+        """Counters for tuning rate and burst"""
+        self._refill()
+        return {
+            "rate": self.rate,
+            "capacity": self.capacity,
+            "tokens": round(self._tokens, 2),
+            "acquired": self.acquired,
+            "waitedSeconds": round(self.waited_seconds, 3)
+        }
@@ -0,0 +1,43 @@
+"""
+Standalone scheduler worker: runs the reminder sweep, the status sweeps and
+their notifications without serving the API
+
+Usage:
+    python -m app.worker
+
+Run API processes with RUN_SCHEDULER_IN_API=false so API and background
+capacity scale independently. Bookings reach the worker through Mongo
+(pendingReminders), so nothing is enqueued in-process.
+"""
+import asyncio
+import signal
+from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.core.scheduler import start_scheduler, shutdown_scheduler
+from app.services.twilio_service import twilio_log_writer
+
+
+async def run_worker():
+    """Run the scheduler until SIGINT/SIGTERM"""
+    await connect_to_mongo()
+    
+    from app.models import initialize_indexes
+    await initialize_indexes(get_database())
+    
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+    
+    await start_scheduler()
+    print("✅ Scheduler worker running (Ctrl+C to stop)")
+    
+    try:
+        await stop.wait()
+    finally:
+        await shutdown_scheduler()
+        await twilio_log_writer.close()
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(run_worker())
@@ -0,0 +1,179 @@
+"""
+Regression benchmark for doctor stats latency
+
+Seeds a synthetic appointments dataset (1M by default) into a separate
+database and compares:
+- legacy:   $match -> $addFields -> $group plus a separate count_documents
+- facet:    single-pass $facet over the full history
+- window:   single-pass $facet bounded to [now - 90 days, now)
+- rollup:   doctor_stats_daily range read
+- cached:   get_doctor_stats through the result cache
+
+Usage:
+    python benchmark_stats.py                    # seed 1M appointments and run
+    python benchmark_stats.py --count 200000     # smaller dataset
+    python benchmark_stats.py --skip-seed        # reuse previously seeded data
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import os
+import time
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from app.config import settings
+from app.core import db as db_module
+from app.models import initialize_indexes
+from app.services.stats_service import STATUS_FIELDS, rebuild_doctor_stats
+from app.services import appointment_service
+
+BENCH_DB_NAME = f"{settings.MONGODB_DB_NAME}_bench"
+BATCH_SIZE = 10000
+
+
+async def seed(db, count: int, doctors: int):
+    """Insert synthetic appointments in consecutive 30-minute slots per doctor"""
+    appointments_collection = db["appointments"]
+    users_collection = db["users"]
+    
+    await db.client.drop_database(BENCH_DB_NAME)
+    await initialize_indexes(db)
+    
+    doctor_ids = []
+    for i in range(doctors):
+        result = await users_collection.insert_one({
+            "role": "doctor",
+            "name": f"Dr. Bench {i}",
+            "email": f"bench{i}@clinic.com",
+            "phone": f"+1555000{i:04d}",
+            "passwordHash": "x",
+            "doctorProfile": {"specialization": "General Practice", "slotDurationMin": 30, "weeklySchedule": []}
+        })
+        doctor_ids.append(result.inserted_id)
+    
+    # Walk consecutive slots per doctor backwards from now, so every
+    # appointment (all hold terminal statuses) lies in the past
+    now = datetime.utcnow()
+    history_end = now.replace(minute=0 if now.minute < 30 else 30, second=0, microsecond=0)
+    per_doctor = count // doctors
+    
+    print(f"🌱 Seeding {per_doctor * doctors:,} appointments for {doctors} doctors...")
+    started = time.perf_counter()
+    
+    batch = []
+    for doctor_id in doctor_ids:
+        for n in range(per_doctor):
+            start = history_end - timedelta(minutes=30 * (n + 1))
+            batch.append({
+                "doctorId": doctor_id,
+                "patientId": ObjectId(),
+                "start": start,
+                "end": start + timedelta(minutes=30),
+                # Past appointments only hold terminal statuses (no partial index conflicts)
+                "status": random.choice(["completed", "completed", "cancelled", "no_show"]),
+                "reason": "Benchmark",
+                "createdAt": start - timedelta(days=3),
+                "createdBy": "patient",
+                "reminder3hSent": True,
+                "twilioLogs": []
+            })
+            if len(batch) >= BATCH_SIZE:
+                await appointments_collection.insert_many(batch, ordered=False)
+                batch = []
+    if batch:
+        await appointments_collection.insert_many(batch, ordered=False)
+    
+    print(f"✅ Seeded in {time.perf_counter() - started:.1f}s")
+    
+    started = time.perf_counter()
+    rows = await rebuild_doctor_stats()
+    print(f"✅ Built rollup ({rows:,} rows) in {time.perf_counter() - started:.1f}s")
+
+
+async def legacy_stats(db, doctor_id: str, limit: int = 10):
+    """Pre-$facet implementation: full-history group plus a second count scan"""
+    appointments_collection = db["appointments"]
+    pipeline = [
+        {"$match": {"doctorId": ObjectId(doctor_id)}},
+        {"$addFields": {"period": {"$dateToString": {"format": "%Y-%m", "date": "$start"}}}},
+        {
+            "$group": {
+                "_id": "$period",
+                "total": {"$sum": 1},
+                **{
+                    name: {"$sum": {"$cond": [{"$eq": ["$status", name]}, 1, 0]}}
+                    for name in STATUS_FIELDS
+                }
+            }
+        },
+        {"$sort": {"_id": -1}},
+        {"$limit": limit}
+    ]
+    stats = await appointments_collection.aggregate(pipeline).to_list(length=limit)
+    total = await appointments_collection.count_documents({"doctorId": ObjectId(doctor_id)})
+    return {"totalAppointments": total, "stats": stats}
+
+
+async def measure(label: str, func, runs: int):
+    """Run func repeatedly and print latency percentiles"""
+    timings = []
+    for _ in range(runs):
+        started = time.perf_counter()
+        await func()
+        timings.append((time.perf_counter() - started) * 1000)
+    
+    timings.sort()
+    p95 = timings[max(0, int(len(timings) * 0.95) - 1)]
+    print(f"{label:<10} median {statistics.median(timings):8.1f} ms   p95 {p95:8.1f} ms")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Benchmark doctor stats latency")
+    parser.add_argument("--count", type=int, default=1_000_000, help="Appointments to seed")
+    parser.add_argument("--doctors", type=int, default=20, help="Doctors to spread appointments over")
+    parser.add_argument("--runs", type=int, default=20, help="Runs per variant")
+    parser.add_argument("--skip-seed", action="store_true", help="Reuse existing benchmark data")
+    args = parser.parse_args()
+    
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[BENCH_DB_NAME]
+    
+    # Point the service layer at the benchmark database
+    db_module.mongodb.client = client
+    db_module.mongodb.db = db
+    
+    try:
+        if not args.skip_seed:
+            await seed(db, args.count, args.doctors)
+        
+        doctor = await db["users"].find_one({"role": "doctor"})
+        doctor_id = str(doctor["_id"])
+        window_end = datetime.utcnow()
+        window_start = window_end - timedelta(days=90)
+        
+        print("\n" + "=" * 60)
+        print(f"DOCTOR STATS LATENCY ({args.runs} runs, doctor {doctor_id})")
+        print("=" * 60)
+        
+        # _compute_doctor_stats bypasses the result cache
+        compute = appointment_service._compute_doctor_stats
+        
+        settings.STATS_USE_ROLLUP = False
+        await measure("legacy", lambda: legacy_stats(db, doctor_id), args.runs)
+        await measure("facet", lambda: compute(doctor_id, "month", 10, None, None), args.runs)
+        await measure("window", lambda: compute(doctor_id, "month", 10, window_start, window_end), args.runs)
+        
+        settings.STATS_USE_ROLLUP = True
+        await measure("rollup", lambda: compute(doctor_id, "month", 10, None, None), args.runs)
+        await measure("cached", lambda: appointment_service.get_doctor_stats(doctor_id), args.runs)
+    finally:
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
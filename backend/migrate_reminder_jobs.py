@@ -0,0 +1,52 @@
+"""
+Migration script: Move pending reminders from APScheduler jobs to pendingReminders
+
+Sets pendingReminders (from each doctor's reminder policy) on active future
+appointments that haven't been reminded yet, converting the older single
+reminderDueAt field, then removes the per-appointment reminder jobs from the
+APScheduler jobstore and the old reminder_due index. Reminders are sent by
+the reminder sweep afterwards.
+"""
+import asyncio
+from motor.motor_asyncio import AsyncIOMotorClient
+import sys
+import os
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.config import settings
+from app.core import db as db_module
+from app.services.scheduler_service import rehydrate_reminders
+
+
+async def migrate_reminder_jobs():
+    client = AsyncIOMotorClient(settings.MONGODB_URL)
+    db = client[settings.MONGODB_DB_NAME]
+    
+    # Point the service layer at the database
+    db_module.mongodb.client = client
+    db_module.mongodb.db = db
+    
+    print("=" * 60)
+    print("MIGRATING REMINDERS: APSCHEDULER JOBS -> pendingReminders")
+    print("=" * 60)
+    
+    # Reminders already overdue are sent by the first sweep
+    migrated = await rehydrate_reminders()
+    print(f"\n✅ Set pendingReminders on {migrated} appointment(s)")
+    
+    # Drop the old per-appointment jobs so the jobstore only holds sweeps
+    result = await db.apscheduler_jobs.delete_many(
+        {"_id": {"$regex": "^(extra_)?reminder_"}}
+    )
+    print(f"✅ Removed {result.deleted_count} reminder job(s) from apscheduler_jobs")
+    
+    # The single-field reminder index is replaced by pending_reminders
+    if "reminder_due" in await db.appointments.index_information():
+        await db.appointments.drop_index("reminder_due")
+        print("✅ Dropped old reminder_due index")
+    
+    client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(migrate_reminder_jobs())
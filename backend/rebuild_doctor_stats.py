@@ -0,0 +1,41 @@
+"""
+Backfill / rebuild the doctor_stats_daily rollup from the appointments collection
+
+Usage:
+    python rebuild_doctor_stats.py              # rebuild for all doctors
+    python rebuild_doctor_stats.py <doctor_id>  # rebuild for one doctor
+"""
+import asyncio
+import sys
+import os
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from app.core.db import connect_to_mongo, close_mongo_connection, get_database
+from app.models.doctor_stats_model import create_doctor_stats_indexes
+from app.services.stats_service import rebuild_doctor_stats
+
+
+async def main():
+    doctor_id = sys.argv[1] if len(sys.argv) > 1 else None
+    
+    await connect_to_mongo()
+    
+    try:
+        await create_doctor_stats_indexes(get_database())
+        
+        print("=" * 60)
+        print(f"REBUILDING DOCTOR STATS ROLLUP: {doctor_id or 'ALL DOCTORS'}")
+        print("=" * 60)
+        
+        started = time.perf_counter()
+        rows = await rebuild_doctor_stats(doctor_id)
+        elapsed = time.perf_counter() - started
+        
+        print(f"\n✅ Wrote {rows} rollup rows in {elapsed:.2f}s")
+    finally:
+        await close_mongo_connection()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
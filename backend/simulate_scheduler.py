@@ -0,0 +1,243 @@
+"""
+Virtual-clock simulation of a clinic day through the scheduler sweeps
+
+Seeds a day of appointments into a separate local database, then replays
+24h of scheduler activity in virtual time:
+- sweep_due_reminders every REMINDER_SWEEP_INTERVAL_SECONDS
+- auto_cancel_unconfirmed and auto_cancel_no_shows every minute
+- simulated patients confirming after their reminder and doctors
+  completing attended appointments
+
+SMS go to a fake Twilio client, so nothing is sent. Reports per-sweep
+durations (wall time), Mongo commands and messages per second.
+
+Usage:
+    python simulate_scheduler.py                       # 20 doctors, 8h of :00/:30 slots
+    python simulate_scheduler.py --doctors 100         # heavier day
+    python simulate_scheduler.py --confirm-rate 0.5    # more auto-cancels
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import sys
+import os
+import time
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+from bson import ObjectId
+from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import monitoring
+from app.config import settings
+from app.core import db as db_module
+from app.models import initialize_indexes
+from app.utils.clock import VirtualClock, set_clock
+from app.utils.rate_limit import TokenBucket
+from app.services import scheduler_service, twilio_service
+
+SIM_DB_NAME = f"{settings.MONGODB_DB_NAME}_sim"
+TICK = timedelta(seconds=settings.REMINDER_SWEEP_INTERVAL_SECONDS)
+
+
+class CommandCounter(monitoring.CommandListener):
+    """Counts Mongo commands sent by the client"""
+    
+    def __init__(self):
+        self.total = 0
+        self.by_name = defaultdict(int)
+    
+    def started(self, event):
+        self.total += 1
+        self.by_name[event.command_name] += 1
+    
+    def succeeded(self, event):
+        pass
+    
+    def failed(self, event):
+        pass
+
+
+class FakeMessage:
+    def __init__(self, sid: str):
+        self.sid = sid
+        self.status = "queued"
+
+
+class FakeTwilioClient:
+    """Stands in for twilio.rest.Client; records messages instead of sending"""
+    
+    def __init__(self, clock: VirtualClock):
+        self.clock = clock
+        self.sent = []
+        self.messages = self
+    
+    def create(self, to: str, from_: str, body: str) -> FakeMessage:
+        self.sent.append((self.clock.utcnow(), to))
+        return FakeMessage(f"SM{ObjectId()}")
+
+
+async def seed(db, doctors: int, patients: int, day_start: datetime, hours: int):
+    """Insert doctors, patients and a day of :00/:30 appointments with pending reminders"""
+    await db.client.drop_database(SIM_DB_NAME)
+    await initialize_indexes(db)
+    
+    # Non-+1555 numbers so messages reach the fake transport instead of being skipped
+    doctor_docs = [
+        {"role": "doctor", "name": f"Dr. Sim {i}", "email": f"sim.doctor{i}@clinic.com", "phone": f"+1999100{i:04d}"}
+        for i in range(doctors)
+    ]
+    patient_docs = [
+        {"role": "patient", "name": f"Patient Sim {i}", "email": f"sim.patient{i}@clinic.com", "phone": f"+1999200{i:04d}"}
+        for i in range(patients)
+    ]
+    doctor_ids = (await db["users"].insert_many(doctor_docs)).inserted_ids
+    patient_ids = (await db["users"].insert_many(patient_docs)).inserted_ids
+    
+    appointments = []
+    for doctor_id in doctor_ids:
+        for slot in range(hours * 2):
+            start = day_start + timedelta(minutes=30 * slot)
+            appointments.append({
+                "doctorId": doctor_id,
+                "patientId": random.choice(patient_ids),
+                "start": start,
+                "end": start + timedelta(minutes=30),
+                "status": "scheduled",
+                "reason": "Simulation",
+                "createdAt": start - timedelta(days=2),
+                "createdBy": "patient",
+                "reminder3hSent": False,
+                "pendingReminders": scheduler_service.pending_reminders(
+                    start, day_start - timedelta(days=2), scheduler_service.get_reminder_offsets(None)
+                ),
+                "twilioLogs": []
+            })
+    await db["appointments"].insert_many(appointments, ordered=False)
+    return [apt["_id"] for apt in appointments]
+
+
+async def simulate_patients(db, now: datetime, confirmers: set, attendees: set):
+    """Patients confirm once reminded; doctors complete attended appointments after start"""
+    appointments = db["appointments"]
+    await appointments.update_many(
+        {"_id": {"$in": list(confirmers)}, "status": "scheduled", "reminder3hSent": True},
+        {"$set": {"status": "confirmed", "confirmedAt": now}}
+    )
+    await appointments.update_many(
+        {"_id": {"$in": list(attendees)}, "status": "confirmed", "start": {"$lte": now - timedelta(minutes=5)}},
+        {"$set": {"status": "completed"}, "$unset": scheduler_service.CLEAR_REMINDER}
+    )
+
+
+async def timed(label: str, func, counter: CommandCounter, results: dict):
+    """Run one sweep, recording wall duration and Mongo commands"""
+    ops_before = counter.total
+    started = time.perf_counter()
+    await func()
+    results[label]["durations"].append((time.perf_counter() - started) * 1000)
+    results[label]["ops"] += counter.total - ops_before
+
+
+def report(results: dict, counter: CommandCounter, fake_client: FakeTwilioClient, wall_seconds: float, span: timedelta):
+    """Print per-sweep timings and throughput"""
+    print("\n" + "=" * 72)
+    print(f"SIMULATED {span} IN {wall_seconds:.1f}s WALL TIME")
+    print("=" * 72)
+    print(f"{'sweep':<26}{'runs':>6}{'median ms':>11}{'p95 ms':>9}{'max ms':>9}{'mongo ops':>11}")
+    for label, data in results.items():
+        durations = sorted(data["durations"])
+        if not durations:
+            continue
+        p95 = durations[max(0, int(len(durations) * 0.95) - 1)]
+        print(
+            f"{label:<26}{len(durations):>6}{statistics.median(durations):>11.1f}"
+            f"{p95:>9.1f}{durations[-1]:>9.1f}{data['ops']:>11}"
+        )
+    
+    print(f"\nMongo commands: {counter.total} total")
+    for name, count in sorted(counter.by_name.items(), key=lambda item: -item[1]):
+        print(f"  {name:<16}{count:>8}")
+    
+    sent = len(fake_client.sent)
+    print(f"\nMessages: {sent} sent, {sent / wall_seconds:.1f}/s wall")
+    per_minute = defaultdict(int)
+    for sent_at, _ in fake_client.sent:
+        per_minute[sent_at.replace(second=0, microsecond=0)] += 1
+    if per_minute:
+        peak_minute, peak = max(per_minute.items(), key=lambda item: item[1])
+        print(f"Peak virtual minute: {peak} messages at {peak_minute:%H:%M} ({peak / 60:.1f}/s)")
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Replay a clinic day through the scheduler sweeps")
+    parser.add_argument("--doctors", type=int, default=20)
+    parser.add_argument("--patients", type=int, default=500)
+    parser.add_argument("--hours", type=int, default=8, help="Clinic hours of :00/:30 slots per doctor")
+    parser.add_argument("--confirm-rate", type=float, default=0.8, help="Share of patients confirming after the reminder")
+    parser.add_argument("--attend-rate", type=float, default=0.9, help="Share of confirmed patients who attend")
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    random.seed(args.seed)
+    
+    counter = CommandCounter()
+    client = AsyncIOMotorClient(settings.MONGODB_URL, event_listeners=[counter])
+    db = client[SIM_DB_NAME]
+    db_module.mongodb.client = client
+    db_module.mongodb.db = db
+    
+    # Simulated day starts at midnight; clinic opens at 09:00
+    sim_start = datetime.utcnow().replace(hour=0, minute=0, second=0, microsecond=0) + timedelta(days=1)
+    clock = VirtualClock(sim_start)
+    set_clock(clock)
+    fake_client = FakeTwilioClient(clock)
+    twilio_service.twilio_client = fake_client
+    scheduler_service.reminder_bucket = TokenBucket(
+        settings.REMINDER_RATE_PER_SECOND, settings.REMINDER_BURST, clock=clock.monotonic, sleep=clock.sleep
+    )
+    
+    try:
+        appointment_ids = await seed(db, args.doctors, args.patients, sim_start + timedelta(hours=9), args.hours)
+        confirmers = {apt_id for apt_id in appointment_ids if random.random() < args.confirm_rate}
+        attendees = {apt_id for apt_id in confirmers if random.random() < args.attend_rate}
+        print(f"🌱 Seeded {len(appointment_ids):,} appointments for {args.doctors} doctors")
+        
+        results = defaultdict(lambda: {"durations": [], "ops": 0})
+        end = sim_start + timedelta(hours=24)
+        next_tick = sim_start
+        next_minute = sim_start
+        counter.total = 0
+        counter.by_name.clear()
+        started = time.perf_counter()
+        
+        while clock.utcnow() < end:
+            clock.advance_to(next_tick)
+            now = clock.utcnow()
+            
+            await timed("sweep_due_reminders", scheduler_service.sweep_due_reminders, counter, results)
+            if now >= next_minute:
+                await simulate_patients(db, now, confirmers, attendees)
+                await timed("auto_cancel_unconfirmed", scheduler_service.auto_cancel_unconfirmed, counter, results)
+                await timed("auto_cancel_no_shows", scheduler_service.auto_cancel_no_shows, counter, results)
+                next_minute += timedelta(minutes=1)
+            
+            # Token bucket waits may have moved the clock past the next tick already
+            next_tick = now + TICK
+        
+        # Write the remaining buffered SMS logs so they're counted
+        await twilio_service.twilio_log_writer.close()
+        
+        wall_seconds = time.perf_counter() - started
+        report(results, counter, fake_client, wall_seconds, end - sim_start)
+        
+        print("\nFinal statuses:")
+        async for row in db["appointments"].aggregate([{"$group": {"_id": "$status", "count": {"$sum": 1}}}]):
+            print(f"  {row['_id']:<12}{row['count']:>8}")
+    finally:
+        await client.drop_database(SIM_DB_NAME)
+        client.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -172,10 +172,10 @@ try:
         print(f"   Patient: {data['patientName']}")
         print(f"   Reason: {data['reason']}")
         
-        if data.get("reminderJobMeta"):
-            print(f"\n⏰ Reminder scheduled:")
-            print(f"   Job ID: {data['reminderJobMeta']['job_id']}")
-            print(f"   Will send at: {data['reminderJobMeta']['scheduled_at']}")
+        if data.get("pendingReminders"):
+            print(f"\n⏰ Reminders scheduled:")
+            for due_at in data["pendingReminders"]:
+                print(f"   Will send at: {due_at}")
         
         appointment_id = data['id']
         